@@ -4,6 +4,8 @@ import time
 import re
 from datetime import datetime
 
+import pandas as pd
+
 def parse_response_with_thinking(response: str):
     """Parse response to separate thinking and actual response."""
     # Pattern to match <think>...</think> tags
@@ -18,6 +20,16 @@ def parse_response_with_thinking(response: str):
     
     return thinking_content, cleaned_response
 
+def render_result_table(table: dict):
+    """Render SQL result rows as an interactive dataframe (single values are already in the answer)."""
+    if not table or not table.get("columns") or not table.get("rows"):
+        return
+    if len(table["rows"]) == 1 and len(table["columns"]) == 1:
+        return
+    st.dataframe(pd.DataFrame(table["rows"], columns=table["columns"]), use_container_width=True, hide_index=True)
+    if table.get("truncated"):
+        st.caption(f"Showing the first {len(table['rows'])} rows.")
+
 def render_chat():
     """Render the main chat interface."""
     current_thread_id = st.session_state.current_thread_id
@@ -42,6 +54,7 @@ def render_chat():
                 
                 # Display the main response
                 st.markdown(message["content"])
+                render_result_table(message.get("table"))
             else:
                 st.markdown(message["content"])
     
@@ -76,7 +89,9 @@ def _handle_chat_input(current_thread: dict, show_thinking: bool):
         with st.chat_message("assistant"):
             with st.spinner("Processing your query..."):
                 try:
-                    response = asyncio.run(process_query_async(prompt, workflow, graph))
+                    response, table = asyncio.run(
+                        process_query_async(prompt, workflow, graph, st.session_state.get("text_to_sql_mode"))
+                    )
                     
                     if response:
                         # Parse the response to separate thinking and content
@@ -89,6 +104,7 @@ def _handle_chat_input(current_thread: dict, show_thinking: bool):
                         
                         # Display the main response
                         st.markdown(cleaned_response)
+                        render_result_table(table)
                         
                         # Store both thinking and response in message history
                         message_data = {
@@ -97,6 +113,8 @@ def _handle_chat_input(current_thread: dict, show_thinking: bool):
                         }
                         if thinking_content:
                             message_data["thinking"] = thinking_content
+                        if table:
+                            message_data["table"] = table
                         
                         current_thread['messages'].append(message_data)
                         
@@ -110,18 +128,26 @@ def _handle_chat_input(current_thread: dict, show_thinking: bool):
                     st.error(error_msg)
                     current_thread['messages'].append({"role": "assistant", "content": error_msg})
 
-async def process_query_async(query: str, workflow, graph):
-    """Process a user query through the SupervisorWorkflow."""
+async def process_query_async(query: str, workflow, graph, text_to_sql_mode: str = None):
+    """
+    Process a user query through the SupervisorWorkflow.
+
+    Returns:
+        Tuple of the response text and the SQL result table (columns/rows dict) or None.
+    """
     try:
         config = workflow.get_config()
         final_output = None
+        table = None
         
-        async for step in graph.astream({"user_query": query}, config):
+        async for step in graph.astream({"user_query": query, "text_to_sql_mode": text_to_sql_mode}, config):
             for node_name, node_data in step.items():
                 if "agent_output" in node_data:
                     final_output = node_data['agent_output']
+                if node_data.get("query_results"):
+                    table = node_data["query_results"]
         
-        return final_output or "No response generated"
+        return final_output or "No response generated", table
         
     except Exception as e:
-        return f"Error: {str(e)}"
+        return f"Error: {str(e)}", None
@@ -1,5 +1,6 @@
 import streamlit as st
 import time
+from frontend.config.settings import TEXT_TO_SQL_MODES
 from frontend.utils.session_state import restart_application
 
 def render_sidebar():
@@ -20,6 +21,16 @@ def render_sidebar():
                 st.rerun()
         
         st.divider()
+
+        # Per-request text-to-SQL mode
+        st.selectbox(
+            "⚡ Text-to-SQL Mode",
+            TEXT_TO_SQL_MODES,
+            key="text_to_sql_mode",
+            help="'fast' writes and runs the SQL in a single step and falls back to the agent loop on failure.",
+        )
+
+        st.divider()
         
         # Thread list
         _render_thread_list()
@@ -9,3 +9,6 @@ MAX_TITLE_LENGTH = 30
 
 # UI settings
 SIDEBAR_STATE = "expanded"
+
+# Text-to-SQL settings
+TEXT_TO_SQL_MODES = ["agent", "fast"]
@@ -1,6 +1,7 @@
 import streamlit as st
 import time
 from datetime import datetime
+from src.utils import config
 
 def initialize_session_state():
     """Initialize Streamlit session state for thread management."""
@@ -23,6 +24,9 @@ def initialize_session_state():
     if 'thread_counter' not in st.session_state:
         st.session_state.thread_counter = 1
 
+    if 'text_to_sql_mode' not in st.session_state:
+        st.session_state.text_to_sql_mode = config.TEXT_TO_SQL_MODE
+
 def restart_application():
     """Clear all session state and restart the app."""
     for key in list(st.session_state.keys()):
@@ -10,9 +10,11 @@ from langgraph.checkpoint.memory import MemorySaver
 from src.utils import config
 from src.utils.llm_adapter import LLMAdapter
 from src.utils.logger import get_logger
+from src.utils.warmup import start_background_warmup
 from src.data.prompts.supervisor_prompt import system_prompt, user_prompt
 from src.agents.state import State, SupervisorAgentOutput
 from src.agents.text_to_sql.text_to_sql_workflow import TextToSQLWorkflow
+from src.agents.text_to_sql.text_to_sql_tools import format_result_table
 from src.agents.rag.rag_workflow import RAGWorkflow
 from src.agents.misleading.misleading_workflow import MisleadingWorkflow
 
@@ -44,6 +46,9 @@ class SupervisorWorkflow:
         self.rag_graph: StateGraph = self.rag_workflow.build_graph()
         self.misleading_graph: StateGraph = self.misleading_workflow.build_graph()
 
+        # Embedding model, vector store and few-shot examples load lazily; start loading them now
+        start_background_warmup()
+
     def get_config(self) -> Dict[str, Any]:
         """Get configuration with thread ID for memory persistence."""
         return {"configurable": {"thread_id": self.thread_id}}
@@ -103,7 +108,8 @@ class SupervisorWorkflow:
             return {
                 "agent_name": agent_name, 
                 "messages": updated_messages,
-                "supervisor_response": response
+                "supervisor_response": response,
+                "query_results": None,  # tables belong to the turn that produced them
             }
 
         except Exception as e:
@@ -124,7 +130,8 @@ class SupervisorWorkflow:
             # Pass conversation history to the text2sql workflow
             text2sql_input = {
                 "user_query": user_query,
-                "messages": conversation_history
+                "messages": conversation_history,
+                "mode": state.get("text_to_sql_mode"),
             }
 
             text2sql_output = await self.text2sql_graph.ainvoke(
@@ -132,14 +139,23 @@ class SupervisorWorkflow:
             )
             logger.info("Successfully processed text2sql request")
 
-            # Create AI response message
-            ai_response = AIMessage(content=text2sql_output.get("model_output", ""))
+            # Create AI response message. Template answers only summarise a
+            # table the client renders, so the rows are kept in the history
+            # for follow-up questions.
+            model_output = text2sql_output.get("model_output", "")
+            query_results = text2sql_output.get("query_results")
+            history_content = model_output
+            if text2sql_output.get("answer_source") == "template" and query_results and len(query_results.get("rows") or []) > 1:
+                history_content = f"{model_output}\n\n{format_result_table(query_results)}"
+            ai_response = AIMessage(content=history_content)
             updated_messages = conversation_history + [ai_response]
 
             return {
                 "agent_name": "text2sql",
                 "messages": updated_messages,
-                "agent_output": text2sql_output.get("model_output", ""),
+                "agent_output": model_output,
+                "sql_query": text2sql_output.get("sql_query"),
+                "query_results": query_results,
             }
 
         except Exception as e:
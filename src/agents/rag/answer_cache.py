@@ -0,0 +1,207 @@
+"""
+Persistent semantic cache of RAG answers.
+
+The manuals only change when they are re-ingested, yet every repeat of a
+popular question went through the retrieval tool and two LLM calls. The
+answer cache stores each final answer, with the passages it was based on,
+in an SQLite file next to the Chroma files (`<collection>.answers.sqlite3`),
+so it survives restarts and is shared by all processes.
+
+A question is answered from the cache when an earlier question's embedding
+has a cosine similarity of at least RAG_ANSWER_CACHE_MIN_SIMILARITY with
+its own, with the same vehicle filter, under the same corpus version. The
+corpus version is a hash of the ingestion manifest (see `ManualCatalog`), so
+any re-ingestion that changes the collection invalidates every answer; the
+stale rows are deleted on the next lookup.
+
+Only the first question of a conversation is looked up, and its answer is
+stored only if the retrieval calls searched for the question itself. Later
+questions may depend on earlier turns: "How do I check tyre pressure?" asked
+about the Hunter 350 is not the question asked about every manual, and a
+follow-up such as "and for the Hunter?" is rewritten by the LLM from the
+conversation, so their answers do not belong to their text.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+def answer_cache_path(persist_directory: Union[str, Path], collection_name: str) -> Path:
+    return Path(persist_directory) / f"{collection_name}.answers.sqlite3"
+
+
+def filter_key(where: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(where, sort_keys=True)
+
+
+@dataclass
+class CachedAnswer:
+    """An answer served from the cache."""
+
+    question: str
+    answer: str
+    sources: List[str]
+    similarity: float
+
+
+class AnswerCache:
+    """Answers keyed by question embedding, vehicle filter and corpus version."""
+
+    def __init__(self, path: Union[str, Path], min_similarity: float = 0.95, max_entries: int = 5000):
+        """
+        Args:
+            path: SQLite file of the cache (created on first use)
+            min_similarity: Cosine similarity from which a cached question counts as the same
+            max_entries: Answers kept; the least recently used are deleted beyond that
+        """
+        self.path = Path(path)
+        self.min_similarity = min_similarity
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Answers of the current version in memory: row ids, unit question vectors and filter keys
+        self._version: Optional[str] = None
+        self._data_version: Optional[int] = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._filters: List[str] = []
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "id INTEGER PRIMARY KEY, corpus_version TEXT NOT NULL, question TEXT NOT NULL, "
+                "filter TEXT NOT NULL, embedding BLOB NOT NULL, answer TEXT NOT NULL, sources TEXT NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _sync(self, conn: sqlite3.Connection, version: str) -> None:
+        """Load the answers of `version`, deleting older versions' when the version changed."""
+        # data_version changes when another connection (another process) commits
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version and data_version == self._data_version:
+            return
+        if version != self._version:
+            with conn:
+                deleted = conn.execute("DELETE FROM answers WHERE corpus_version != ?", (version,)).rowcount
+            if deleted:
+                logger.info(f"Answer cache: dropped {deleted} answers of an older corpus version")
+                metrics.increment("rag.answer_cache_invalidated", deleted)
+        rows = conn.execute("SELECT id, filter, embedding FROM answers WHERE corpus_version = ?", (version,)).fetchall()
+        self._ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._filters = [row[1] for row in rows]
+        self._vectors = (
+            np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+            if rows
+            else np.zeros((0, 0), dtype=np.float32)
+        )
+        self._version = version
+        self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def lookup(
+        self, question: str, embedding: Sequence[float], where: Optional[Dict[str, Any]], version: str
+    ) -> Optional[CachedAnswer]:
+        """The cached answer of the most similar question, if similar enough."""
+        query = self._unit(embedding)
+        key = filter_key(where)
+        with self._lock:
+            conn = self._connection()
+            self._sync(conn, version)
+            best, similarity = -1, -1.0
+            if len(self._ids) and self._vectors.shape[1] == query.shape[0]:
+                scores = self._vectors @ query
+                for index in np.argsort(-scores):
+                    if scores[index] < self.min_similarity:
+                        break
+                    if self._filters[index] == key:
+                        best, similarity = int(self._ids[index]), float(scores[index])
+                        break
+            if best < 0:
+                metrics.increment("rag.answer_cache", result="miss")
+                return None
+            with conn:
+                row = conn.execute("SELECT question, answer, sources FROM answers WHERE id = ?", (best,)).fetchone()
+                conn.execute("UPDATE answers SET hits = hits + 1, last_used = ? WHERE id = ?", (time.time(), best))
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if row is None:
+            return None
+        metrics.increment("rag.answer_cache", result="hit")
+        metrics.observe("rag.answer_cache_similarity", similarity)
+        logger.info(f"Answer cache hit ({similarity:.3f}) for '{question}' with '{row[0]}'")
+        return CachedAnswer(question=row[0], answer=row[1], sources=json.loads(row[2]), similarity=similarity)
+
+    def put(
+        self,
+        question: str,
+        embedding: Sequence[float],
+        where: Optional[Dict[str, Any]],
+        version: str,
+        answer: str,
+        sources: Sequence[str],
+    ) -> None:
+        """Store the answer of a question under the corpus version it was retrieved from."""
+        vector = self._unit(embedding)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            self._sync(conn, version)
+            with conn:
+                conn.execute(
+                    "INSERT INTO answers (corpus_version, question, filter, embedding, answer, sources, created, "
+                    "last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (version, question, filter_key(where), vector.tobytes(), answer, json.dumps(list(sources)), now, now),
+                )
+                conn.execute(
+                    "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+            # Reloaded on the next call
+            self._data_version = None
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM answers")
+            self._version = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> AnswerCache:
+    """The process-wide answer cache of the configured RAG collection."""
+    return AnswerCache(
+        answer_cache_path(config.DB_DIRECTORY, config.COLLECTION_NAME),
+        min_similarity=config.RAG_ANSWER_CACHE_MIN_SIMILARITY,
+        max_entries=config.RAG_ANSWER_CACHE_MAX_ENTRIES,
+    )
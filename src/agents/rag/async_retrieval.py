@@ -0,0 +1,204 @@
+"""
+Executor and query-embedding micro-batching for the async retrieval tool.
+
+A synchronous `database_retrieval` ran the query embedding (CPU-bound) and
+the vector search (disk-bound) on whichever thread invoked it, so concurrent
+conversations either queued behind each other on the event loop or spread
+over LangChain's unbounded default executor, each embedding its query in a
+separate model call.
+
+The async tool instead:
+
+- runs searches on one bounded, process-wide thread pool
+  (`RAG_RETRIEVAL_WORKERS` threads);
+- sends query embeddings through `MicroBatcher`, which collects the queries
+  arriving within `RAG_EMBED_BATCH_WINDOW_MS` of each other (up to
+  `RAG_EMBED_MAX_BATCH`) and embeds them in one call on that pool
+  (`embed_queries`, which gives the same vectors as `embed_query`). One batched forward pass costs little more than a single one,
+  so throughput grows with the number of concurrent users. A query arriving
+  while no batch is running is embedded at once, so a single user does not
+  pay the window.
+
+The batcher is thread-based and hands out `concurrent.futures.Future`s, so it
+serves every event loop of the process (the frontend starts one per request)
+as well as plain threads.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.agents.rag.retrieval_cache import retrieval_cache
+from src.agents.rag.vector_store import VectorStoreManager, get_vector_store_manager
+
+if TYPE_CHECKING:
+    from src.agents.rag.mmap_index import MmapIndexManager
+
+logger = get_logger(__name__)
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+class MicroBatcher(Generic[Item, Result]):
+    """Coalesces single-item calls that arrive close together into one batched call."""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Item]], Sequence[Result]],
+        executor: concurrent.futures.Executor,
+        window_ms: float = 3.0,
+        max_batch: int = 32,
+        name: str = "batcher",
+    ):
+        """
+        Args:
+            batch_fn: Computes the results of a list of items, in order
+            executor: Runs the batches, so several can be in progress at once
+            window_ms: How long the first item of a batch waits for others
+            max_batch: Items per batch; a full batch is dispatched at once
+            name: Label used in metrics and the collector thread name
+        """
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.window_s = max(0.0, window_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self.name = name
+        self._queue: "queue.Queue[Tuple[Item, concurrent.futures.Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._running = 0
+
+    def submit(self, item: Item) -> "concurrent.futures.Future[Result]":
+        """Queue an item; the future completes when its batch has run."""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._queue.put((item, future))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, name=f"{self.name}-collector", daemon=True)
+                self._thread.start()
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # An item arriving while no batch runs (a lone user) is not held back
+            deadline = time.monotonic() + (self.window_s if self._running else 0.0)
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:
+                self._running += 1
+            try:
+                self.executor.submit(self._run, batch)
+            except RuntimeError as e:
+                # Executor shut down (interpreter exit)
+                with self._lock:
+                    self._running -= 1
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def _run(self, batch: List[Tuple[Item, concurrent.futures.Future]]) -> None:
+        started = time.perf_counter()
+        try:
+            results = self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            with self._lock:
+                self._running -= 1
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        metrics.observe(f"rag.{self.name}_batch_size", len(batch))
+        metrics.observe(f"rag.{self.name}_batch_ms", (time.perf_counter() - started) * 1000)
+
+
+_executor_lock = threading.Lock()
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_batchers: Dict[int, Tuple[Embeddings, MicroBatcher]] = {}
+
+
+def get_retrieval_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """The bounded thread pool running retrieval searches and embedding batches."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, config.RAG_RETRIEVAL_WORKERS), thread_name_prefix="rag-retrieval"
+            )
+        return _executor
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    `embed_query` of each text, in one model call where the model allows it.
+
+    Models that encode queries differently from documents (instruction or
+    prefix models) must not be batched through `embed_documents`. Batching is
+    used for embeddings that provide `embed_queries` themselves, and for
+    sentence-transformer models without query-specific encode arguments;
+    other models embed each query on its own.
+    """
+    batched = getattr(embeddings, "embed_queries", None)
+    if batched is not None:
+        return batched(texts)
+    if type(embeddings).__name__ == "HuggingFaceEmbeddings" and not getattr(embeddings, "query_encode_kwargs", None):
+        return embeddings.embed_documents(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+def get_query_embedding_batcher(embeddings: Embeddings) -> MicroBatcher:
+    """The process-wide query-embedding batcher of an embeddings instance."""
+    executor = get_retrieval_executor()
+    with _executor_lock:
+        entry = _batchers.get(id(embeddings))
+        if entry is None or entry[0] is not embeddings:
+            batcher = MicroBatcher(
+                functools.partial(embed_queries, embeddings),
+                executor,
+                window_ms=config.RAG_EMBED_BATCH_WINDOW_MS,
+                max_batch=config.RAG_EMBED_MAX_BATCH,
+                name="query_embedding",
+            )
+            entry = _batchers[id(embeddings)] = (embeddings, batcher)
+        return entry[1]
+
+
+async def aembed_query(query: str, embeddings: Embeddings) -> np.ndarray:
+    """
+    Embedding of a query without blocking the event loop: from the retrieval
+    cache, else from the next micro-batch.
+    """
+    if config.RAG_CACHE_ENABLED:
+        vector = retrieval_cache.cached_embedding(query)
+        if vector is not None:
+            return vector
+    embedding = await asyncio.wrap_future(get_query_embedding_batcher(embeddings).submit(query))
+    if config.RAG_CACHE_ENABLED:
+        return retrieval_cache.store_embedding(query, embedding)
+    return np.asarray(embedding, dtype=np.float32)
+
+
+async def run_in_retrieval_executor(fn: Callable[..., Result], *args: Any) -> Result:
+    """Run a blocking retrieval step on the bounded pool."""
+    return await asyncio.get_running_loop().run_in_executor(get_retrieval_executor(), fn, *args)
+
+
+async def aget_vector_store_manager() -> Union[VectorStoreManager, "MmapIndexManager"]:
+    """The process-wide vector store manager, created on the pool: creating it loads the embedding model."""
+    return await run_in_retrieval_executor(get_vector_store_manager)
@@ -0,0 +1,247 @@
+"""
+Packing of retrieved RAG chunks into the context sent to the LLM.
+
+Ingestion splits pages into 1000-character chunks that overlap by 300, so
+the chunks returned for one question often repeat each other's text: two
+neighbouring chunks of a page share up to 30% of their characters, and
+repeated headers or warnings show up on several pages. All of it used to go
+to the LLM verbatim.
+
+`pack_context` rebuilds passages instead:
+
+- chunks of the same source page are ordered by position and stitched
+  together where they overlap or follow each other, so the shared text
+  appears once
+- chunks contained in an earlier passage, and sentences already emitted by
+  a more relevant passage, are dropped
+- passages are ordered by the best retrieval rank of their chunks and cut
+  to a token budget, truncating the last one at a sentence boundary
+
+Each passage keeps its source file and page, which `format_passage` puts in
+front of the text.
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.documents import Document
+
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Rough token estimate (no tokenizer dependency): ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+# Shortest shared prefix/suffix treated as chunk overlap rather than coincidence
+_MIN_OVERLAP_CHARS = 20
+# Shorter sentences ("WARNING", "Note:") are too generic to deduplicate
+_MIN_DEDUP_SENTENCE_CHARS = 40
+# A truncated passage shorter than this is not worth its header
+_MIN_TRUNCATED_TOKENS = 40
+# Captured, so splitting keeps the separators (line breaks of tables, steps and lists)
+_SENTENCE_END = re.compile(r"((?<=[.!?])\s+|\n+)")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def overlap_length(left: str, right: str, min_chars: int = _MIN_OVERLAP_CHARS) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right` (0 below `min_chars`)."""
+    probe = right[:min_chars]
+    if len(probe) < min_chars:
+        return 0
+    start = left.find(probe, max(0, len(left) - len(right)))
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(probe, start + 1)
+    return 0
+
+
+@dataclass
+class PackedPassage:
+    """Merged text of one or more chunks of a source page."""
+
+    source: str
+    page: Optional[str]
+    text: str
+    rank: int
+    chunk_ids: List[str] = field(default_factory=list)
+
+    @property
+    def header(self) -> str:
+        return f"[Source: {self.source}, page {self.page}]" if self.page else f"[Source: {self.source}]"
+
+
+@dataclass
+class PackingStats:
+    chunks: int
+    passages: int
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _page_label(metadata: Dict) -> Optional[str]:
+    """Printed page label (PyPDFLoader's `page_label`), else the 1-based page number."""
+    if metadata.get("page_label") not in (None, ""):
+        return str(metadata["page_label"])
+    if isinstance(metadata.get("page"), int):
+        return str(metadata["page"] + 1)
+    return None
+
+
+def _page_key(doc: Document) -> Hashable:
+    metadata = doc.metadata or {}
+    return metadata.get("source", ""), metadata.get("page", metadata.get("page_label"))
+
+
+def _position(doc: Document, rank: int) -> Tuple[int, int]:
+    index = (doc.metadata or {}).get("chunk_index")
+    return (index if isinstance(index, int) else rank, rank)
+
+
+def _merge_page(ranked: List[Tuple[int, Document]]) -> List[PackedPassage]:
+    """Stitch the chunks of one page (given with their retrieval rank) into passages."""
+    ranked = sorted(ranked, key=lambda item: _position(item[1], item[0]))
+    metadata = ranked[0][1].metadata or {}
+    source, page = metadata.get("source", "unknown"), _page_label(metadata)
+
+    passages: List[PackedPassage] = []
+    previous_index: Optional[int] = None
+    for rank, doc in ranked:
+        text = doc.page_content.strip()
+        index = (doc.metadata or {}).get("chunk_index")
+        current = passages[-1] if passages else None
+        if current is not None and text in current.text:
+            current.rank = min(current.rank, rank)
+            current.chunk_ids.append(doc.id or "")
+            continue
+        overlap = overlap_length(current.text, text) if current is not None else 0
+        adjacent = isinstance(index, int) and previous_index is not None and index == previous_index + 1
+        if current is not None and (overlap or adjacent):
+            separator = "" if overlap else " "
+            current.text = current.text + separator + text[overlap:]
+            current.rank = min(current.rank, rank)
+            current.chunk_ids.append(doc.id or "")
+        else:
+            passages.append(PackedPassage(source, page, text, rank, [doc.id or ""]))
+        previous_index = index if isinstance(index, int) else None
+    return passages
+
+
+def _drop_seen_sentences(text: str, seen: Set[str]) -> str:
+    """
+    Remove sentences of `text` already in `seen`, and add its remaining ones to `seen`.
+
+    The kept sentences keep the separator that preceded them; where a sentence
+    is removed, the separator with more line breaks of the two around it stays.
+    """
+    parts = _SENTENCE_END.split(text)
+    pieces: List[str] = []
+    separator = ""
+    for i in range(0, len(parts), 2):
+        sentence = parts[i]
+        following = parts[i + 1] if i + 1 < len(parts) else ""
+        key = _normalize(sentence)
+        duplicate = len(key) >= _MIN_DEDUP_SENTENCE_CHARS and key in seen
+        if len(key) >= _MIN_DEDUP_SENTENCE_CHARS:
+            seen.add(key)
+        if duplicate or not sentence.strip():
+            separator = max(separator, following, key=lambda s: s.count("\n"))
+            continue
+        if pieces:
+            pieces.append(separator)
+        pieces.append(sentence)
+        separator = following
+    return "".join(pieces).strip()
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut `text` to about `max_tokens`, at the last sentence end when there is one."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"), cut.rfind("! "), cut.rfind("? "))
+    if boundary > limit // 2:
+        return cut[: boundary + 1].rstrip()
+    boundary = cut.rfind(" ")
+    return (cut[:boundary] if boundary > 0 else cut).rstrip() + " ..."
+
+
+def format_passage(passage: PackedPassage) -> str:
+    return f"{passage.header}\n{passage.text}"
+
+
+def pack_context(docs: Sequence[Document], token_budget: int = 1000) -> Tuple[List[PackedPassage], PackingStats]:
+    """
+    Merge, deduplicate and budget retrieved chunks.
+
+    Args:
+        docs: Retrieved chunks, most relevant first
+        token_budget: Estimated tokens of the formatted passages (headers included);
+            0 or less disables the cut
+
+    Returns:
+        The passages, most relevant first, and the token savings.
+    """
+    by_page: "OrderedDict[Hashable, List[Tuple[int, Document]]]" = OrderedDict()
+    for rank, doc in enumerate(docs):
+        by_page.setdefault(_page_key(doc), []).append((rank, doc))
+
+    merged = [passage for ranked in by_page.values() for passage in _merge_page(ranked)]
+    merged.sort(key=lambda passage: passage.rank)
+
+    packed: List[PackedPassage] = []
+    seen_sentences: Set[str] = set()
+    seen_texts: List[str] = []
+    used = 0
+    for passage in merged:
+        key = _normalize(passage.text)
+        if any(key in earlier for earlier in seen_texts):
+            continue
+        seen_texts.append(key)
+        passage.text = _drop_seen_sentences(passage.text, seen_sentences)
+        if not passage.text:
+            continue
+
+        cost = estimate_tokens(format_passage(passage)) + 1
+        if token_budget > 0 and used + cost > token_budget:
+            remaining = token_budget - used - estimate_tokens(passage.header) - 1
+            # The most relevant passage is always kept, if need be truncated
+            if remaining >= _MIN_TRUNCATED_TOKENS or not packed:
+                passage.text = _truncate(passage.text, max(remaining, _MIN_TRUNCATED_TOKENS))
+                packed.append(passage)
+            break
+        packed.append(passage)
+        used += cost
+
+    stats = PackingStats(
+        chunks=len(docs),
+        passages=len(packed),
+        tokens_before=sum(estimate_tokens(doc.page_content) for doc in docs),
+        tokens_after=sum(estimate_tokens(format_passage(passage)) for passage in packed),
+    )
+    metrics.observe("rag.context_tokens_retrieved", stats.tokens_before)
+    metrics.observe("rag.context_tokens_packed", stats.tokens_after)
+    logger.debug(
+        "Packed %d chunks into %d passages: %d -> %d tokens",
+        stats.chunks,
+        stats.passages,
+        stats.tokens_before,
+        stats.tokens_after,
+    )
+    return packed, stats
@@ -0,0 +1,427 @@
+"""
+Streaming parse -> embed -> upsert pipeline for RAG ingestion.
+
+The notebook parsed every PDF serially, held all their `Document`s in
+memory and embedded them through one `from_documents` call. Here each stage
+runs concurrently and only a bounded amount of work is in flight:
+
+1. A process pool extracts the text of each PDF and splits it into chunks;
+   at most `2 * parse_workers` files are being parsed or waiting.
+2. The main thread cuts the chunks into embedding batches of
+   `embed_batch_size` and puts them on a bounded queue.
+3. `embed_threads` threads call `embed_documents` on whole batches.
+4. One writer thread upserts the vectors into the collection (and the texts
+   into the BM25 keyword index) in batches of `upsert_batch_size` and
+   reports each file once all its chunks are written.
+
+Memory therefore depends on the batch and queue sizes, not on the corpus.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.agents.rag.keyword_index import KeywordIndex
+
+logger = get_logger(__name__)
+
+_STOP = object()
+_METADATA_TYPES = (str, int, float, bool)
+
+
+def chunk_id(relative_path: str, content_hash: str, index: int) -> str:
+    """Deterministic id of the `index`-th chunk of one version of a file."""
+    return f"{relative_path}:{content_hash[:16]}:{index}"
+
+
+def load_pdf(path: Union[str, Path]) -> List[Document]:
+    """One document per page, as `PyPDFDirectoryLoader` produced in the notebook."""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return PyPDFLoader(str(path)).load()
+
+
+def pdf_sections(path: Union[str, Path]) -> Dict[int, str]:
+    """Top-level outline (bookmark) title covering each 0-based page; empty for PDFs without an outline."""
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(str(path))
+        starts = sorted(
+            (reader.get_destination_page_number(item), item.title.strip())
+            for item in reader.outline
+            if not isinstance(item, list) and item.title
+        )
+        page_count = len(reader.pages)
+    except Exception as e:
+        logger.debug(f"No outline read from {path}: {e}")
+        return {}
+    sections = {}
+    for position, (first_page, title) in enumerate(starts):
+        last_page = starts[position + 1][0] if position + 1 < len(starts) else page_count
+        for page in range(max(first_page, 0), last_page):
+            sections[page] = title
+    return sections
+
+
+@lru_cache(maxsize=4)
+def _splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+@dataclass
+class ParsedFile:
+    """Chunks of one PDF in the plain form Chroma stores (and processes can pickle)."""
+
+    relative_path: str
+    content_hash: str
+    pages: int
+    ids: List[str]
+    texts: List[str]
+    metadatas: List[Dict[str, Any]]
+    parse_seconds: float = 0.0
+
+
+def parse_file(
+    relative_path: str,
+    path: Union[str, Path],
+    content_hash: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    file_metadata: Optional[Dict[str, Any]] = None,
+) -> ParsedFile:
+    """
+    Extract and split one PDF. Runs in the parse worker processes.
+
+    Chunks carry the page metadata of the loader, the section of their page
+    in the PDF outline, and `file_metadata` (the brand and model of the manual).
+    """
+    started = time.perf_counter()
+    pages = load_pdf(path)
+    sections = pdf_sections(path)
+    chunks = _splitter(chunk_size, chunk_overlap).split_documents(pages)
+    metadatas = []
+    for index, chunk in enumerate(chunks):
+        metadata = {key: value for key, value in chunk.metadata.items() if isinstance(value, _METADATA_TYPES)}
+        metadata.update(file_metadata or {})
+        if metadata.get("page") in sections:
+            metadata["section"] = sections[metadata["page"]]
+        metadata.update(source=relative_path, file_sha256=content_hash, chunk_index=index)
+        metadatas.append(metadata)
+    return ParsedFile(
+        relative_path=relative_path,
+        content_hash=content_hash,
+        pages=len(pages),
+        ids=[chunk_id(relative_path, content_hash, index) for index in range(len(chunks))],
+        texts=[chunk.page_content for chunk in chunks],
+        metadatas=metadatas,
+        parse_seconds=time.perf_counter() - started,
+    )
+
+
+@dataclass
+class PipelineStats:
+    files: int = 0
+    pages: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    parse_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+    failed: List[str] = field(default_factory=list)
+
+    @property
+    def pages_per_s(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def chunks_per_s(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.pages_per_s:.1f} pages/s, {self.chunks_per_s:.1f} chunks/s "
+            f"(stage time: parse {self.parse_seconds:.1f}s, embed {self.embed_seconds:.1f}s, "
+            f"upsert {self.upsert_seconds:.1f}s)"
+        )
+
+
+# One embedding batch: (file, start, end) slices of parsed files
+Segments = List[Tuple[ParsedFile, int, int]]
+
+
+class IngestionPipeline:
+    """Concurrent PDF parsing, batched embedding and batched upserts into a Chroma collection."""
+
+    def __init__(
+        self,
+        collection: Any,
+        embeddings: Embeddings,
+        chunk_size: int,
+        chunk_overlap: int,
+        parse_workers: int = 1,
+        embed_batch_size: int = 256,
+        embed_threads: int = 1,
+        upsert_batch_size: int = 256,
+        queue_size: int = 4,
+        keyword_index: Optional[KeywordIndex] = None,
+    ):
+        """
+        Args:
+            collection: Chroma collection (`chromadb` API) the chunks are upserted into
+            embeddings: Embeddings used for the chunks (must match retrieval)
+            chunk_size: Characters per chunk
+            chunk_overlap: Characters shared by consecutive chunks
+            parse_workers: Processes extracting and splitting PDFs; 1 parses in the calling thread
+            embed_batch_size: Chunks per `embed_documents` call
+            embed_threads: Threads embedding batches concurrently
+            upsert_batch_size: Chunks per Chroma upsert
+            queue_size: Batches buffered between the embedding and upsert stages
+            keyword_index: BM25 index kept in sync with the collection, if any
+        """
+        self.collection = collection
+        self.embeddings = embeddings
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.parse_workers = max(1, parse_workers)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.embed_threads = max(1, embed_threads)
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.keyword_index = keyword_index
+
+    def run(
+        self,
+        tasks: Iterable[Tuple[str, Path, str, Dict[str, Any]]],
+        on_parsed: Callable[[ParsedFile], None],
+        on_written: Callable[[ParsedFile], None],
+    ) -> PipelineStats:
+        """
+        Parse, embed and upsert files.
+
+        Args:
+            tasks: (relative path, path, content hash, metadata for all its chunks) of each file
+            on_parsed: Called in this thread before any chunk of the file is written
+            on_written: Called in the writer thread once every chunk of the file is written
+
+        Returns:
+            Counts and throughput; files that failed to parse are listed in `failed`.
+
+        Raises:
+            Exception: The first error of the embedding or upsert stage, after the pipeline stopped.
+        """
+        stats = PipelineStats()
+        started = time.perf_counter()
+        self._error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._remaining: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        embed_queue: "queue.Queue" = queue.Queue(maxsize=self.embed_threads * 2)
+        write_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+
+        embedders = [
+            threading.Thread(target=self._embed_loop, args=(embed_queue, write_queue, stats), daemon=True)
+            for _ in range(self.embed_threads)
+        ]
+        writer = threading.Thread(target=self._write_loop, args=(write_queue, on_written, stats), daemon=True)
+        for thread in embedders + [writer]:
+            thread.start()
+
+        try:
+            segments: Segments = []
+            pending = 0
+            for parsed in self._parse(tasks, stats):
+                if self._stop.is_set():
+                    break
+                on_parsed(parsed)
+                stats.files += 1
+                stats.pages += parsed.pages
+                stats.parse_seconds += parsed.parse_seconds
+                self._remaining[parsed.relative_path] = len(parsed.ids)
+                if not parsed.ids:
+                    segments.append((parsed, 0, 0))
+                start = 0
+                while start < len(parsed.ids):
+                    end = min(start + self.embed_batch_size - pending, len(parsed.ids))
+                    segments.append((parsed, start, end))
+                    pending += end - start
+                    start = end
+                    if pending >= self.embed_batch_size:
+                        self._put(embed_queue, segments)
+                        segments, pending = [], 0
+            if segments:
+                self._put(embed_queue, segments)
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            for _ in embedders:
+                self._put(embed_queue, _STOP, force=True)
+            for thread in embedders:
+                thread.join()
+            self._put(write_queue, _STOP, force=True)
+            writer.join()
+
+        stats.seconds = time.perf_counter() - started
+        if self._error is not None:
+            raise self._error
+        metrics.observe("rag.ingest_pages_per_s", stats.pages_per_s)
+        metrics.observe("rag.ingest_chunks_per_s", stats.chunks_per_s)
+        return stats
+
+    def _parse(self, tasks: Iterable[Tuple[str, Path, str, Dict[str, Any]]], stats: PipelineStats) -> Iterable[ParsedFile]:
+        """Parsed files in completion order, with a bounded number of files in flight."""
+        if self.parse_workers == 1:
+            for relative_path, path, content_hash, file_metadata in tasks:
+                try:
+                    yield parse_file(
+                        relative_path, path, content_hash, self.chunk_size, self.chunk_overlap, file_metadata
+                    )
+                except Exception as e:
+                    logger.error(f"Parsing {relative_path} failed: {e}")
+                    stats.failed.append(relative_path)
+            return
+
+        # spawn, as for the SQL sandbox: forking a process that already runs embedding threads is unsafe
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            in_flight: Dict[concurrent.futures.Future, str] = {}
+            tasks = iter(tasks)
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < self.parse_workers * 2 and not self._stop.is_set():
+                    task = next(tasks, None)
+                    if task is None:
+                        exhausted = True
+                        break
+                    relative_path, path, content_hash, file_metadata = task
+                    future = pool.submit(
+                        parse_file,
+                        relative_path,
+                        str(path),
+                        content_hash,
+                        self.chunk_size,
+                        self.chunk_overlap,
+                        file_metadata,
+                    )
+                    in_flight[future] = relative_path
+                if not in_flight:
+                    break
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    relative_path = in_flight.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        logger.error(f"Parsing {relative_path} failed: {e}")
+                        stats.failed.append(relative_path)
+                if self._stop.is_set():
+                    for future in in_flight:
+                        future.cancel()
+                    return
+
+    def _put(self, target: "queue.Queue", item: Any, force: bool = False) -> None:
+        """Blocking put that gives up once the pipeline stopped, unless `force` (for shutdown markers)."""
+        if force:
+            target.put(item)
+            return
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _fail(self, error: BaseException) -> None:
+        with self._stats_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _embed_loop(self, embed_queue: "queue.Queue", write_queue: "queue.Queue", stats: PipelineStats) -> None:
+        while True:
+            segments = embed_queue.get()
+            if segments is _STOP:
+                return
+            if self._stop.is_set():
+                continue
+            try:
+                texts = [text for parsed, start, end in segments for text in parsed.texts[start:end]]
+                started = time.perf_counter()
+                vectors = self.embeddings.embed_documents(texts) if texts else []
+                elapsed = time.perf_counter() - started
+                with self._stats_lock:
+                    stats.embed_seconds += elapsed
+                metrics.observe("rag.ingest_embed_batch_ms", elapsed * 1000)
+                self._put(write_queue, (segments, vectors))
+            except BaseException as e:
+                self._fail(e)
+
+    def _write_loop(
+        self, write_queue: "queue.Queue", on_written: Callable[[ParsedFile], None], stats: PipelineStats
+    ) -> None:
+        while True:
+            item = write_queue.get()
+            if item is _STOP:
+                return
+            if self._stop.is_set():
+                continue
+            segments, vectors = item
+            try:
+                ids, texts, metadatas = [], [], []
+                for parsed, start, end in segments:
+                    ids += parsed.ids[start:end]
+                    texts += parsed.texts[start:end]
+                    metadatas += parsed.metadatas[start:end]
+                for start in range(0, len(ids), self.upsert_batch_size):
+                    end = start + self.upsert_batch_size
+                    began = time.perf_counter()
+                    self.collection.upsert(
+                        ids=ids[start:end],
+                        embeddings=vectors[start:end],
+                        documents=texts[start:end],
+                        metadatas=metadatas[start:end],
+                    )
+                    if self.keyword_index is not None:
+                        self.keyword_index.upsert(
+                            ids[start:end],
+                            texts[start:end],
+                            [metadata["source"] for metadata in metadatas[start:end]],
+                        )
+                    elapsed = time.perf_counter() - began
+                    stats.upsert_seconds += elapsed
+                    stats.chunks += len(ids[start:end])
+                    metrics.observe("rag.ingest_batch_ms", elapsed * 1000)
+                    metrics.increment("rag.ingest_chunks", len(ids[start:end]))
+                for parsed, start, end in segments:
+                    self._remaining[parsed.relative_path] -= end - start
+                    if self._remaining[parsed.relative_path] == 0:
+                        del self._remaining[parsed.relative_path]
+                        on_written(parsed)
+            except BaseException as e:
+                self._fail(e)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
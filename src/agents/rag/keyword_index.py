@@ -0,0 +1,250 @@
+"""
+BM25 keyword index over the RAG chunks, and hybrid retrieval.
+
+Dense MiniLM embeddings blur exact tokens such as fuse numbers, feature
+names ("MyKey") or torque values, so keyword-heavy questions took several
+reworded `database_retrieval` calls. The chunks are therefore also stored in
+an SQLite FTS5 table next to the Chroma files (`<collection>.keywords.sqlite3`),
+maintained by the ingestion pipeline. FTS5 keeps a compact on-disk inverted
+index and ranks with BM25.
+
+`hybrid_search` fuses the BM25 ranking with the vector similarity ranking
+by reciprocal rank fusion: a chunk scores `sum(1 / (rrf_k + rank))` over the
+rankings it appears in, so neither the unbounded BM25 scores nor the
+distances need calibrating against each other.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.documents import Document
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Porter stemming over unicode61: "brakes" matches "brake"; digits and mixed tokens ("F23", "15A") stay whole
+_TOKENIZER = "porter unicode61 remove_diacritics 2"
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Terms that only add noise to an OR query over manual text
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it my of on or the this to what when where which "
+    "with you your".split()
+)
+
+
+def keyword_index_path(persist_directory: Union[str, Path], collection_name: str) -> Path:
+    return Path(persist_directory) / f"{collection_name}.keywords.sqlite3"
+
+
+def match_expression(query: str) -> Optional[str]:
+    """FTS5 query OR-ing the quoted terms of free text, or None when it has no searchable term."""
+    terms = []
+    for term in _TERM_PATTERN.findall(query.lower()):
+        if term not in _STOPWORDS and term not in terms:
+            terms.append(term)
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class KeywordIndex:
+    """FTS5 table of chunk id, source and text, ranked with BM25."""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: SQLite file of the index (created on first write)
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5("
+                f"chunk_id UNINDEXED, source UNINDEXED, content, tokenize='{_TOKENIZER}')"
+            )
+            # FTS5 cannot index chunk_id, so deletes by id go through this mapping to the FTS rowid
+            self._conn.execute("CREATE TABLE IF NOT EXISTS chunk_rowids (chunk_id TEXT PRIMARY KEY, fts_rowid INTEGER)")
+            self._conn.commit()
+        return self._conn
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def upsert(self, ids: Sequence[str], texts: Sequence[str], sources: Sequence[str]) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                self._delete(conn, ids)
+                for chunk_id, text, source in zip(ids, texts, sources):
+                    cursor = conn.execute(
+                        "INSERT INTO chunks (chunk_id, source, content) VALUES (?, ?, ?)", (chunk_id, source, text)
+                    )
+                    conn.execute("INSERT INTO chunk_rowids VALUES (?, ?)", (chunk_id, cursor.lastrowid))
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                self._delete(conn, ids)
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, ids: Sequence[str]) -> None:
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start : start + 500])
+            placeholders = ",".join("?" * len(batch))
+            conn.execute(
+                f"DELETE FROM chunks WHERE rowid IN "
+                f"(SELECT fts_rowid FROM chunk_rowids WHERE chunk_id IN ({placeholders}))",
+                batch,
+            )
+            conn.execute(f"DELETE FROM chunk_rowids WHERE chunk_id IN ({placeholders})", batch)
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM chunks")
+                conn.execute("DELETE FROM chunk_rowids")
+
+    def search(self, query: str, k: int = 50, sources: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Best `k` chunks for the terms of `query`.
+
+        Args:
+            query: Free text
+            k: Chunks to return
+            sources: Only return chunks of these PDFs
+
+        Returns:
+            (chunk id, BM25 score) pairs, best first; higher scores are better.
+        """
+        expression = match_expression(query)
+        if expression is None or not self.exists() or (sources is not None and not sources):
+            return []
+        sql = "SELECT chunk_id, bm25(chunks) AS score FROM chunks WHERE chunks MATCH ?"
+        params: List[Any] = [expression]
+        if sources is not None:
+            sql += f" AND source IN ({','.join('?' * len(sources))})"
+            params += list(sources)
+        started = time.perf_counter()
+        with self._lock:
+            rows = self._connection().execute(sql + " ORDER BY score LIMIT ?", (*params, k)).fetchall()
+        metrics.observe("rag.keyword_search_ms", (time.perf_counter() - started) * 1000)
+        # FTS5's bm25() is negative, more negative meaning more relevant
+        return [(chunk_id, -score) for chunk_id, score in rows]
+
+    def rebuild_from_collection(self, collection: Any, batch_size: int = 1000) -> int:
+        """
+        Index every chunk of a Chroma collection, e.g. one ingested before the keyword index existed.
+
+        Returns:
+            Number of chunks indexed.
+        """
+        self.clear()
+        indexed = 0
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            sources = [(metadata or {}).get("source", "") for metadata in batch["metadatas"]]
+            self.upsert(batch["ids"], [text or "" for text in batch["documents"]], sources)
+            indexed += len(batch["ids"])
+        return indexed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[str]], rrf_k: int = 60, weights: Optional[Sequence[float]] = None
+) -> List[Tuple[str, float]]:
+    """
+    Fuse rankings of ids by reciprocal rank.
+
+    Args:
+        rankings: Id lists, best first
+        rrf_k: Damping constant; larger values flatten the advantage of top ranks
+        weights: Optional weight per ranking (default 1.0 each)
+
+    Returns:
+        (id, fused score) pairs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for position, ranking in enumerate(rankings):
+        weight = weights[position] if weights is not None else 1.0
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + weight / (rrf_k + rank + 1)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+def hybrid_search(
+    vectorstore: Any,
+    keyword_index: KeywordIndex,
+    query: str,
+    embedding: Sequence[float],
+    k: int = 5,
+    fetch_k: int = 50,
+    rrf_k: int = 60,
+    keyword_weight: float = 1.0,
+    filter: Optional[Dict[str, Any]] = None,
+    sources: Optional[Sequence[str]] = None,
+) -> List[Document]:
+    """
+    Reciprocal rank fusion of vector similarity and BM25 rankings.
+
+    Args:
+        vectorstore: Chroma wrapper of the collection
+        keyword_index: BM25 index over the same chunk ids
+        query: Query text, for the keyword ranking
+        embedding: Query embedding, for the vector ranking
+        k: Documents to return
+        fetch_k: Candidates taken from each ranking
+        rrf_k: Reciprocal rank fusion constant
+        keyword_weight: Weight of the keyword ranking relative to the vector ranking
+        filter: Metadata filter of the vector search
+        sources: PDFs the keyword search is restricted to (those matching `filter`)
+
+    Returns:
+        The best `k` fused documents.
+    """
+    started = time.perf_counter()
+    vector_docs = vectorstore.similarity_search_by_vector([float(x) for x in embedding], k=fetch_k, filter=filter)
+    by_id = {doc.id: doc for doc in vector_docs}
+    keyword_ids = [chunk_id for chunk_id, _ in keyword_index.search(query, fetch_k, sources)]
+
+    fused = reciprocal_rank_fusion([list(by_id), keyword_ids], rrf_k=rrf_k, weights=[1.0, keyword_weight])
+    top_ids = [chunk_id for chunk_id, _ in fused[:k]]
+    missing = [chunk_id for chunk_id in top_ids if chunk_id not in by_id]
+    if missing:
+        by_id.update({doc.id: doc for doc in vectorstore.get_by_ids(missing)})
+
+    metrics.observe("rag.hybrid_search_ms", (time.perf_counter() - started) * 1000)
+    metrics.increment("rag.hybrid_keyword_only_hits", len(missing))
+    # Ids indexed by keyword but gone from the collection (stale index) are dropped
+    return [by_id[chunk_id] for chunk_id in top_ids if chunk_id in by_id]
+
+
+@lru_cache(maxsize=1)
+def get_keyword_index() -> KeywordIndex:
+    """The process-wide keyword index of the configured RAG collection."""
+    return KeywordIndex(keyword_index_path(config.DB_DIRECTORY, config.COLLECTION_NAME))
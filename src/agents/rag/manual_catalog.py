@@ -0,0 +1,224 @@
+"""
+Catalogue of the vehicle manuals in the RAG collection, and vehicle filters.
+
+Every chunk is tagged at ingestion with the `brand` and `model` of its
+manual (plus `section` from the PDF outline and the page). Retrieval turns
+the vehicle a question is about into a metadata filter, so only that
+manual's chunks are searched; with dozens of manuals the search space per
+question stays the size of one manual.
+
+Brand and model come from `manuals.json` in the PDF directory when the file
+lists the PDF:
+
+    {"Ford_Figo.pdf": {"brand": "Ford", "model": "Ford Figo", "aliases": ["Figo"]}}
+
+and are otherwise derived from the path: `<brand>/<model>.pdf`, or the
+words of the file name (`Ford_Figo_Owner_Manual.pdf` -> Ford / Ford Figo).
+The ingestion manifest records each PDF's manual, and `ManualCatalog` reads
+it back on the retrieval side.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from src.utils import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MANUAL_CATALOG_FILE = "manuals.json"
+# Words of manual file names that do not name the vehicle
+_GENERIC_WORDS = frozenset(
+    "manual manuals owner owners user users guide handbook book service rider riders english en pdf final".split()
+)
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def ingestion_manifest_path(persist_directory: Union[str, Path], collection_name: str) -> Path:
+    return Path(persist_directory) / f"{collection_name}.ingestion.json"
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class ManualInfo:
+    """Vehicle a manual documents."""
+
+    brand: str
+    model: str
+    aliases: Tuple[str, ...] = ()
+
+    def metadata(self) -> Dict[str, str]:
+        """Chunk metadata of the manual."""
+        return {"brand": self.brand, "model": self.model}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"brand": self.brand, "model": self.model, "aliases": list(self.aliases)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ManualInfo":
+        return cls(brand=data["brand"], model=data["model"], aliases=tuple(data.get("aliases", ())))
+
+    def names(self) -> List[Tuple[str, ...]]:
+        """Word sequences that refer to the model: its name, the name without the brand, and the aliases."""
+        names = [tuple(_words(self.model))]
+        brand_words = _words(self.brand)
+        if names[0][: len(brand_words)] == tuple(brand_words) and len(names[0]) > len(brand_words):
+            names.append(names[0][len(brand_words) :])
+        names += [tuple(_words(alias)) for alias in self.aliases]
+        return [name for name in dict.fromkeys(names) if name]
+
+
+def infer_manual(relative_path: str) -> ManualInfo:
+    """Brand and model from the path of a PDF relative to the PDF directory."""
+    path = Path(relative_path)
+    words = [word for word in re.split(r"[\s_\-.]+", path.stem) if word and word.lower() not in _GENERIC_WORDS]
+    if len(path.parts) > 1:
+        brand = path.parts[0].replace("_", " ").strip()
+        brand_words = _words(brand)
+        if [word.lower() for word in words[: len(brand_words)]] != brand_words:
+            words = brand.split() + words
+    else:
+        brand = words[0] if words else path.stem
+    model = " ".join(words) or path.stem
+    return ManualInfo(brand=brand, model=model)
+
+
+def load_manual_overrides(pdf_directory: Union[str, Path]) -> Dict[str, ManualInfo]:
+    """Entries of `manuals.json` in the PDF directory, keyed by relative path (empty without the file)."""
+    path = Path(pdf_directory) / MANUAL_CATALOG_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {relative_path: ManualInfo.from_dict(entry) for relative_path, entry in data.items()}
+
+
+def _contains(words: Sequence[str], phrase: Sequence[str]) -> bool:
+    size = len(phrase)
+    return any(tuple(words[i : i + size]) == tuple(phrase) for i in range(len(words) - size + 1))
+
+
+def matches_filter(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Whether metadata satisfies a Chroma `where` filter of equality / `$eq` / `$in` / `$and` / `$or` clauses."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            for operator, operand in condition.items():
+                if operator == "$eq" and metadata.get(key) != operand:
+                    return False
+                if operator == "$in" and metadata.get(key) not in operand:
+                    return False
+                if operator not in ("$eq", "$in"):
+                    raise ValueError(f"Unsupported filter operator '{operator}'")
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def filter_keys(where: Dict[str, Any]) -> Set[str]:
+    """Metadata keys a `where` filter refers to."""
+    keys: Set[str] = set()
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            for clause in condition:
+                keys |= filter_keys(clause)
+        else:
+            keys.add(key)
+    return keys
+
+
+class ManualCatalog:
+    """Ingested manuals: the PDFs of each vehicle, and the vehicles a text mentions."""
+
+    def __init__(self, manuals: Dict[str, ManualInfo], version: Optional[str] = None):
+        """
+        Args:
+            manuals: Manual of each ingested PDF, keyed by source (relative path)
+            version: Corpus version, a hash of the ingestion manifest (None without one)
+        """
+        self.manuals = manuals
+        self.version = version
+        self.models: Dict[str, ManualInfo] = {info.model: info for info in manuals.values()}
+        self.brands = sorted({info.brand for info in manuals.values()})
+
+    @classmethod
+    def from_manifest(cls, path: Union[str, Path]) -> "ManualCatalog":
+        """Catalogue of the manuals recorded in an ingestion manifest (empty if there is none)."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls({})
+        files = data.get("files", {})
+        # Changes whenever ingestion adds, changes, re-tags or removes a file, or changes the settings
+        content = json.dumps({"settings": data.get("settings"), "files": files}, sort_keys=True)
+        return cls(
+            {source: ManualInfo.from_dict(entry["manual"]) for source, entry in files.items() if "manual" in entry},
+            version=hashlib.sha1(content.encode("utf-8")).hexdigest()[:16],
+        )
+
+    def match(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata filter for the vehicles named in `text`.
+
+        Model names (with or without the brand) and aliases select those models;
+        a brand name alone selects the brand. Text naming no known vehicle gives None.
+
+        Returns:
+            A Chroma `where` filter on `model` or `brand`, or None.
+        """
+        words = _words(text)
+        models = sorted(
+            model for model, info in self.models.items() if any(_contains(words, name) for name in info.names())
+        )
+        if models:
+            return {"model": models[0]} if len(models) == 1 else {"model": {"$in": models}}
+        brands = [brand for brand in self.brands if _contains(words, _words(brand))]
+        if brands:
+            return {"brand": brands[0]} if len(brands) == 1 else {"brand": {"$in": brands}}
+        return None
+
+    def sources(self, where: Dict[str, Any]) -> List[str]:
+        """PDFs (chunk `source` values) whose manual matches a filter made by `match`."""
+        return sorted(source for source, info in self.manuals.items() if matches_filter(info.metadata(), where))
+
+    def describe(self) -> str:
+        return ", ".join(sorted(self.models)) or "no manuals"
+
+
+_catalog_lock = threading.Lock()
+_catalog: Optional[ManualCatalog] = None
+_catalog_fingerprint: Optional[Tuple] = None
+
+
+def get_manual_catalog() -> ManualCatalog:
+    """Catalogue of the configured collection, re-read when ingestion rewrites its manifest."""
+    global _catalog, _catalog_fingerprint
+    path = ingestion_manifest_path(config.DB_DIRECTORY, config.COLLECTION_NAME)
+    try:
+        stat = os.stat(path)
+        fingerprint: Optional[Tuple] = (stat.st_ino, stat.st_mtime_ns)
+    except FileNotFoundError:
+        fingerprint = None
+    with _catalog_lock:
+        if _catalog is None or fingerprint != _catalog_fingerprint:
+            _catalog = ManualCatalog.from_manifest(path)
+            _catalog_fingerprint = fingerprint
+            logger.debug(f"Manual catalogue: {_catalog.describe()}")
+        return _catalog
@@ -0,0 +1,563 @@
+"""
+Memory-mapped, quantized vector index for RAG retrieval.
+
+Opening Chroma in a worker process loads the HNSW graph and vectors into
+that process' heap and opens its SQLite metadata. This backend instead
+exports the collection to flat files next to it, in a directory per export
+under `<collection>.vectors/`, whose `CURRENT` file names the export in use:
+
+- `vectors.npy`: unit-normalized embeddings as an int8 (with per-row
+  `scales.npy`) or float16 matrix;
+- `documents.jsonl` + `offsets.npy`: id, text and metadata of each row,
+  and `ids.json` for lookups by id;
+- `list_offsets.npy`: the rows are stored grouped by manual (`model`
+  metadata), and within a manual by nearest IVF centroid (`centroids.npy`)
+  when the index has IVF lists. A brand/model filter therefore scans only the
+  row ranges of the matching manuals.
+
+Everything is opened with `mmap`, so all processes on a host share one copy
+through the page cache and opening costs next to nothing. Search is a
+vectorized dot product over the matrix (exact) or over the `nprobe` closest
+IVF lists; a filtered search whose manuals hold fewer rows than that is
+exact.
+
+`MmapVectorIndex` implements the subset of the LangChain `Chroma` API used
+by the retrieval tool (similarity and MMR search, `get_by_ids`), so it is a
+drop-in replacement selected by `RAG_VECTOR_BACKEND=mmap`.
+
+A new export is written to a directory of its own and then published by
+atomically replacing `CURRENT`, so readers always find a complete export.
+
+Export or refresh it (ingestion does this automatically with that setting):
+    python -m src.agents.rag.mmap_index --dtype int8 --nlist 0
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.agents.rag.manual_catalog import filter_keys, matches_filter
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+DTYPES = ("int8", "float16")
+# Rows dequantized at a time: bounds the float32 scratch memory per query (4096 x 384 dims = 6 MB)
+_BLOCK_ROWS = 4096
+# Chunk metadata the rows are partitioned by; filters may only use these keys
+PARTITION_KEYS = ("brand", "model")
+# Names the export in use within the index directory
+CURRENT_FILE = "CURRENT"
+
+
+def mmap_index_path(persist_directory: Union[str, Path], collection_name: str) -> Path:
+    return Path(persist_directory) / f"{collection_name}.vectors"
+
+
+def current_export(directory: Union[str, Path]) -> Path:
+    """The directory holding the files of the export in use (exports without `CURRENT` hold them directly)."""
+    directory = Path(directory)
+    try:
+        name = (directory / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return directory
+    return directory / name
+
+
+def _publish_export(directory: Path, name: str) -> None:
+    """Point `CURRENT` at export `name`, then delete all exports but it and the previous one."""
+    previous = current_export(directory).name if (directory / CURRENT_FILE).exists() else None
+    pointer = directory / f"{CURRENT_FILE}.tmp-{os.getpid()}"
+    pointer.write_text(name, encoding="utf-8")
+    os.replace(pointer, directory / CURRENT_FILE)
+    # The previous export stays: a process may have read CURRENT just before the switch and still be opening it
+    for child in directory.iterdir():
+        if child.name in (CURRENT_FILE, name, previous) or ".tmp" in child.name:
+            continue
+        if child.is_dir():
+            shutil.rmtree(child, ignore_errors=True)
+        elif previous is not None:
+            # Files of an export from before CURRENT existed: the previous one when there was no pointer
+            child.unlink(missing_ok=True)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Unit vectors as `dtype`; int8 rows come with their scale (max |value| / 127)."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of unit vectors (trained on a sample of at most 256 rows per list)."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), nlist * 256), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for cluster in range(nlist):
+            members = sample[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def build_mmap_index(
+    collection: Any,
+    directory: Union[str, Path],
+    dtype: str = "int8",
+    nlist: int = 0,
+    batch_size: int = 2000,
+) -> Dict[str, Any]:
+    """
+    Export a Chroma collection to a memory-mappable index.
+
+    The export is written to a new directory within `directory` and then
+    published by atomically replacing the `CURRENT` pointer. Processes that
+    have the previous export open keep reading it until they reopen.
+
+    Args:
+        collection: Chroma collection (`chromadb` API) to export
+        directory: Index directory
+        dtype: "int8" (4x smaller than float32) or "float16" (2x, near-lossless)
+        nlist: IVF lists; 0 builds an exact (flat) index
+        batch_size: Rows read from Chroma at a time
+
+    Returns:
+        The index metadata written to `meta.json`.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype}', expected one of {DTYPES}")
+    started = time.perf_counter()
+    directory = Path(directory)
+    name = f"v{time.time_ns()}-{os.getpid()}"
+    tmp_dir = directory / f"{name}.tmp"
+    tmp_dir.mkdir(parents=True)
+
+    ids: List[str] = []
+    vector_batches = []
+    partition_of: Dict[Tuple[str, ...], int] = {}
+    row_partitions: List[int] = []
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(include=["embeddings", "metadatas"], limit=batch_size, offset=offset)
+        ids += batch["ids"]
+        vector_batches.append(_normalize(batch["embeddings"]))
+        for metadata in batch["metadatas"]:
+            values = tuple(str((metadata or {}).get(key, "")) for key in PARTITION_KEYS)
+            row_partitions.append(partition_of.setdefault(values, len(partition_of)))
+    dim = vector_batches[0].shape[1] if vector_batches else 0
+    vectors = np.concatenate(vector_batches) if vector_batches else np.zeros((0, dim), dtype=np.float32)
+
+    # Partitions in sorted order, each holding its rows grouped by IVF list
+    partitions = sorted(partition_of)
+    rank = np.empty(max(1, len(partitions)), dtype=np.int64)
+    rank[[partition_of[values] for values in partitions]] = np.arange(len(partitions))
+    partition_ids = rank[np.asarray(row_partitions, dtype=np.int64)] if row_partitions else np.zeros(0, np.int64)
+    nlist = min(nlist, len(ids))
+    lists = max(1, nlist)
+    assignment = np.zeros(len(ids), dtype=np.int64)
+    if nlist > 0:
+        centroids = _kmeans(vectors, nlist)
+        assignment = np.concatenate(
+            [np.argmax(vectors[i : i + _BLOCK_ROWS] @ centroids.T, axis=1) for i in range(0, len(ids), _BLOCK_ROWS)]
+        )
+        np.save(tmp_dir / "centroids.npy", centroids.astype(np.float32))
+    keys = partition_ids * lists + assignment
+    order = np.argsort(keys, kind="stable")
+    list_offsets = np.searchsorted(keys[order], np.arange(max(1, len(partitions)) * lists + 1)).astype(np.int64)
+    np.save(tmp_dir / "list_offsets.npy", list_offsets)
+    vectors = vectors[order]
+    ids = [ids[i] for i in order]
+
+    quantized, scales = quantize(vectors, dtype)
+    np.save(tmp_dir / "vectors.npy", quantized)
+    if scales is not None:
+        np.save(tmp_dir / "scales.npy", scales)
+    del vectors, quantized
+
+    # Texts and metadata in the stored row order, one JSON line per row
+    offsets = [0]
+    with open(tmp_dir / "documents.jsonl", "wb") as f:
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start : start + batch_size]
+            batch = collection.get(ids=batch_ids, include=["documents", "metadatas"])
+            by_id = {
+                chunk_id: (text, metadata)
+                for chunk_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"])
+            }
+            for chunk_id in batch_ids:
+                text, metadata = by_id.get(chunk_id, ("", None))
+                line = json.dumps({"id": chunk_id, "text": text or "", "metadata": metadata or {}}).encode() + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+    np.save(tmp_dir / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+    with open(tmp_dir / "ids.json", "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "dtype": dtype,
+        "dim": int(dim),
+        "count": len(ids),
+        "nlist": int(nlist),
+        "partitions": [dict(zip(PARTITION_KEYS, values)) for values in partitions],
+    }
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    tmp_dir.rename(directory / name)
+    _publish_export(directory, name)
+    logger.info(
+        f"Exported {len(ids)} vectors ({dtype}, {'IVF ' + str(nlist) if nlist else 'flat'}, "
+        f"{len(partitions)} manuals) to {directory} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return meta
+
+
+def maximal_marginal_relevance(
+    query: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Indices of `k` candidates balancing similarity to the query and diversity, as LangChain's MMR.
+
+    Args:
+        query: Unit query vector
+        candidates: Unit candidate vectors, one per row
+        k: Number to select
+        lambda_mult: 1 for pure similarity, 0 for pure diversity
+    """
+    if not len(candidates):
+        return []
+    query_similarity = candidates @ query
+    pairwise = candidates @ candidates.T
+    selected = [int(np.argmax(query_similarity))]
+    max_similarity_to_selected = pairwise[selected[0]].copy()
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * query_similarity - (1 - lambda_mult) * max_similarity_to_selected
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(max_similarity_to_selected, pairwise[best], out=max_similarity_to_selected)
+    return selected
+
+
+class MmapVectorIndex:
+    """Read-only search over an exported index, with the retrieval subset of the `Chroma` API."""
+
+    def __init__(self, directory: Union[str, Path], embeddings: Embeddings, nprobe: int = 8):
+        """
+        Args:
+            directory: Index directory written by `build_mmap_index`; its current export is opened
+            embeddings: Embeddings used for query texts (must match ingestion)
+            nprobe: IVF lists scanned per query (ignored for flat indexes)
+
+        Raises:
+            FileNotFoundError: The index has not been exported.
+        """
+        self.directory = current_export(directory)
+        self.embeddings = embeddings
+        self.nprobe = nprobe
+        with open(self.directory / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        scales_path = self.directory / "scales.npy"
+        self.scales = np.load(scales_path, mmap_mode="r") if scales_path.exists() else None
+        self.offsets = np.load(self.directory / "offsets.npy", mmap_mode="r")
+        self.centroids = np.load(self.directory / "centroids.npy") if self.meta.get("nlist") else None
+        self.lists = max(1, self.meta.get("nlist", 0))
+        # Exports without partitions hold one; flat exports without list offsets one list
+        self.partitions: List[Dict[str, str]] = self.meta.get("partitions") or [{}]
+        offsets_path = self.directory / "list_offsets.npy"
+        self.list_offsets = (
+            np.load(offsets_path) if offsets_path.exists() else np.asarray([0, self.meta["count"]], dtype=np.int64)
+        )
+        # The mapping outlives the file; it is unmapped when the index is garbage-collected or closed
+        with open(self.directory / "documents.jsonl", "rb") as f:
+            self._documents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.meta["count"] else b""
+        self._row_by_id: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def partitions_matching(self, where: Optional[Dict[str, Any]]) -> Optional[List[int]]:
+        """
+        Partitions (manuals) satisfying a metadata filter, or None for no filter.
+
+        Raises:
+            ValueError: The filter uses metadata other than the partition keys.
+        """
+        if not where:
+            return None
+        unsupported = filter_keys(where) - set(PARTITION_KEYS)
+        if unsupported:
+            raise ValueError(f"Memory-mapped index can only filter on {PARTITION_KEYS}, not {sorted(unsupported)}")
+        return [i for i, values in enumerate(self.partitions) if matches_filter(values, where)]
+
+    def _partition_rows(self, partition: int) -> Tuple[int, int]:
+        return int(self.list_offsets[partition * self.lists]), int(self.list_offsets[(partition + 1) * self.lists])
+
+    def _rows_to_scan(self, query: np.ndarray, partitions: Optional[List[int]] = None) -> List[Tuple[int, int]]:
+        selected = range(len(self.partitions)) if partitions is None else partitions
+        if self.centroids is None:
+            return [self._partition_rows(p) for p in selected]
+        if partitions is not None:
+            # Small partitions are scanned whole: exact, and about as cheap as probing the whole index
+            rows = sum(end - start for start, end in map(self._partition_rows, partitions))
+            if rows <= max(self.nprobe * len(self) / self.lists, _BLOCK_ROWS):
+                return [self._partition_rows(p) for p in partitions]
+        nearest = sorted(np.argsort(self.centroids @ query)[::-1][: self.nprobe])
+        return [
+            (int(self.list_offsets[p * self.lists + c]), int(self.list_offsets[p * self.lists + c + 1]))
+            for p in selected
+            for c in nearest
+        ]
+
+    def _dequantize(self, start: int, end: int) -> np.ndarray:
+        block = np.asarray(self.vectors[start:end], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[start:end, None]
+        return block
+
+    def _rows_dequantized(self, rows: np.ndarray) -> np.ndarray:
+        block = np.asarray(self.vectors[rows], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[rows, None]
+        return block
+
+    def search_rows(
+        self, query: np.ndarray, k: int, partitions: Optional[List[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows and cosine similarities of the `k` best matches of a unit query vector, best first.
+
+        Args:
+            query: Unit query vector
+            k: Rows to return
+            partitions: Only search these partitions (see `partitions_matching`); None searches all
+        """
+        started = time.perf_counter()
+        rows_parts, score_parts = [], []
+        for start, end in self._rows_to_scan(query, partitions):
+            for block_start in range(start, end, _BLOCK_ROWS):
+                block_end = min(block_start + _BLOCK_ROWS, end)
+                scores = self._dequantize(block_start, block_end) @ query
+                if len(scores) > k:
+                    top = np.argpartition(scores, -k)[-k:]
+                    scores = scores[top]
+                    rows = top + block_start
+                else:
+                    rows = np.arange(block_start, block_end)
+                rows_parts.append(rows)
+                score_parts.append(scores)
+        if not rows_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows = np.concatenate(rows_parts)
+        scores = np.concatenate(score_parts)
+        best = np.argsort(scores)[::-1][:k]
+        metrics.observe("rag.mmap_search_ms", (time.perf_counter() - started) * 1000)
+        return rows[best], scores[best]
+
+    def _document(self, row: int) -> Document:
+        record = json.loads(self._documents[int(self.offsets[row]) : int(self.offsets[row + 1])])
+        return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"])
+
+    def _query_vector(self, embedding: Sequence[float]) -> np.ndarray:
+        return _normalize(np.asarray(embedding, dtype=np.float32))
+
+    def similarity_search_by_vector(
+        self, embedding: Sequence[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        rows, _ = self.search_rows(self._query_vector(embedding), k, self.partitions_matching(filter))
+        return [self._document(row) for row in rows]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k=k, filter=filter)
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        query = self._query_vector(embedding)
+        rows, _ = self.search_rows(query, fetch_k, self.partitions_matching(filter))
+        candidates = _normalize(self._rows_dequantized(rows)) if len(rows) else np.zeros((0, len(query)))
+        selected = maximal_marginal_relevance(query, candidates, k, lambda_mult)
+        return [self._document(rows[i]) for i in selected]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self.embeddings.embed_query(query), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+        )
+
+    def get_by_ids(self, ids: Sequence[str]) -> List[Document]:
+        with self._lock:
+            if self._row_by_id is None:
+                with open(self.directory / "ids.json", encoding="utf-8") as f:
+                    self._row_by_id = {chunk_id: row for row, chunk_id in enumerate(json.load(f))}
+        return [self._document(self._row_by_id[i]) for i in ids if i in self._row_by_id]
+
+    def close(self) -> None:
+        """Unmap the documents; only for an index no other thread still searches."""
+        if isinstance(self._documents, mmap.mmap):
+            self._documents.close()
+
+
+class MmapIndexManager:
+    """Process-wide `MmapVectorIndex`, reopened when a new export replaces the files."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        embedding_function: Embeddings,
+        nprobe: int = 8,
+        check_interval_s: float = 5.0,
+    ):
+        """
+        Args:
+            directory: Index directory written by `build_mmap_index`
+            embedding_function: Embeddings used for queries (must match ingestion)
+            nprobe: IVF lists scanned per query
+            check_interval_s: Minimum seconds between checks for a new export
+        """
+        self.directory = Path(directory)
+        self.embedding_function = embedding_function
+        self.nprobe = nprobe
+        self.check_interval_s = check_interval_s
+        self._lock = threading.RLock()
+        self._index: Optional[MmapVectorIndex] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._last_check = 0.0
+        self.reloads = 0
+        # Incremented on every (re)open; caches of retrieval results key on it
+        self.version = 0
+
+    def _disk_fingerprint(self) -> Optional[Tuple]:
+        for name in (CURRENT_FILE, "meta.json"):
+            try:
+                stat = os.stat(self.directory / name)
+            except FileNotFoundError:
+                continue
+            return name, stat.st_ino, stat.st_mtime_ns
+        return None
+
+    def _open(self) -> None:
+        from src.agents.rag.vector_store import VectorStoreUnavailable
+
+        started = time.perf_counter()
+        try:
+            self._index = MmapVectorIndex(self.directory, self.embedding_function, nprobe=self.nprobe)
+        except FileNotFoundError as e:
+            raise VectorStoreUnavailable(
+                f"Memory-mapped index not found at {self.directory}; export it with python -m src.agents.rag.mmap_index"
+            ) from e
+        self._fingerprint = self._disk_fingerprint()
+        self._last_check = time.monotonic()
+        self.version += 1
+        metrics.observe("rag.vector_store_open_ms", (time.perf_counter() - started) * 1000)
+        logger.info(f"Opened memory-mapped index {self.directory} ({len(self._index)} vectors)")
+
+    def get_vectorstore(self) -> MmapVectorIndex:
+        """
+        The shared index, opened on first use and reopened after a new export.
+
+        Raises:
+            VectorStoreUnavailable: The index has not been exported.
+        """
+        with self._lock:
+            if self._index is None:
+                self._open()
+            elif time.monotonic() - self._last_check >= self.check_interval_s:
+                self._last_check = time.monotonic()
+                if self._disk_fingerprint() != self._fingerprint:
+                    logger.info(f"Reloading memory-mapped index {self.directory} (new export)")
+                    self.reload()
+            return self._index
+
+    def reload(self) -> None:
+        """Open the current export; the previous index is unmapped once searches still using it release it."""
+        with self._lock:
+            self._open()
+            self.reloads += 1
+            metrics.increment("rag.vector_store_reloads")
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._index is None:
+                return {"open": False, "directory": str(self.directory)}
+            return {
+                "open": True,
+                "healthy": self._disk_fingerprint() is not None,
+                "directory": str(self.directory),
+                "documents": len(self._index),
+                "reloads": self.reloads,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._index = None
+
+
+def main(argv=None) -> None:
+    import chromadb
+
+    from src.agents.rag.vector_store import client_settings
+
+    parser = argparse.ArgumentParser(description="Export the RAG collection to a memory-mapped vector index.")
+    parser.add_argument("--persist-dir", default=str(config.DB_DIRECTORY), help="Chroma persistence directory")
+    parser.add_argument("--collection", default=config.COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--dtype", choices=DTYPES, default=config.RAG_MMAP_DTYPE, help="Stored vector type")
+    parser.add_argument("--nlist", type=int, default=config.RAG_MMAP_NLIST, help="IVF lists (0: exact search)")
+    args = parser.parse_args(argv)
+
+    client = chromadb.PersistentClient(path=args.persist_dir, settings=client_settings())
+    meta = build_mmap_index(
+        client.get_collection(args.collection),
+        mmap_index_path(args.persist_dir, args.collection),
+        dtype=args.dtype,
+        nlist=args.nlist,
+    )
+    print(f"Exported {meta['count']} vectors of dimension {meta['dim']} ({meta['dtype']}, nlist={meta['nlist']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Incremental ingestion of the PDF manuals into the RAG collection.
+
+Replaces the one-shot `RAG_ingestion` notebook, which re-embedded every PDF
+on each run. A manifest next to the Chroma files records, per PDF, its
+size, mtime, SHA-256 and the ids of its chunks. A run then:
+
+- skips files whose size and mtime (or, failing that, content hash) are
+  unchanged;
+- parses, splits and embeds only new or changed files through the
+  streaming `IngestionPipeline` (parse processes, batched embedding,
+  batched upserts), under deterministic chunk ids;
+- deletes the old chunks of changed files and the chunks of removed files.
+
+Chunks are tagged with the brand and model of their manual (see
+`manual_catalog`) and the section of their page; a PDF whose brand or model
+changed in `manuals.json` is re-tagged in place, without re-embedding.
+
+The BM25 keyword index used by hybrid retrieval is updated alongside the
+collection, and backfilled from it when missing. With
+`RAG_VECTOR_BACKEND=mmap` the memory-mapped vector index is re-exported
+after every run that changed the collection.
+
+The manifest is rewritten atomically after every file. Chunk ids derive
+from the file hash, so re-running after an interruption upserts the same
+ids again instead of duplicating them, and chunk ids recorded as pending
+before a write are cleaned up if the file changed in between.
+
+Usage:
+    python -m src.agents.rag.rag_ingestion
+    python -m src.agents.rag.rag_ingestion --pdf-dir src/data/pdfs --full
+    python -m src.agents.rag.rag_ingestion --dry-run
+    python -m src.agents.rag.rag_ingestion --full --workers 8 --embed-batch-size 512 --embed-threads 2
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.agents.rag.ingestion_pipeline import IngestionPipeline, ParsedFile, PipelineStats, peak_rss_mb
+from src.agents.rag.keyword_index import KeywordIndex, keyword_index_path
+from src.agents.rag.manual_catalog import ManualInfo, infer_manual, ingestion_manifest_path, load_manual_overrides
+from src.agents.rag.mmap_index import build_mmap_index, mmap_index_path
+from src.agents.rag.vector_store import client_settings
+
+logger = get_logger(__name__)
+
+MANIFEST_VERSION = 1
+# Bumped when chunks get new metadata fields, which rebuilds existing collections
+CHUNK_METADATA_VERSION = 1
+
+
+def file_sha256(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class IngestionReport:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    retagged: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failed: List[str] = field(default_factory=list)
+    pages: int = 0
+    chunks_written: int = 0
+    chunks_deleted: int = 0
+    seconds: float = 0.0
+    pipeline: Optional[PipelineStats] = None
+
+    def summary(self) -> str:
+        summary = (
+            f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed, "
+            f"{len(self.retagged)} retagged, {self.unchanged} unchanged, {len(self.failed)} failed; {self.pages} pages, "
+            f"{self.chunks_written} chunks written, {self.chunks_deleted} deleted in {self.seconds:.1f}s"
+        )
+        if self.pipeline is not None and self.pipeline.files:
+            summary += f"; {self.pipeline.summary()}"
+        return summary
+
+
+class IngestionManifest:
+    """Per-file hashes and chunk ids of a collection, persisted as JSON."""
+
+    def __init__(self, path: Union[str, Path], settings: Dict[str, Any]):
+        """
+        Args:
+            path: Manifest file
+            settings: Embedding model and chunking parameters; chunks made with
+                other settings are not reused
+        """
+        self.path = Path(path)
+        self.settings = settings
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.exists = False
+        self.settings_changed = False
+
+    def load(self) -> "IngestionManifest":
+        if not self.path.exists():
+            return self
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.exists = True
+        self.files = data.get("files", {})
+        if data.get("version") != MANIFEST_VERSION or data.get("settings") != self.settings:
+            self.settings_changed = True
+        return self
+
+    def save(self) -> None:
+        """Write to a temporary file and rename it over the manifest, so it is never half-written."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "settings": self.settings, "files": self.files}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.exists = True
+
+
+class IncrementalIngestor:
+    """Brings a Chroma collection in line with a directory of PDFs, touching only what changed."""
+
+    def __init__(
+        self,
+        pdf_directory: Union[str, Path],
+        persist_directory: Union[str, Path],
+        collection_name: str,
+        embeddings: Embeddings,
+        embedding_model: str = config.EMBEDDING_MODEL,
+        chunk_size: int = config.RAG_CHUNK_SIZE,
+        chunk_overlap: int = config.RAG_CHUNK_OVERLAP,
+        batch_size: int = config.RAG_INGEST_BATCH_SIZE,
+        parse_workers: int = config.RAG_INGEST_WORKERS,
+        embed_batch_size: int = config.RAG_EMBED_BATCH_SIZE,
+        embed_threads: int = config.RAG_EMBED_THREADS,
+        queue_size: int = config.RAG_INGEST_QUEUE_SIZE,
+        keyword_index: bool = config.RAG_KEYWORD_INDEX_ENABLED,
+        mmap_export: bool = config.RAG_VECTOR_BACKEND == "mmap",
+        manifest_path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            pdf_directory: Directory searched recursively for `*.pdf`
+            persist_directory: Chroma persistence directory
+            collection_name: Collection to write to (created if missing)
+            embeddings: Embeddings used for the chunks (must match retrieval)
+            embedding_model: Name recorded in the manifest; a different name forces a full rebuild
+            chunk_size: Characters per chunk
+            chunk_overlap: Characters shared by consecutive chunks
+            batch_size: Chunks per Chroma upsert / delete
+            parse_workers: Processes parsing and splitting PDFs
+            embed_batch_size: Chunks per `embed_documents` call
+            embed_threads: Threads embedding batches concurrently
+            queue_size: Embedded batches buffered before the upsert stage
+            keyword_index: Maintain the BM25 keyword index next to the collection
+            mmap_export: Re-export the memory-mapped vector index after changes
+            manifest_path: Defaults to `<persist_directory>/<collection_name>.ingestion.json`
+
+        Brand and model of each PDF come from `manuals.json` in `pdf_directory`, else from its path.
+        """
+        self.pdf_directory = Path(pdf_directory)
+        self.persist_directory = Path(persist_directory)
+        self.collection_name = collection_name
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.parse_workers = parse_workers
+        self.embed_batch_size = embed_batch_size
+        self.embed_threads = embed_threads
+        self.queue_size = queue_size
+        self.manifest = IngestionManifest(
+            manifest_path or ingestion_manifest_path(self.persist_directory, collection_name),
+            {
+                "embedding_model": embedding_model,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "chunk_metadata": CHUNK_METADATA_VERSION,
+            },
+        )
+        self.keyword_index = (
+            KeywordIndex(keyword_index_path(self.persist_directory, collection_name)) if keyword_index else None
+        )
+        self.mmap_export = mmap_export
+        self._vectorstore: Optional[Chroma] = None
+        # The pipeline's writer thread commits files while the main thread records pending ones
+        self._manifest_lock = threading.Lock()
+        self._file_stats: Dict[str, os.stat_result] = {}
+        self._manuals: Dict[str, ManualInfo] = {}
+
+    @property
+    def vectorstore(self) -> Chroma:
+        if self._vectorstore is None:
+            self.persist_directory.mkdir(parents=True, exist_ok=True)
+            client = chromadb.PersistentClient(path=str(self.persist_directory), settings=client_settings())
+            self._vectorstore = Chroma(
+                client=client, embedding_function=self.embeddings, collection_name=self.collection_name
+            )
+        return self._vectorstore
+
+    def scan(self) -> Dict[str, Path]:
+        """PDFs under the directory, keyed by path relative to it."""
+        if not self.pdf_directory.is_dir():
+            raise FileNotFoundError(f"PDF directory not found: {self.pdf_directory}")
+        return {
+            path.relative_to(self.pdf_directory).as_posix(): path
+            for path in sorted(self.pdf_directory.rglob("*"))
+            if path.is_file() and path.suffix.lower() == ".pdf"
+        }
+
+    def _delete(self, ids: List[str]) -> int:
+        for start in range(0, len(ids), self.batch_size):
+            self.vectorstore.delete(ids=ids[start : start + self.batch_size])
+        if self.keyword_index is not None and ids:
+            self.keyword_index.delete(ids)
+        return len(ids)
+
+    def _retag(self, relative_path: str, entry: Dict[str, Any], manual: ManualInfo) -> None:
+        """Rewrite the brand and model of a file's chunks in place."""
+        collection = self.vectorstore._collection
+        ids = entry.get("chunk_ids", [])
+        for start in range(0, len(ids), self.batch_size):
+            batch = collection.get(ids=ids[start : start + self.batch_size], include=["metadatas"])
+            metadatas = [{**(metadata or {}), **manual.metadata()} for metadata in batch["metadatas"]]
+            if batch["ids"]:
+                collection.update(ids=batch["ids"], metadatas=metadatas)
+        entry["manual"] = manual.to_dict()
+        self.manifest.save()
+        logger.info(f"Re-tagged {relative_path} as {manual.model}")
+
+    def _reset(self) -> None:
+        """Drop the collection and forget the manifest, for a full rebuild."""
+        try:
+            self.vectorstore.delete_collection()
+        except Exception as e:
+            logger.debug(f"Deleting collection '{self.collection_name}' failed: {e}")
+        self._vectorstore = None
+        if self.keyword_index is not None:
+            self.keyword_index.clear()
+        self.manifest.files = {}
+        self.manifest.save()
+
+    def _on_parsed(self, parsed: ParsedFile) -> None:
+        with self._manifest_lock:
+            entry = self.manifest.files.setdefault(parsed.relative_path, {"chunk_ids": []})
+            # Recorded before writing so an interrupted run can clean them up if the file changes meanwhile
+            entry["pending_chunk_ids"] = parsed.ids
+            self.manifest.save()
+
+    def _on_written(self, parsed: ParsedFile, report: IngestionReport) -> None:
+        """Delete the file's stale chunks and commit its manifest entry, once all its chunks are written."""
+        with self._manifest_lock:
+            entry = self.manifest.files[parsed.relative_path]
+            stale = set(entry.get("chunk_ids", []))
+            stale.update(entry.get("stale_chunk_ids", []))
+            stale.difference_update(parsed.ids)
+        deleted = self._delete(sorted(stale))
+
+        stat = self._file_stats[parsed.relative_path]
+        with self._manifest_lock:
+            self.manifest.files[parsed.relative_path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": parsed.content_hash,
+                "pages": parsed.pages,
+                "chunk_ids": parsed.ids,
+                "manual": self._manuals[parsed.relative_path].to_dict(),
+            }
+            self.manifest.save()
+        report.pages += parsed.pages
+        report.chunks_written += len(parsed.ids)
+        report.chunks_deleted += deleted
+        logger.info(f"Ingested {parsed.relative_path}: {parsed.pages} pages, {len(parsed.ids)} chunks")
+
+    def run(self, full: bool = False, dry_run: bool = False) -> IngestionReport:
+        """
+        Ingest new and changed PDFs and remove the chunks of deleted ones.
+
+        Args:
+            full: Drop the collection and re-ingest every file
+            dry_run: Only report what would change
+
+        Returns:
+            What was added, changed, removed and written.
+
+        Raises:
+            FileNotFoundError: The PDF directory does not exist.
+            RuntimeError: The collection has documents but no manifest; run with `full=True` once.
+        """
+        started = time.perf_counter()
+        report = IngestionReport()
+        self.manifest.load()
+        files = self.scan()
+        overrides = load_manual_overrides(self.pdf_directory)
+        self._manuals = {path: overrides.get(path) or infer_manual(path) for path in files}
+
+        if self.manifest.settings_changed and not full:
+            logger.warning(
+                "Embedding model, chunking or chunk metadata changed since the last ingestion, rebuilding the collection"
+            )
+            full = True
+        if not self.manifest.exists and not full and not dry_run and self.vectorstore._collection.count():
+            raise RuntimeError(
+                f"Collection '{self.collection_name}' has documents but no ingestion manifest "
+                f"({self.manifest.path}); run once with --full to rebuild it"
+            )
+        if full and not dry_run:
+            self._reset()
+        elif not dry_run:
+            self.manifest.save()
+            if self.keyword_index is not None and not self.keyword_index.count():
+                backfilled = self.keyword_index.rebuild_from_collection(self.vectorstore._collection)
+                if backfilled:
+                    logger.info(f"Built the keyword index from {backfilled} existing chunks")
+
+        known = {} if full else self.manifest.files
+        tasks = []
+        for relative_path, path in files.items():
+            entry = known.get(relative_path)
+            manual = self._manuals[relative_path]
+            stat = path.stat()
+            unchanged = False
+            if entry and "sha256" in entry and not entry.get("pending_chunk_ids"):
+                unchanged = entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+            if not unchanged:
+                content_hash = file_sha256(path)
+                if entry and entry.get("sha256") == content_hash and not entry.get("pending_chunk_ids"):
+                    # Touched but identical: only refresh the stat fields
+                    unchanged = True
+                    if not dry_run:
+                        entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                        self.manifest.save()
+            if unchanged:
+                if entry.get("manual") != manual.to_dict():
+                    report.retagged.append(relative_path)
+                    if not dry_run:
+                        self._retag(relative_path, entry, manual)
+                else:
+                    report.unchanged += 1
+                continue
+
+            (report.changed if entry and "sha256" in entry else report.added).append(relative_path)
+            if dry_run:
+                continue
+            if entry and entry.get("pending_chunk_ids"):
+                # Interrupted while writing an earlier version of this file
+                entry["stale_chunk_ids"] = sorted(
+                    set(entry.get("stale_chunk_ids", [])) | set(entry.pop("pending_chunk_ids"))
+                )
+            self._file_stats[relative_path] = stat
+            tasks.append((relative_path, path, content_hash, manual.metadata()))
+
+        if tasks:
+            pipeline = IngestionPipeline(
+                self.vectorstore._collection,
+                self.embeddings,
+                self.chunk_size,
+                self.chunk_overlap,
+                parse_workers=min(self.parse_workers, len(tasks)),
+                embed_batch_size=self.embed_batch_size,
+                embed_threads=self.embed_threads,
+                upsert_batch_size=self.batch_size,
+                queue_size=self.queue_size,
+                keyword_index=self.keyword_index,
+            )
+            report.pipeline = pipeline.run(
+                tasks, self._on_parsed, lambda parsed: self._on_written(parsed, report)
+            )
+            report.failed += report.pipeline.failed
+
+        for relative_path in sorted(set(known) - set(files)):
+            report.removed.append(relative_path)
+            if dry_run:
+                continue
+            entry = self.manifest.files[relative_path]
+            ids = set(entry.get("chunk_ids", []))
+            ids.update(entry.get("pending_chunk_ids", []), entry.get("stale_chunk_ids", []))
+            report.chunks_deleted += self._delete(sorted(ids))
+            del self.manifest.files[relative_path]
+            self.manifest.save()
+            logger.info(f"Removed {relative_path}: {len(ids)} chunks")
+
+        if self.mmap_export and not dry_run:
+            directory = mmap_index_path(self.persist_directory, self.collection_name)
+            if report.added or report.changed or report.removed or report.retagged or not directory.exists():
+                build_mmap_index(
+                    self.vectorstore._collection, directory, dtype=config.RAG_MMAP_DTYPE, nlist=config.RAG_MMAP_NLIST
+                )
+
+        report.seconds = time.perf_counter() - started
+        return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Incrementally ingest PDFs into the RAG vector store.")
+    parser.add_argument("--pdf-dir", default=str(config.PDF_DIRECTORY), help="Directory of PDF documents")
+    parser.add_argument("--persist-dir", default=str(config.DB_DIRECTORY), help="Chroma persistence directory")
+    parser.add_argument("--collection", default=config.COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--batch-size", type=int, default=config.RAG_INGEST_BATCH_SIZE, help="Chunks per upsert batch")
+    parser.add_argument(
+        "--workers", type=int, default=config.RAG_INGEST_WORKERS, help="Processes parsing and splitting PDFs"
+    )
+    parser.add_argument(
+        "--embed-batch-size", type=int, default=config.RAG_EMBED_BATCH_SIZE, help="Chunks per embedding call"
+    )
+    parser.add_argument(
+        "--embed-threads", type=int, default=config.RAG_EMBED_THREADS, help="Threads embedding batches concurrently"
+    )
+    parser.add_argument("--full", action="store_true", help="Drop the collection and re-ingest every PDF")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the files that would be ingested or removed")
+    args = parser.parse_args(argv)
+
+    from src.utils.embeddings import get_embeddings
+
+    ingestor = IncrementalIngestor(
+        args.pdf_dir,
+        args.persist_dir,
+        args.collection,
+        get_embeddings(),
+        batch_size=args.batch_size,
+        parse_workers=args.workers,
+        embed_batch_size=args.embed_batch_size,
+        embed_threads=args.embed_threads,
+    )
+    report = ingestor.run(full=args.full, dry_run=args.dry_run)
+    for label, paths in (
+        ("added", report.added),
+        ("changed", report.changed),
+        ("removed", report.removed),
+        ("retagged", report.retagged),
+    ):
+        for path in paths:
+            print(f"{label:8} {path}")
+    for path in report.failed:
+        print(f"{'failed':8} {path}")
+    print(("Dry run: " if args.dry_run else "") + report.summary())
+    peak = peak_rss_mb()
+    if peak is not None and not args.dry_run:
+        print(f"Peak memory: {peak:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
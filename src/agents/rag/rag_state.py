@@ -1,6 +1,10 @@
 from langgraph.graph import MessagesState
-from typing import List
+from typing import Any, List, Optional
 
 class State(MessagesState):
     model_output: str
     user_query :str
+    # RetrievalPrefetch of the current turn (RAG_SPECULATIVE_PREFETCH)
+    retrieval_prefetch: Optional[Any]
+    # Corpus version the turn's answer-cache lookup missed under (RAG_ANSWER_CACHE)
+    corpus_version: Optional[str]
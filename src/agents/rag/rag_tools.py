@@ -1,70 +1,142 @@
-import os
-from typing import List, Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from langchain_core.tools import tool
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langgraph.prebuilt import ToolNode
-import chromadb
+from langchain_core.documents import Document
+from langchain_core.tools import StructuredTool
 
+from src.agents.rag.async_retrieval import aembed_query, aget_vector_store_manager, run_in_retrieval_executor
+from src.agents.rag.context_packing import format_passage, pack_context
+from src.agents.rag.keyword_index import get_keyword_index, hybrid_search
+from src.agents.rag.manual_catalog import get_manual_catalog
+from src.agents.rag.retrieval_cache import retrieval_cache
+from src.agents.rag.vector_store import get_vector_store_manager
 from src.utils import config
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics
 
 logger = get_logger(__name__)
 
-embedder = HuggingFaceEmbeddings(model_name=config.EMBEDDING_MODEL)
+SEARCH_TYPES = ("mmr", "hybrid")
 
-def create_database_retrieval_tool() -> Any:
+
+def vehicle_filter(query: str, vehicle: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Metadata filter of a retrieval: the vehicle passed by the LLM, else the one
+    named in the query (None without RAG_VEHICLE_FILTER or a known vehicle).
+
+    Returns:
+        The Chroma `where` filter and its origin ("explicit", "inferred" or "none").
+    """
+    if not config.RAG_VEHICLE_FILTER:
+        return None, "none"
+    catalog = get_manual_catalog()
+    if vehicle:
+        where = catalog.match(vehicle)
+        if where is not None:
+            return where, "explicit"
+    where = catalog.match(query)
+    return where, "inferred" if where is not None else "none"
+
+
+def create_database_retrieval_tool(search_type: Optional[str] = None, vector_store_manager: Any = None) -> Any:
     """
     Factory to create a standalone LangChain tool function for document retrieval.
     Avoids 'self' binding issues with class methods.
+
+    Args:
+        search_type: "mmr" for vector MMR, "hybrid" for BM25 keyword + vector search
+            fused by reciprocal rank (defaults to RAG_SEARCH_TYPE)
+        vector_store_manager: Manager of the searched store (defaults to the process-wide one)
+
+    With RAG_VEHICLE_FILTER, the search is restricted to the manuals of the vehicle
+    passed by the LLM or named in the query (see `manual_catalog`). Invoked
+    asynchronously, the tool runs on the bounded retrieval pool and micro-batches
+    query embeddings (see `async_retrieval`).
     """
-    @tool
-    def database_retrieval(query: str) -> List[str]:
+    search_type = (search_type or config.RAG_SEARCH_TYPE).lower()
+    if search_type not in SEARCH_TYPES:
+        raise ValueError(f"Unknown RAG search type '{search_type}', expected one of {SEARCH_TYPES}")
+
+    def embed(vectorstore: Any, query: str) -> Sequence[float]:
+        if config.RAG_CACHE_ENABLED:
+            return retrieval_cache.embed_query(query, vectorstore.embeddings.embed_query)
+        return vectorstore.embeddings.embed_query(query)
+
+    # Runs the configured search, restricted to the manuals matching `where` when given
+    def search(
+        vectorstore: Any, version: Any, query: str, embedding: Sequence[float], where: Optional[Dict[str, Any]]
+    ) -> List[Document]:
+        keyword_index = get_keyword_index() if search_type == "hybrid" else None
+        if keyword_index is not None and keyword_index.exists():
+            return hybrid_search(
+                vectorstore,
+                keyword_index,
+                query,
+                embedding,
+                k=5,
+                fetch_k=50,
+                rrf_k=config.RAG_HYBRID_RRF_K,
+                keyword_weight=config.RAG_HYBRID_KEYWORD_WEIGHT,
+                filter=where,
+                sources=get_manual_catalog().sources(where) if where else None,
+            )
+        if config.RAG_CACHE_ENABLED:
+            return retrieval_cache.mmr_search(
+                vectorstore, version, query, k=5, fetch_k=50, filter=where, embedding=embedding
+            )
+        return vectorstore.max_marginal_relevance_search_by_vector(
+            [float(x) for x in embedding], k=5, fetch_k=50, filter=where
+        )
+
+    def retrieve(manager: Any, query: str, vehicle: Optional[str], embedding: Optional[Sequence[float]]) -> List[str]:
+        # Shared client and collection, reopened when the store changes on disk
+        vectorstore = manager.get_vectorstore()
+        if embedding is None:
+            embedding = embed(vectorstore, query)
+
+        where, origin = vehicle_filter(query, vehicle)
+        metrics.increment("rag.vehicle_filter", origin=origin)
+
+        docs = search(vectorstore, manager.version, query, embedding, where)
+        if where is not None and not docs:
+            logger.info(f"No chunks match {where}, searching all manuals")
+            docs = search(vectorstore, manager.version, query, embedding, None)
+        if config.RAG_CONTEXT_PACKING:
+            passages, _ = pack_context(docs, token_budget=config.RAG_CONTEXT_TOKEN_BUDGET)
+            return [format_passage(passage) for passage in passages]
+        return [doc.page_content for doc in docs]
+
+    def database_retrieval(query: str, vehicle: Optional[str] = None) -> List[str]:
         """
         Retrieve relevant documents from the vector database using Maximal Marginal
-        Relevance (MMR).
+        Relevance (MMR), or hybrid keyword + vector search when configured.
 
         Args:
             query: The input query string.
+            vehicle: Brand or model the question is about (e.g. "Ford Figo"), to search only
+                that manual; inferred from the query when omitted.
 
         Returns:
-            A list of document page contents.
+            A list of passages, each headed by its source file and page.
 
         Raises:
             RuntimeError: If the vector database directory is missing or another error occurs.
         """
         try:
-            if not os.path.isdir(config.DB_DIRECTORY):
-                raise RuntimeError(f"Vector DB not found: {config.DB_DIRECTORY}")
+            return retrieve(vector_store_manager or get_vector_store_manager(), query, vehicle, None)
+        except Exception as exc:
+            logger.exception("Retrieval tool failed")
+            raise RuntimeError(f"Tool error: {exc}") from exc
 
-            # Solution 1: Create ChromaDB client with explicit settings
-            client_settings = chromadb.config.Settings(
-                allow_reset=True,
-                anonymized_telemetry=False
-            )
-            
-            # Create client with PersistentClient for local storage
-            client = chromadb.PersistentClient(
-                path=config.DB_DIRECTORY,
-                settings=client_settings
-            )
-            
-            vectorstore = Chroma(
-                client=client,
-                embedding_function=embedder,
-                collection_name=config.COLLECTION_NAME,
-            )
-            
-            retriever = vectorstore.as_retriever(
-                search_type="mmr",
-                search_kwargs={"k": 5, "fetch_k": 50},
-            )
-            docs = retriever.invoke(query)
-            return [doc.page_content for doc in docs]
-            
+    async def adatabase_retrieval(query: str, vehicle: Optional[str] = None) -> List[str]:
+        # Used by `ainvoke`: nothing blocking runs on the event loop, and the query
+        # embedding joins the micro-batch of concurrent retrievals
+        try:
+            # Without the startup warm-up, creating the manager loads the embedding model
+            manager = vector_store_manager or await aget_vector_store_manager()
+            embedding = await aembed_query(query, manager.embedding_function)
+            return await run_in_retrieval_executor(retrieve, manager, query, vehicle, embedding)
         except Exception as exc:
             logger.exception("Retrieval tool failed")
             raise RuntimeError(f"Tool error: {exc}") from exc
 
-    return database_retrieval
\ No newline at end of file
+    return StructuredTool.from_function(func=database_retrieval, coroutine=adatabase_retrieval)
@@ -1,25 +1,34 @@
 import os
 import asyncio
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.messages.tool import ToolMessage
 from langchain_core.tools import tool
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
 from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 
 from src.utils import config
 from src.utils.llm_adapter import LLMAdapter
 from src.utils.logger import get_logger
 from src.data.prompts.rag_prompt import system_prompt, user_prompt
+from src.agents.tool_execution import ParallelToolNode
 from src.agents.rag.rag_state import State
-from src.agents.rag.rag_tools import create_database_retrieval_tool
+from src.agents.rag.answer_cache import CachedAnswer, get_answer_cache
+from src.agents.rag.async_retrieval import aembed_query, aget_vector_store_manager, run_in_retrieval_executor
+from src.agents.rag.manual_catalog import get_manual_catalog
+from src.agents.rag.rag_tools import create_database_retrieval_tool, vehicle_filter
+from src.agents.rag.retrieval_prefetch import RetrievalPrefetch, asks_for
 
 
 logger = get_logger(__name__)
 
 
+def has_prior_turns(messages: Sequence[BaseMessage], question: str) -> bool:
+    """Whether the conversation holds more than the current question, which the supervisor appends last."""
+    return any(not (isinstance(message, HumanMessage) and message.content == question) for message in messages)
+
+
 class RAGWorkflow:
     """
     RAG agent using LangGraph, LangChain tools, and vector DB retrieval.
@@ -29,7 +38,56 @@ class RAGWorkflow:
         self.llm_client = LLMAdapter(model_name=config.GROQ_MODEL_NAME, temperature=0.0)
         self.rag_tools = [create_database_retrieval_tool()]
         self.llm_with_tools = self.llm_client.client.bind_tools(tools=self.rag_tools)
-        self.tool_node = ToolNode(tools=self.rag_tools)
+        self.tool_node = ParallelToolNode(tools=self.rag_tools, name="rag_tools", intercept=self.use_prefetch)
+
+    async def use_prefetch(self, state: State, call: Dict[str, Any]) -> Any:
+        """Passages of the speculative retrieval, if the tool call asks for them."""
+        prefetch = state.get("retrieval_prefetch")
+        return await prefetch.take(call) if prefetch is not None else None
+
+    async def cached_answer(self, question: str) -> Tuple[Optional[CachedAnswer], Optional[str]]:
+        """
+        The answer cache's answer to a question, and the corpus version it was looked up
+        under (None when the collection has no ingestion manifest to version it by).
+        """
+        version = get_manual_catalog().version
+        if version is None:
+            return None, None
+        manager = await aget_vector_store_manager()
+        embedding = await aembed_query(question, manager.embedding_function)
+        cached = await run_in_retrieval_executor(
+            get_answer_cache().lookup, question, embedding, vehicle_filter(question)[0], version
+        )
+        return cached, version
+
+    async def store_answer(self, state: State, answer: str) -> None:
+        """Cache the final answer of a standalone question, with the passages it was based on."""
+        question, version = state["user_query"], state.get("corpus_version")
+        if version is None or get_manual_catalog().version != version:
+            return
+        # Tool calls and results of this turn, at the end of the history
+        calls, results = [], []
+        for message in reversed(state.get("messages") or []):
+            if isinstance(message, ToolMessage):
+                results.append(message)
+            elif isinstance(message, AIMessage) and message.tool_calls:
+                calls.extend(message.tool_calls)
+            else:
+                break
+        if not calls or any(result.status == "error" for result in results):
+            return
+        for call in calls:
+            if not await asks_for(question, call.get("args") or {}):
+                logger.debug(f"Not caching the answer: tool call {call.get('args')} is not the question")
+                return
+        sources = []
+        for result in reversed(results):
+            sources += result.content if isinstance(result.content, list) else [result.content]
+        manager = await aget_vector_store_manager()
+        embedding = await aembed_query(question, manager.embedding_function)
+        await run_in_retrieval_executor(
+            get_answer_cache().put, question, embedding, vehicle_filter(question)[0], version, answer, sources
+        )
 
     async def rag_agent_node(self, state: State) -> Dict[str, Any]:
         try:
@@ -38,19 +96,52 @@ class RAGWorkflow:
 
             if history and isinstance(history[-1], ToolMessage):
                 logger.debug("Invoking LLM on tool response")
+                if state.get("retrieval_prefetch") is not None:
+                    state["retrieval_prefetch"].discard()
                 llm_response = await self.llm_with_tools.ainvoke(history)
+                if config.RAG_ANSWER_CACHE and not llm_response.tool_calls:
+                    try:
+                        await self.store_answer(state, llm_response.content)
+                    except Exception as e:
+                        logger.warning(f"Could not cache the answer: {e}")
                 return {
                     "messages": [llm_response],
                     "model_output": llm_response.content,
+                    "retrieval_prefetch": None,
                 }
 
+            corpus_version = None
+            # Cached answers belong to the question alone; in a conversation it may refer to
+            # earlier turns (e.g. "How do I check tyre pressure?" after asking about the Hunter)
+            if config.RAG_ANSWER_CACHE and not has_prior_turns(history, user_query):
+                cached, corpus_version = await self.cached_answer(user_query)
+                if cached is not None:
+                    answer = AIMessage(
+                        content=cached.answer,
+                        response_metadata={
+                            "answer_cache": {"question": cached.question, "similarity": cached.similarity},
+                            "sources": cached.sources,
+                        },
+                    )
+                    return {"messages": [answer], "model_output": cached.answer}
+
             logger.debug("Generating initial response")
             convo = [
                 ("system", system_prompt),
                 ("user", user_prompt.format(user_query=user_query)),
             ]
-            llm_response = await self.llm_with_tools.ainvoke(convo)
-            return {"messages": [llm_response]}
+            # Retrieve the user query while the LLM decides whether to call the tool
+            prefetch = RetrievalPrefetch(self.rag_tools[0], user_query) if config.RAG_SPECULATIVE_PREFETCH else None
+            try:
+                llm_response = await self.llm_with_tools.ainvoke(convo)
+            except BaseException:
+                if prefetch is not None:
+                    prefetch.discard()
+                raise
+            if prefetch is not None and not llm_response.tool_calls:
+                prefetch.discard()
+                prefetch = None
+            return {"messages": [llm_response], "retrieval_prefetch": prefetch, "corpus_version": corpus_version}
 
         except Exception as exc:
             logger.exception("Error in RAG agent node")
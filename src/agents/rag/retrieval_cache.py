@@ -0,0 +1,196 @@
+"""
+Two-level cache for RAG retrieval.
+
+Users ask the same manual questions over and over, and each one used to be
+re-embedded on CPU and re-run through MMR with `fetch_k=50`.
+
+- Level 1 maps normalized query text to its embedding, stored as a compact
+  float32 array.
+- Level 2 maps (embedding bucket, k, fetch_k, filter, collection version) to the
+  ids of the retrieved chunks. The bucket is the quantized unit vector, so
+  queries whose embeddings are practically identical share an entry.
+
+Both levels are LRUs capped in bytes. Both are cleared when the collection
+version changes, i.e. when the vector store was reopened after ingestion.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class ByteBudgetLRU:
+    """Thread-safe LRU mapping whose total size, as reported by `sizeof`, stays under a byte budget."""
+
+    def __init__(self, name: str, max_bytes: int, sizeof: Callable[[Hashable, Any], int]):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        metrics.increment(f"rag.{self.name}_cache", result="hit" if value is not None else "miss")
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self.sizeof(key, previous)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, old_value = self._entries.popitem(last=False)
+                self._bytes -= self.sizeof(old_key, old_value)
+                metrics.increment(f"rag.{self.name}_cache_evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+def normalize_query_text(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def embedding_bucket(embedding: np.ndarray, resolution: int = 64) -> str:
+    """Key of the quantized unit vector; near-identical embeddings fall in the same bucket."""
+    norm = float(np.linalg.norm(embedding)) or 1.0
+    quantized = np.round(embedding / norm * resolution).astype(np.int8)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+
+
+class RetrievalCache:
+    """Query-embedding LRU plus retrieved-chunk-id LRU, invalidated per collection version."""
+
+    def __init__(self, embedding_cache_bytes: int, result_cache_bytes: int, bucket_resolution: int = 64):
+        """
+        Args:
+            embedding_cache_bytes: Memory cap of the query text -> embedding level
+            result_cache_bytes: Memory cap of the (bucket, k, fetch_k, filter, version) -> chunk ids level
+            bucket_resolution: Quantization steps per unit of each embedding dimension
+        """
+        self.embeddings = ByteBudgetLRU(
+            "embedding", embedding_cache_bytes, lambda key, vector: len(key) + vector.nbytes + 64
+        )
+        self.results = ByteBudgetLRU(
+            "result", result_cache_bytes, lambda key, ids: 160 + sum(len(i) + 50 for i in ids)
+        )
+        self.bucket_resolution = bucket_resolution
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+
+    def _check_version(self, version: Hashable) -> None:
+        with self._lock:
+            if version == self._version:
+                return
+            if self._version is not None:
+                logger.info("Vector store changed, clearing retrieval caches")
+            self._version = version
+        self.embeddings.clear()
+        self.results.clear()
+
+    def embed_query(self, query: str, embed: Callable[[str], Sequence[float]]) -> np.ndarray:
+        """Embedding of `query`, computed with `embed` on a miss."""
+        vector = self.cached_embedding(query)
+        if vector is None:
+            vector = self.store_embedding(query, embed(normalize_query_text(query)))
+        return vector
+
+    def cached_embedding(self, query: str) -> Optional[np.ndarray]:
+        return self.embeddings.get(normalize_query_text(query))
+
+    def store_embedding(self, query: str, embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        self.embeddings.put(normalize_query_text(query), vector)
+        return vector
+
+    def mmr_search(
+        self,
+        vectorstore: Any,
+        version: Hashable,
+        query: str,
+        k: int = 5,
+        fetch_k: int = 50,
+        filter: Optional[Dict[str, Any]] = None,
+        embedding: Optional[Sequence[float]] = None,
+    ) -> List[Document]:
+        """
+        MMR search on a LangChain Chroma store through both cache levels.
+
+        Args:
+            vectorstore: Chroma wrapper of the collection
+            version: Collection version; a new value clears the caches
+            query: Query text
+            k: Documents to return
+            fetch_k: Candidates passed to MMR
+            filter: Metadata filter of the search
+            embedding: Embedding of `query` when the caller already has it
+
+        Returns:
+            The retrieved documents, in the order the store returned them.
+        """
+        self._check_version(version)
+        if embedding is None:
+            embedding = self.embed_query(query, vectorstore.embeddings.embed_query)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        key = (
+            embedding_bucket(embedding, self.bucket_resolution),
+            k,
+            fetch_k,
+            json.dumps(filter, sort_keys=True) if filter else None,
+            version,
+        )
+
+        ids = self.results.get(key)
+        if ids is not None:
+            by_id = {doc.id: doc for doc in vectorstore.get_by_ids(ids)}
+            if len(by_id) == len(ids):
+                return [by_id[i] for i in ids]
+
+        docs = vectorstore.max_marginal_relevance_search_by_vector(
+            embedding.tolist(), k=k, fetch_k=fetch_k, filter=filter
+        )
+        if docs and all(doc.id for doc in docs):
+            self.results.put(key, tuple(doc.id for doc in docs))
+        return docs
+
+    def clear(self) -> None:
+        self.embeddings.clear()
+        self.results.clear()
+
+
+# Process-wide cache used by the retrieval tool
+retrieval_cache = RetrievalCache(
+    embedding_cache_bytes=int(config.RAG_EMBEDDING_CACHE_MB * 1024 * 1024),
+    result_cache_bytes=int(config.RAG_RESULT_CACHE_MB * 1024 * 1024),
+)
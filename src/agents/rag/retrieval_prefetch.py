@@ -0,0 +1,156 @@
+"""
+Speculative retrieval for the RAG agent.
+
+The agent's first LLM call only decides whether to call `database_retrieval`,
+and it nearly always does, with the user's own question as the query.
+Retrieval therefore used to start only after that call returned. With
+RAG_SPECULATIVE_PREFETCH, `RetrievalPrefetch` starts retrieving the raw user
+query at the same time as the LLM call, and the tool node reuses the result
+when the tool call asks for the same thing:
+
+- the same query, once case and whitespace are ignored, or one whose
+  embedding has a cosine similarity of at least RAG_PREFETCH_MIN_SIMILARITY
+  with the user query's
+- and the same vehicle filter (an explicit `vehicle` argument must select
+  the manuals the user query selects)
+
+Otherwise the tool runs as usual, and the prefetch is discarded with the turn.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.agents.rag.async_retrieval import aembed_query, aget_vector_store_manager
+from src.agents.rag.rag_tools import vehicle_filter
+
+logger = get_logger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+async def query_similarity(left: str, right: str, embeddings: Optional[Embeddings] = None) -> float:
+    """Cosine similarity of the embeddings of two queries."""
+    embeddings = embeddings or (await aget_vector_store_manager()).embedding_function
+    # Submitted together, both queries are embedded in one batch (or come from the retrieval cache)
+    vectors = await asyncio.gather(aembed_query(left, embeddings), aembed_query(right, embeddings))
+    a, b = (np.asarray(vector, dtype=np.float32) for vector in vectors)
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norm if norm else 0.0
+
+
+async def asks_for(
+    question: str,
+    args: Dict[str, Any],
+    embeddings: Optional[Embeddings] = None,
+    min_similarity: Optional[float] = None,
+) -> bool:
+    """
+    Whether retrieval tool call arguments ask for the same retrieval as `question`:
+    the same vehicle filter, and the same query or one at least `min_similarity`
+    similar (defaults to RAG_PREFETCH_MIN_SIMILARITY; above 1, the same text only).
+    """
+    min_similarity = config.RAG_PREFETCH_MIN_SIMILARITY if min_similarity is None else min_similarity
+    query = args.get("query")
+    if not isinstance(query, str):
+        return False
+    if vehicle_filter(query, args.get("vehicle"))[0] != vehicle_filter(question)[0]:
+        return False
+    if _normalize(query) == _normalize(question):
+        return True
+    if min_similarity > 1:
+        return False
+    similarity = await query_similarity(question, query, embeddings)
+    logger.debug(f"Similarity {similarity:.3f} of tool query '{query}' to '{question}'")
+    return similarity >= min_similarity
+
+
+class RetrievalPrefetch:
+    """Retrieval of the user query, started before the LLM asks for it."""
+
+    def __init__(
+        self,
+        tool: BaseTool,
+        query: str,
+        embeddings: Optional[Embeddings] = None,
+        min_similarity: Optional[float] = None,
+    ):
+        """
+        Args:
+            tool: The retrieval tool; it is invoked with `query` right away
+            query: The user query
+            embeddings: Embeddings compared to match rephrased queries
+                (defaults to those of the configured vector store)
+            min_similarity: Cosine similarity above which a rephrased query reuses the
+                result (defaults to RAG_PREFETCH_MIN_SIMILARITY)
+        """
+        self.tool_name = tool.name
+        self.query = query
+        self.embeddings = embeddings
+        self.min_similarity = min_similarity
+        self.hits = 0
+        self._discarded = False
+        self._started = time.perf_counter()
+        # Invoked as a tool call, so the output is the ToolMessage the tool node would produce
+        self._task = asyncio.ensure_future(
+            tool.ainvoke({"name": tool.name, "args": {"query": query}, "id": "prefetch", "type": "tool_call"})
+        )
+        self._task.add_done_callback(self._finished)
+
+    def _finished(self, task: "asyncio.Future") -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # Retrieved here so an unused failure is not reported as never retrieved
+            logger.debug(f"Prefetched retrieval failed: {task.exception()}")
+            return
+        metrics.observe("rag.prefetch_retrieval_ms", (time.perf_counter() - self._started) * 1000)
+
+    async def matches(self, args: Dict[str, Any]) -> bool:
+        """Whether a retrieval tool call with `args` asks for the prefetched retrieval."""
+        return await asks_for(self.query, args, self.embeddings, self.min_similarity)
+
+    async def take(self, call: Dict[str, Any]) -> Optional[ToolMessage]:
+        """
+        The prefetched tool output, answering `call`, if the call asks for it, else None.
+
+        A failed prefetch also gives None, so the tool is called normally.
+        """
+        if call.get("name") != self.tool_name:
+            return None
+        if not await self.matches(call.get("args") or {}):
+            metrics.increment("rag.prefetch", outcome="miss")
+            logger.info(f"Prefetched retrieval not reused for tool call {call.get('args')}")
+            return None
+        waited = time.perf_counter()
+        try:
+            # Shielded: a cancelled tool call must not cancel a result other calls may reuse
+            message: ToolMessage = await asyncio.shield(self._task)
+        except Exception:
+            metrics.increment("rag.prefetch", outcome="failed")
+            return None
+        metrics.increment("rag.prefetch", outcome="hit")
+        metrics.observe("rag.prefetch_wait_ms", (time.perf_counter() - waited) * 1000)
+        self.hits += 1
+        return message.model_copy(update={"tool_call_id": call["id"]})
+
+    def discard(self) -> None:
+        """Drop the prefetch at the end of the turn, cancelling it if it is still running."""
+        if self._discarded:
+            return
+        self._discarded = True
+        if self.hits == 0:
+            metrics.increment("rag.prefetch", outcome="unused")
+        if not self._task.done():
+            self._task.cancel()
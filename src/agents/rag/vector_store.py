@@ -0,0 +1,243 @@
+"""
+Process-wide Chroma vector store for RAG retrieval.
+
+Opening a `chromadb.PersistentClient` loads the collection's SQLite
+metadata and vector index from disk, which dominated the latency of every
+retrieval when it was done per call. `VectorStoreManager` keeps one client,
+collection and LangChain wrapper per process, shared by all threads. It
+periodically checks that the collection still answers and whether the
+files on disk changed (e.g. after re-ingestion by another process), and
+reopens the client when they did.
+
+Chroma normally shares one system (with the in-memory vector index) per
+path in a process, which would keep serving the index as it was before
+another process wrote to it. Each open therefore starts a system of its
+own. A reload swaps the new wrapper in; the previous system is stopped
+once the last search still holding the previous wrapper has released it.
+
+`chromadb` and `langchain_chroma` are imported on first open, so processes
+that never retrieve (e.g. SQL-only workers) do not load them.
+"""
+
+import os
+import threading
+import time
+import weakref
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+
+from langchain_core.embeddings import Embeddings
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    import chromadb
+    from langchain_chroma import Chroma
+
+    from src.agents.rag.mmap_index import MmapIndexManager
+
+logger = get_logger(__name__)
+
+_CHROMA_FILES = ("chroma.sqlite3", "chroma.sqlite3-wal")
+_manager_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def client_settings() -> "chromadb.config.Settings":
+    """Settings of every Chroma client: Chroma refuses two clients of one path with different settings."""
+    import chromadb
+
+    return chromadb.config.Settings(allow_reset=True, anonymized_telemetry=False)
+
+
+class VectorStoreUnavailable(RuntimeError):
+    """The vector store directory or collection cannot be opened."""
+
+
+class VectorStoreManager:
+    """Long-lived, thread-safe Chroma client and collection with health checks and reload."""
+
+    def __init__(
+        self,
+        persist_directory: Union[str, Path],
+        collection_name: str,
+        embedding_function: Embeddings,
+        check_interval_s: float = 5.0,
+    ):
+        """
+        Args:
+            persist_directory: Chroma persistence directory
+            collection_name: Collection to retrieve from
+            embedding_function: Embeddings used for queries (must match ingestion)
+            check_interval_s: Minimum seconds between health / on-disk change checks
+        """
+        self.persist_directory = Path(persist_directory)
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+        self.check_interval_s = check_interval_s
+
+        self._lock = threading.RLock()
+        self._client: Optional["chromadb.ClientAPI"] = None
+        self._vectorstore: Optional["Chroma"] = None
+        self._collection_id: Optional[str] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._last_check = 0.0
+        self.reloads = 0
+        # Incremented on every (re)open; caches of retrieval results key on it
+        self.version = 0
+
+    def _disk_fingerprint(self) -> Tuple:
+        """Size and mtime of Chroma's metadata database; changes on every write to the store."""
+        stats = []
+        for name in _CHROMA_FILES:
+            try:
+                stat = os.stat(self.persist_directory / name)
+                stats.append((name, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                continue
+        return tuple(stats)
+
+    def _open(self) -> None:
+        if not self.persist_directory.is_dir():
+            raise VectorStoreUnavailable(f"Vector DB not found: {self.persist_directory}")
+
+        started = time.perf_counter()
+        from langchain_chroma import Chroma
+
+        from chromadb.api import ServerAPI
+        from chromadb.api.client import Client
+        from chromadb.config import System
+        from chromadb.telemetry.product import ProductTelemetryClient
+
+        settings = client_settings().model_copy(
+            update={"persist_directory": str(self.persist_directory), "is_persistent": True}
+        )
+        system = System(settings)
+        system.instance(ProductTelemetryClient)
+        system.instance(ServerAPI)
+        system.start()
+        try:
+            client = Client.from_system(system)
+            vectorstore = Chroma(
+                client=client,
+                embedding_function=self.embedding_function,
+                collection_name=self.collection_name,
+                create_collection_if_not_exists=False,
+            )
+            collection_id = str(vectorstore._collection.id)
+        except Exception as e:
+            _stop_system(system)
+            raise VectorStoreUnavailable(f"Cannot open collection '{self.collection_name}': {e}") from e
+        # Searches in flight keep the previous wrapper (and its system) until they return
+        weakref.finalize(vectorstore, _stop_system, system)
+        self._client, self._vectorstore, self._collection_id = client, vectorstore, collection_id
+        self._fingerprint = self._disk_fingerprint()
+        self._last_check = time.monotonic()
+        self.version += 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("rag.vector_store_open_ms", elapsed_ms)
+        logger.info(f"Opened vector store '{self.collection_name}' at {self.persist_directory} in {elapsed_ms:.0f} ms")
+
+    def _is_healthy(self) -> bool:
+        try:
+            collection = self._client.get_collection(self.collection_name)
+            collection.count()
+            return str(collection.id) == self._collection_id
+        except Exception as e:
+            logger.warning(f"Vector store health check failed: {e}")
+            return False
+
+    def get_vectorstore(self) -> "Chroma":
+        """
+        The shared Chroma wrapper, opened on first use.
+
+        At most every `check_interval_s` seconds, the store is reopened if
+        its files changed on disk, the collection was recreated or it stopped
+        answering.
+
+        Raises:
+            VectorStoreUnavailable: The directory or collection does not exist.
+        """
+        with self._lock:
+            if self._vectorstore is None:
+                self._open()
+            elif time.monotonic() - self._last_check >= self.check_interval_s:
+                self._last_check = time.monotonic()
+                changed = self._disk_fingerprint() != self._fingerprint
+                if changed or not self._is_healthy():
+                    logger.info(
+                        f"Reloading vector store '{self.collection_name}' "
+                        f"({'changed on disk' if changed else 'failed health check'})"
+                    )
+                    self.reload()
+            return self._vectorstore
+
+    def reload(self) -> None:
+        """
+        Reopen the client and collection.
+
+        The previous wrapper is not closed: searches still using it finish on
+        the previous system, which is stopped when the wrapper is released.
+        """
+        with self._lock:
+            self._open()
+            self.reloads += 1
+            metrics.increment("rag.vector_store_reloads")
+
+    def health(self) -> Dict[str, Any]:
+        """Status summary for diagnostics."""
+        with self._lock:
+            if self._vectorstore is None:
+                return {"open": False, "collection": self.collection_name}
+            healthy = self._is_healthy()
+            return {
+                "open": True,
+                "healthy": healthy,
+                "collection": self.collection_name,
+                "documents": self._vectorstore._collection.count() if healthy else None,
+                "reloads": self.reloads,
+            }
+
+    def close(self) -> None:
+        """Release the store; its system stops once searches in flight have finished."""
+        with self._lock:
+            self._client = None
+            self._vectorstore = None
+
+
+def _stop_system(system: "chromadb.config.System") -> None:
+    try:
+        system.stop()
+    except Exception as e:
+        logger.debug(f"Stopping retired Chroma system failed: {e}")
+
+
+def get_vector_store_manager() -> Union[VectorStoreManager, "MmapIndexManager"]:
+    """The process-wide manager for the configured RAG collection and vector backend."""
+    # Locked so a warm-up thread and the first request do not both create one
+    with _manager_lock:
+        return _create_vector_store_manager()
+
+
+@lru_cache(maxsize=1)
+def _create_vector_store_manager() -> Union[VectorStoreManager, "MmapIndexManager"]:
+    from src.utils.embeddings import get_embeddings
+
+    if config.RAG_VECTOR_BACKEND == "mmap":
+        from src.agents.rag.mmap_index import MmapIndexManager, mmap_index_path
+
+        return MmapIndexManager(
+            mmap_index_path(config.DB_DIRECTORY, config.COLLECTION_NAME),
+            get_embeddings(),
+            nprobe=config.RAG_MMAP_NPROBE,
+            check_interval_s=config.RAG_STORE_CHECK_INTERVAL_S,
+        )
+    return VectorStoreManager(
+        config.DB_DIRECTORY,
+        config.COLLECTION_NAME,
+        get_embeddings(),
+        check_interval_s=config.RAG_STORE_CHECK_INTERVAL_S,
+    )
@@ -1,12 +1,15 @@
 from langgraph.graph import MessagesState
 
 from pydantic import BaseModel
-from typing import Literal
+from typing import Literal, Optional
 
 class State(MessagesState):
     user_query: str # user query
     agent_name : str # name of the agent
     agent_output : str # output of the agent
+    text_to_sql_mode : str # optional per-request text-to-SQL mode ("agent" or "fast")
+    sql_query : Optional[str] # SQL behind the last text-to-SQL answer
+    query_results : Optional[dict] # structured rows of that answer, rendered as a table by the client
 
 class SupervisorAgentOutput(BaseModel):
     agent_name: Literal['TEXT_TO_SQL', 'RAG', 'MISLEADING']
\ No newline at end of file
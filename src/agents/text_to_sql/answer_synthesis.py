@@ -0,0 +1,113 @@
+"""
+Template answers for simple SQL results.
+
+Most questions end in a scalar ("How many customers?") or a short list of
+rows. Those are phrased here without an LLM call; the rows themselves are
+handed to the client as structured data. Results that need interpretation
+(comparisons, explanations, large tables) return None and go to the LLM.
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Questions asking for analysis rather than data
+_INTERPRETIVE_PATTERN = re.compile(
+    r"\b(why|explain|explanation|reason|compare|comparison|versus|vs|trend|trends|insight|insights|"
+    r"analy[sz]e|analysis|recommend|suggest|should|summari[sz]e|summary|interpret|impact|improve|"
+    r"better|worse|best way|pattern|patterns|correlat\w*)\b",
+    re.IGNORECASE,
+)
+
+_AGGREGATE_LABELS = {
+    "count": "Count",
+    "sum": "Total",
+    "total": "Total",
+    "avg": "Average",
+    "min": "Minimum",
+    "max": "Maximum",
+}
+
+# Integer columns that must not get thousands separators
+_PLAIN_NUMBER_COLUMN = re.compile(r"(^|_)(id|year|phone|code|number|pincode|zip)($|_)", re.IGNORECASE)
+
+
+def needs_interpretation(user_query: str, result: Dict[str, Any], max_rows: int) -> bool:
+    """Whether the result should be phrased by the LLM instead of a template."""
+    if _INTERPRETIVE_PATTERN.search(user_query or ""):
+        return True
+    if result.get("truncated") or len(result.get("rows") or []) > max_rows:
+        return True
+    return not result.get("columns")
+
+
+def column_label(column: str) -> str:
+    """
+    Human-readable label for a result column.
+
+    `total_customers` becomes "Total customers", `AVG(price)` becomes "Average price".
+    """
+    column = str(column).strip().strip('"`[]')
+    aggregate = re.match(r"^(\w+)\s*\(\s*(?:DISTINCT\s+)?([^)]*)\)$", column, re.IGNORECASE)
+    if aggregate:
+        function, argument = aggregate.group(1).lower(), aggregate.group(2).strip()
+        prefix = _AGGREGATE_LABELS.get(function, function.upper())
+        argument = argument.split(".")[-1].strip('"`[]')
+        return f"{prefix} {column_label(argument).lower()}" if argument and argument != "*" else prefix
+    words = re.sub(r"[_\s]+", " ", column.split(".")[-1]).strip()
+    return words[:1].upper() + words[1:] if words else column
+
+
+def format_value(value: Any, column: str = "") -> str:
+    """Format a single result value for display."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return str(value) if _PLAIN_NUMBER_COLUMN.search(str(column)) else f"{value:,}"
+    if isinstance(value, float):
+        if value.is_integer():
+            return format_value(int(value), column)
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def synthesize_answer(user_query: str, result: Dict[str, Any], max_rows: int = 50) -> Optional[str]:
+    """
+    Phrase a SQL result without the LLM.
+
+    Args:
+        user_query: The user's question
+        result: Structured result from SQLTools.execute
+        max_rows: Largest number of rows answered from a template
+
+    Returns:
+        The answer text, or None if the result needs LLM interpretation.
+    """
+    if needs_interpretation(user_query, result, max_rows):
+        return None
+
+    columns, rows = result["columns"], result.get("rows") or []
+
+    if not rows or (len(rows) == 1 and all(value is None for value in rows[0])):
+        return "No matching records were found."
+
+    if len(rows) == 1 and len(columns) == 1:
+        return f"{column_label(columns[0])}: **{format_value(rows[0][0], columns[0])}**"
+
+    if len(rows) == 1:
+        return "\n".join(
+            f"- **{column_label(column)}**: {format_value(value, column)}"
+            for column, value in zip(columns, rows[0])
+        )
+
+    if len(columns) == 1:
+        values = [format_value(row[0], columns[0]) for row in rows]
+        return f"{column_label(columns[0])} ({len(rows)}):\n" + "\n".join(f"- {v}" for v in values)
+
+    return f"Found {len(rows)} matching rows."
@@ -0,0 +1,506 @@
+"""
+Column statistics and value dictionary for grounding SQL filters.
+
+For every column the profiler keeps cardinality, null rate and min/max,
+plus the distinct values of low-cardinality text columns (brand, city,
+position, status, ...). The agent sees these next to the schema, so it does
+not need exploratory SELECT DISTINCT queries.
+
+Before a query runs, `fix_literals` checks its filter values against the
+values of the column they filter (`customers.city`, not every `city`).
+Values that differ from a stored one only in case or whitespace
+('mumbai ') are corrected. For other unknown values it only suggests the
+closest stored value ('Bengaluru' -> 'Bangalore'), since replacing it
+would change what the query asks.
+
+Profiles are persisted to JSON and refreshed incrementally: SQLite's
+`PRAGMA data_version` tells whether another connection changed the file,
+and a table is re-profiled when its row count or max rowid changed, or
+when the values of one of its categorical columns did (in-place UPDATEs
+leave the other two alone). On the query path the refresh runs in a background thread and
+the previous profiles are served meanwhile. The first profiling of a
+database is done by the startup warm-up (`column_profiles`) or offline:
+    python -m src.agents.text_to_sql.column_profiles
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.utils import config
+from src.utils.fts_index import internal_tables, table_aliases
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+# Common alternative spellings of values found in the showroom data
+VALUE_ALIASES = {
+    "bengaluru": "bangalore",
+    "bombay": "mumbai",
+    "madras": "chennai",
+    "calcutta": "kolkata",
+    "new delhi": "delhi",
+    "gurugram": "gurgaon",
+    "poona": "pune",
+}
+
+_TEXT_TYPES = ("CHAR", "CLOB", "TEXT")
+
+
+def column_profile_cache_path(database_path: Union[str, Path]) -> Path:
+    return config.DB_DIRECTORY / f"{Path(database_path).stem}.column_profiles.json"
+
+
+def _normalize_value(value: str) -> str:
+    return " ".join(value.split()).lower()
+
+
+@dataclass
+class ColumnProfile:
+    column: str
+    data_type: str
+    null_rate: float
+    cardinality: int
+    min_value: Any = None
+    max_value: Any = None
+    # (value, count) pairs, most frequent first; complete when values_complete is set
+    top_values: List[Tuple[Any, int]] = field(default_factory=list)
+    values_complete: bool = False
+
+
+@dataclass
+class TableProfile:
+    table: str
+    row_count: int
+    fingerprint: List[Any]
+    columns: Dict[str, ColumnProfile]
+    profiled_at: float = 0.0
+
+
+class ColumnProfiler:
+    """Computes, caches and serves column profiles for one SQLite database."""
+
+    def __init__(
+        self,
+        database_path: Union[str, Path],
+        cache_path: Optional[Union[str, Path]] = None,
+        top_n: int = 25,
+        max_distinct_values: int = 50,
+    ):
+        """
+        Args:
+            database_path: SQLite database file
+            cache_path: JSON file the profiles are persisted to (optional)
+            top_n: Most frequent values kept for text columns
+            max_distinct_values: Text columns with at most this many distinct
+                values get a complete value dictionary
+        """
+        self.database_path = str(database_path)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.top_n = top_n
+        self.max_distinct_values = max_distinct_values
+
+        self._conn: Optional[sqlite3.Connection] = None
+        # _lock guards the profiles; _refresh_lock is held for a whole refresh (possibly by another thread)
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._tables: Dict[str, TableProfile] = {}
+        self._load_cache()
+
+    # ------------------------------------------------------------------ refresh
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            uri = Path(self.database_path).resolve().as_uri() + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return self._conn
+
+    def ensure_fresh(self) -> None:
+        """Re-profile the tables that changed since the last check, now."""
+        with self._refresh_lock:
+            self._refresh()
+
+    def refresh_in_background(self) -> bool:
+        """
+        Start re-profiling in a daemon thread if the database changed.
+
+        Returns:
+            Whether a refresh was started (False if one is already running).
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            changed = self._connection().execute("PRAGMA data_version").fetchone()[0] != self._data_version
+        except Exception:
+            self._refresh_lock.release()
+            raise
+        if not changed:
+            self._refresh_lock.release()
+            return False
+        threading.Thread(target=self._refresh_and_release, name="column-profiles", daemon=True).start()
+        return True
+
+    def _refresh_and_release(self) -> None:
+        try:
+            self._refresh()
+        except Exception as e:
+            logger.warning(f"Column profiling failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self) -> None:
+        conn = self._connection()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+
+        started = time.perf_counter()
+        skip = internal_tables(conn)
+        tables = [
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+            if row[0] not in skip
+        ]
+        with self._lock:
+            profiles = {table: self._tables[table] for table in tables if table in self._tables}
+        refreshed = []
+        for table in tables:
+            fingerprint = self._fingerprint(table)
+            cached = profiles.get(table)
+            if cached is None or cached.fingerprint != fingerprint or self._values_changed(cached):
+                profiles[table] = self._profile_table(table, fingerprint)
+                refreshed.append(table)
+
+        with self._lock:
+            self._tables = profiles
+            self._data_version = data_version
+        if refreshed:
+            metrics.increment("text_to_sql.column_profiles_refreshed", len(refreshed))
+            logger.info(
+                f"Profiled {len(refreshed)} table(s) in {(time.perf_counter() - started) * 1000:.0f} ms: "
+                f"{', '.join(refreshed)}"
+            )
+            self._save_cache()
+
+    def _fingerprint(self, table: str) -> List[Any]:
+        try:
+            count, max_rowid = self._connection().execute(
+                f'SELECT COUNT(*), MAX(rowid) FROM "{table}"'
+            ).fetchone()
+        except sqlite3.OperationalError:  # WITHOUT ROWID tables and virtual tables
+            count, max_rowid = self._connection().execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0], None
+        return [count, max_rowid]
+
+    def _top_values(self, table: str, column: str, limit: int) -> List[Tuple[Any, int]]:
+        return [
+            (value, count)
+            for value, count in self._connection().execute(
+                f'SELECT "{column}", COUNT(*) FROM "{table}" WHERE "{column}" IS NOT NULL '
+                f'GROUP BY "{column}" ORDER BY COUNT(*) DESC, "{column}" LIMIT ?',
+                (limit,),
+            )
+        ]
+
+    def _values_changed(self, cached: TableProfile) -> bool:
+        """Whether an UPDATE changed the values of a categorical column since it was profiled."""
+        for col in cached.columns.values():
+            if not col.top_values:
+                continue
+            limit = self.max_distinct_values if col.values_complete else self.top_n
+            try:
+                if self._top_values(cached.table, col.column, limit) != [tuple(v) for v in col.top_values]:
+                    return True
+            except sqlite3.OperationalError:  # column dropped or renamed
+                return True
+        return False
+
+    def _profile_table(self, table: str, fingerprint: List[Any]) -> TableProfile:
+        conn = self._connection()
+        columns = [(row[1], (row[2] or "").upper()) for row in conn.execute(f'PRAGMA table_info("{table}")')]
+        if not columns:
+            return TableProfile(table, fingerprint[0], fingerprint, {}, time.time())
+
+        # One scan for all per-column aggregates
+        select = ["COUNT(*)"]
+        for name, _ in columns:
+            select += [f'COUNT("{name}")', f'COUNT(DISTINCT "{name}")', f'MIN("{name}")', f'MAX("{name}")']
+        stats = conn.execute(f'SELECT {", ".join(select)} FROM "{table}"').fetchone()
+        row_count = stats[0]
+
+        profiles = {}
+        for index, (name, data_type) in enumerate(columns):
+            non_null, distinct, min_value, max_value = stats[1 + 4 * index : 5 + 4 * index]
+            profile = ColumnProfile(
+                column=name,
+                data_type=data_type,
+                null_rate=(1 - non_null / row_count) if row_count else 0.0,
+                cardinality=distinct,
+                min_value=min_value,
+                max_value=max_value,
+            )
+            if self._is_categorical(data_type, distinct, non_null):
+                profile.top_values = self._top_values(
+                    table, name, self.top_n if distinct > self.max_distinct_values else self.max_distinct_values
+                )
+                profile.values_complete = distinct <= self.max_distinct_values
+            profiles[name] = profile
+        return TableProfile(table, row_count, fingerprint, profiles, time.time())
+
+    def _is_categorical(self, data_type: str, distinct: int, non_null: int) -> bool:
+        """Text columns whose values repeat (status, city) rather than identify rows (email, name)."""
+        is_text = data_type == "" or any(t in data_type for t in _TEXT_TYPES)
+        if not is_text or not distinct:
+            return False
+        if distinct <= self.top_n // 2:
+            return True
+        return distinct <= self.max_distinct_values and distinct <= 0.5 * non_null
+
+    # ------------------------------------------------------------ persistence
+
+    def _load_cache(self) -> None:
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            if data.get("database") != os.path.abspath(self.database_path):
+                return
+            for table, raw in data.get("tables", {}).items():
+                columns = {
+                    name: ColumnProfile(**{**col, "top_values": [tuple(v) for v in col["top_values"]]})
+                    for name, col in raw["columns"].items()
+                }
+                self._tables[table] = TableProfile(
+                    table, raw["row_count"], raw["fingerprint"], columns, raw.get("profiled_at", 0.0)
+                )
+            logger.info(f"Loaded column profiles for {len(self._tables)} table(s) from {self.cache_path}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable column profile cache {self.cache_path}: {e}")
+            self._tables = {}
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        with self._lock:
+            tables = dict(self._tables)
+        data = {
+            "database": os.path.abspath(self.database_path),
+            "tables": {name: asdict(profile) for name, profile in tables.items()},
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, default=str)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not persist column profiles to {self.cache_path}: {e}")
+
+    # ----------------------------------------------------------------- access
+
+    def get_profiles(self, tables: Optional[Iterable[str]] = None, wait: bool = False) -> Dict[str, TableProfile]:
+        """
+        Profiles for `tables` (all tables if None).
+
+        Tables that changed are re-profiled in a background thread, or before
+        returning with `wait`. Until then the previous profiles are returned,
+        and none before a database's first profiling has finished.
+        """
+        if wait:
+            self.ensure_fresh()
+        else:
+            self.refresh_in_background()
+        with self._lock:
+            if tables is None:
+                return dict(self._tables)
+            wanted = {t.strip().lower() for t in tables}
+            return {name: p for name, p in self._tables.items() if name.lower() in wanted}
+
+    def describe(self, tables: Optional[Iterable[str]] = None, values_only: bool = False) -> str:
+        """
+        Render profiles as compact text for the agent.
+
+        Args:
+            tables: Tables to describe (all if None)
+            values_only: Only list the known values of categorical columns
+
+        Returns:
+            One block per table, or '' if nothing to show.
+        """
+        blocks = []
+        for name, table in sorted(self.get_profiles(tables).items()):
+            lines = []
+            for col in table.columns.values():
+                if col.top_values:
+                    shown = ", ".join(f"'{v}' ({n})" for v, n in col.top_values[: self.top_n])
+                    qualifier = "values" if col.values_complete else f"top {len(col.top_values)} of {col.cardinality} values"
+                    lines.append(f"- {col.column}: {qualifier}: {shown}")
+                elif not values_only and table.row_count:
+                    details = f"{col.data_type or 'ANY'}, {col.cardinality} distinct, {col.null_rate:.0%} null"
+                    if col.min_value is not None:
+                        details += f", range {col.min_value} .. {col.max_value}"
+                    lines.append(f"- {col.column}: {details}")
+            if lines:
+                blocks.append(f"Column profile of {name} ({table.row_count} rows):\n" + "\n".join(lines))
+        return "\n\n".join(blocks)
+
+    def value_dictionary(self) -> Dict[str, List[Any]]:
+        """Map of "table.column" (lower case) -> complete list of values, for categorical columns."""
+        dictionary: Dict[str, List[Any]] = {}
+        for name, table in self.get_profiles().items():
+            for col in table.columns.values():
+                if col.values_complete:
+                    dictionary[f"{name}.{col.column}".lower()] = [v for v, _ in col.top_values]
+        return dictionary
+
+    # --------------------------------------------------------- value matching
+
+    def match_value(
+        self,
+        column: str,
+        literal: str,
+        cutoff: float = 0.8,
+        dictionary: Optional[Dict[str, List[Any]]] = None,
+    ) -> Optional[Tuple[str, bool]]:
+        """
+        Find the stored value of a column a literal most likely meant.
+
+        Args:
+            column: "table.column"
+            literal: Filter value as written in the query
+            cutoff: Minimum difflib similarity of a close match
+            dictionary: `value_dictionary()`, if already built
+
+        Returns:
+            (value, same) if the literal is not a stored value of the column,
+            where `same` tells whether it differs from `value` only in case or
+            whitespace (otherwise `value` is a known alias or close match);
+            None if the literal is stored or nothing is close.
+        """
+        dictionary = dictionary if dictionary is not None else self.value_dictionary()
+        values = [v for v in dictionary.get(column.lower()) or [] if isinstance(v, str)]
+        if not values or literal in values:
+            return None
+
+        by_normalized = {_normalize_value(v): v for v in values}
+        normalized = _normalize_value(literal)
+        if normalized in by_normalized:
+            return by_normalized[normalized], True
+        match = by_normalized.get(VALUE_ALIASES.get(normalized, ""))
+        if match is None:
+            close = difflib.get_close_matches(normalized, list(by_normalized), n=1, cutoff=cutoff)
+            match = by_normalized[close[0]] if close else None
+        return (match, False) if match else None
+
+    def fix_literals(self, query: str, cutoff: float = 0.8) -> Tuple[str, List[str], List[str]]:
+        """
+        Check filter literals against the stored values of the column they filter.
+
+        Handles `column = 'x'`, `column != 'x'`, `column LIKE 'x'` (without
+        wildcards) and `column [NOT] IN ('x', 'y')`. A qualified column
+        (`c.city`) is resolved through the FROM / JOIN aliases; an unqualified
+        one must belong to exactly one table of the query. Expressions such as
+        LOWER(city) are left alone.
+
+        Literals that differ from a stored value only in case or whitespace are
+        replaced; for other unknown literals the closest stored value is only
+        suggested, as replacing it would change the question.
+
+        Returns:
+            The (possibly) rewritten query, a note per replacement and a note per suggestion.
+        """
+        notes: List[str] = []
+        suggestions: List[str] = []
+        dictionary = self.value_dictionary()
+        aliases = table_aliases(query)
+
+        def resolve(qualifier: str, column: str) -> Optional[str]:
+            if qualifier:
+                table = aliases.get(qualifier.lower())
+                return f"{table}.{column}".lower() if table else None
+            owners = {f"{table}.{column}".lower() for table in aliases.values()}
+            owners = [owner for owner in owners if owner in dictionary]
+            return owners[0] if len(owners) == 1 else None
+
+        def replace_literal(qualifier: str, column: str, literal: str) -> str:
+            key = resolve(qualifier, column)
+            if "%" in literal or key is None or key not in dictionary:
+                return literal
+            match = self.match_value(key, literal.replace("''", "'"), cutoff, dictionary)
+            if match is None:
+                return literal
+            value, same = match
+            if not same:
+                suggestions.append(f"'{literal}' is not a stored value of {key} (closest: '{value}')")
+                return literal
+            notes.append(f"'{literal}' -> '{value}' ({key})")
+            return value.replace("'", "''")
+
+        column_pattern = r'(?<![\w.)])((?:"?([A-Za-z_]\w*)"?\.)?"?([A-Za-z_]\w*)"?)'
+
+        def fix_comparison(m: re.Match) -> str:
+            return f"{m.group(1)}{m.group(4)}'{replace_literal(m.group(2) or '', m.group(3), m.group(5))}'"
+
+        query = re.sub(
+            column_pattern + r"(\s*(?:=|==|!=|<>)\s*|\s+(?:NOT\s+)?LIKE\s+)'((?:[^']|'')*)'",
+            fix_comparison,
+            query,
+            flags=re.IGNORECASE,
+        )
+
+        def fix_in_list(m: re.Match) -> str:
+            qualifier, column = m.group(2) or "", m.group(3)
+            items = re.sub(
+                r"'((?:[^']|'')*)'",
+                lambda item: f"'{replace_literal(qualifier, column, item.group(1))}'",
+                m.group(5),
+            )
+            return f"{m.group(1)}{m.group(4)}{items})"
+
+        query = re.sub(
+            column_pattern + r"(\s+(?:NOT\s+)?IN\s*\()([^()]*)\)",
+            fix_in_list,
+            query,
+            flags=re.IGNORECASE,
+        )
+
+        if notes:
+            metrics.increment("text_to_sql.literals_fixed", len(notes))
+            logger.info(f"Fixed filter literal(s): {'; '.join(notes)}")
+        if suggestions:
+            metrics.increment("text_to_sql.literals_unknown", len(suggestions))
+            logger.info(f"Unknown filter literal(s): {'; '.join(suggestions)}")
+        return query, notes, suggestions
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Profile the columns of a SQLite database for the SQL agent.")
+    parser.add_argument("--database", default=str(config.DB_PATH), help="SQLite database file")
+    args = parser.parse_args(argv)
+
+    profiler = ColumnProfiler(args.database, cache_path=column_profile_cache_path(args.database))
+    profiles = profiler.get_profiles(wait=True)
+    profiler.close()
+    columns = sum(len(table.columns) for table in profiles.values())
+    print(f"Profiled {columns} columns of {len(profiles)} tables to {profiler.cache_path}")
+
+
+if __name__ == "__main__":
+    main()
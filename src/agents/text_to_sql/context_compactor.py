@@ -0,0 +1,206 @@
+"""
+Context compaction for the text-to-SQL tool loop.
+
+Every agent iteration resends the whole conversation, including earlier
+schema dumps and query results. The compactor rewrites tool outputs that
+later steps have superseded into short summaries before each LLM call:
+
+- schema results repeated by a later sql_db_schema call for the same tables
+- failed queries once a later query succeeded
+- results of earlier queries (kept as a preview)
+
+and then enforces a token budget by summarising the oldest tool outputs
+first. Messages are never dropped, so every tool call keeps its response.
+The state itself is not modified; compaction applies to the request sent
+to the model only.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Rough token estimate (no tokenizer dependency): ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Approximate the prompt tokens of a message list."""
+    chars = 0
+    for msg in messages:
+        chars += len(msg.content) if isinstance(msg.content, str) else len(str(msg.content))
+        for call in getattr(msg, "tool_calls", None) or []:
+            chars += len(call["name"]) + len(str(call.get("args", "")))
+    return chars // CHARS_PER_TOKEN
+
+
+@dataclass
+class CompactionStats:
+    tokens_before: int
+    tokens_after: int
+    compacted_messages: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class ToolContextCompactor:
+    """Compacts superseded tool outputs and enforces a per-call token budget."""
+
+    def __init__(self, token_budget: int = 6000, result_preview_chars: int = 300):
+        """
+        Args:
+            token_budget: Target prompt size (estimated tokens) per LLM call
+            result_preview_chars: Characters kept from superseded query results
+        """
+        self.token_budget = token_budget
+        self.result_preview_chars = result_preview_chars
+
+    def compact(self, messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], CompactionStats]:
+        """
+        Return a compacted copy of `messages` and the token savings.
+
+        The tool outputs of the last tool batch are what the model is about to
+        act on, so they are only shortened if the budget cannot be met otherwise.
+        """
+        messages = list(messages)
+        tokens_before = estimate_tokens(messages)
+        calls = self._tool_calls_by_id(messages)
+        latest_batch = self._latest_batch_indexes(messages)
+
+        replacements: Dict[int, str] = {}
+        self._compact_repeated_schemas(messages, calls, replacements)
+        self._compact_superseded_queries(messages, calls, latest_batch, replacements)
+
+        compacted = self._apply(messages, replacements)
+        if estimate_tokens(compacted) > self.token_budget:
+            self._enforce_budget(compacted, calls, latest_batch, replacements)
+            compacted = self._apply(messages, replacements)
+
+        stats = CompactionStats(tokens_before, estimate_tokens(compacted), len(replacements))
+        if stats.compacted_messages:
+            logger.debug(
+                f"Compacted {stats.compacted_messages} tool output(s): "
+                f"~{stats.tokens_before} -> ~{stats.tokens_after} tokens"
+            )
+        return compacted, stats
+
+    @staticmethod
+    def _tool_calls_by_id(messages: Sequence[BaseMessage]) -> Dict[str, dict]:
+        calls = {}
+        for msg in messages:
+            if isinstance(msg, AIMessage):
+                for call in msg.tool_calls or []:
+                    calls[call["id"]] = call
+        return calls
+
+    @staticmethod
+    def _latest_batch_indexes(messages: Sequence[BaseMessage]) -> Set[int]:
+        """Indexes of the trailing run of ToolMessages."""
+        indexes = set()
+        for index in range(len(messages) - 1, -1, -1):
+            if not isinstance(messages[index], ToolMessage):
+                break
+            indexes.add(index)
+        return indexes
+
+    @staticmethod
+    def _is_error(msg: ToolMessage) -> bool:
+        return msg.status == "error" or str(msg.content).startswith("Error")
+
+    @staticmethod
+    def _schema_tables(call: Optional[dict]) -> Set[str]:
+        if not call:
+            return set()
+        table_names = str(call.get("args", {}).get("table_names", ""))
+        return {name.strip().lower() for name in table_names.split(",") if name.strip()}
+
+    def _compact_repeated_schemas(
+        self, messages: List[BaseMessage], calls: Dict[str, dict], replacements: Dict[int, str]
+    ) -> None:
+        """Summarise schema outputs whose tables (or exact text) appear again later."""
+        seen_tables: Set[str] = set()
+        seen_contents: Set[str] = set()
+        for index in range(len(messages) - 1, -1, -1):
+            msg = messages[index]
+            if not isinstance(msg, ToolMessage) or msg.name != "sql_db_schema" or self._is_error(msg):
+                continue
+            tables = self._schema_tables(calls.get(msg.tool_call_id))
+            content = str(msg.content)
+            if content in seen_contents or (tables and tables <= seen_tables):
+                replacements[index] = f"[schema for {', '.join(sorted(tables)) or 'these tables'} repeated below]"
+            seen_tables |= tables
+            seen_contents.add(content)
+
+    def _compact_superseded_queries(
+        self,
+        messages: List[BaseMessage],
+        calls: Dict[str, dict],
+        latest_batch: Set[int],
+        replacements: Dict[int, str],
+    ) -> None:
+        """Summarise failed queries that were retried and preview older results."""
+        query_indexes = [
+            index
+            for index, msg in enumerate(messages)
+            if isinstance(msg, ToolMessage) and msg.name == "sql_db_query"
+        ]
+        last_success = max(
+            (index for index in query_indexes if not self._is_error(messages[index])), default=-1
+        )
+        for index in query_indexes:
+            if index in latest_batch:
+                continue
+            msg = messages[index]
+            if self._is_error(msg):
+                if index < last_success:
+                    first_line = str(msg.content).splitlines()[0][:200]
+                    replacements[index] = f"[superseded failed query] {first_line}"
+            elif len(str(msg.content)) > self.result_preview_chars:
+                replacements[index] = self._preview(str(msg.content))
+
+    def _enforce_budget(
+        self,
+        compacted: List[BaseMessage],
+        calls: Dict[str, dict],
+        latest_batch: Set[int],
+        replacements: Dict[int, str],
+    ) -> None:
+        """Summarise tool outputs, oldest first, until the estimate fits the budget."""
+        total = estimate_tokens(compacted)
+        older = [i for i, m in enumerate(compacted) if isinstance(m, ToolMessage) and i not in latest_batch]
+        for index in older + sorted(latest_batch):
+            if total <= self.token_budget:
+                return
+            msg = compacted[index]
+            content = str(msg.content)
+            if index in latest_batch:
+                # Keep as much of the current result as the remaining budget allows
+                excess_chars = (total - self.token_budget) * CHARS_PER_TOKEN
+                keep = max(self.result_preview_chars, len(content) - excess_chars)
+                summary = self._preview(content, keep)
+            else:
+                call = calls.get(msg.tool_call_id) or {}
+                summary = f"[{msg.name} output omitted to save context; args: {str(call.get('args', ''))[:150]}]"
+            if len(summary) < len(content):
+                replacements[index] = summary
+                total -= (len(content) - len(summary)) // CHARS_PER_TOKEN
+
+    def _preview(self, content: str, keep: Optional[int] = None) -> str:
+        keep = keep or self.result_preview_chars
+        if len(content) <= keep:
+            return content
+        return f"{content[:keep]} ...[truncated {len(content) - keep} chars]"
+
+    @staticmethod
+    def _apply(messages: List[BaseMessage], replacements: Dict[int, str]) -> List[BaseMessage]:
+        return [
+            msg.model_copy(update={"content": replacements[index]}) if index in replacements else msg
+            for index, msg in enumerate(messages)
+        ]
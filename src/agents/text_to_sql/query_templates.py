@@ -0,0 +1,276 @@
+"""
+Query normalization and per-template statistics.
+
+Agent-generated queries often differ only in their literals
+(`showroom_id = 7` vs `showroom_id = 12`). `normalize_query` turns the
+literals of filter positions into `?` parameters, so such queries share one
+template. Executing the template with bound parameters lets the sqlite3
+statement cache of each pooled connection reuse the prepared statement,
+and the template gives the other caches a stable key.
+
+Only literals whose meaning does not depend on being constant are
+extracted: right-hand sides of comparisons and LIKE, IN lists, BETWEEN
+bounds, LIMIT and OFFSET. Literals in the select list, GROUP BY and
+ORDER BY (where `ORDER BY 2` is a column position) stay in place.
+
+Select lists are copied as written: SQLite names an unaliased result column
+after the text of its expression, so respacing `price*quantity` would
+rename the column in the result table and the answers.
+"""
+
+import functools
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<identifier>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+  | (?P<blob>[xX]'[0-9A-Fa-f]*')
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?(?![\w.]))
+  | (?P<word>[A-Za-z_][\w$]*)
+  | (?P<param>[?:@$][\w]*)
+  | (?P<operator><=|>=|<>|!=|==|\|\||<<|>>|[-+*/%=<>(),;.&|~])
+  | (?P<other>\S)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_COMPARISON_OPERATORS = {"=", "==", "<>", "!=", "<", "<=", ">", ">="}
+_PATTERN_OPERATORS = {"LIKE", "GLOB"}
+_LIMIT_KEYWORDS = {"LIMIT", "OFFSET"}
+# Keywords written in upper case in templates (identifiers keep their case,
+# since it shows up in result column names)
+_KEYWORDS = {
+    "SELECT", "DISTINCT", "FROM", "WHERE", "AND", "OR", "NOT", "IN", "IS", "NULL", "AS", "ON", "JOIN",
+    "LEFT", "INNER", "CROSS", "OUTER", "GROUP", "ORDER", "BY", "HAVING", "LIMIT", "OFFSET", "ASC", "DESC",
+    "BETWEEN", "LIKE", "GLOB", "UNION", "ALL", "CASE", "WHEN", "THEN", "ELSE", "END", "WITH", "EXISTS",
+}
+# Keywords ending a select list (at its own parenthesis depth)
+_SELECT_LIST_END = {"FROM", "WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "WINDOW", "UNION", "EXCEPT", "INTERSECT"}
+# Keywords that are followed by a space before an opening parenthesis
+_SPACED_KEYWORDS = {"IN", "AND", "OR", "NOT", "ON", "AS", "FROM", "JOIN", "WHERE", "SELECT", "EXISTS", "VALUES", "USING", "WHEN", "THEN", "ELSE", "BY", "HAVING", "UNION", "ALL", "WITH"}
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_query(query: str) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Split a query into a parameterized template and its literal values.
+
+    Comments are removed and whitespace is collapsed, so formatting
+    differences map to the same template, except in select lists, which
+    keep their text (it names the result columns). Queries that already use
+    parameters are returned unchanged (with whitespace collapsed).
+    Results are memoized, since the agent often re-runs the same text.
+
+    Returns:
+        (template, params) where template uses `?` placeholders.
+    """
+    tokens = [(m.lastgroup, m.group(), m.start(), m.end()) for m in _TOKEN_PATTERN.finditer(query)]
+    has_params = any(kind == "param" for kind, *_ in tokens)
+
+    parts: List[str] = []
+    params: List[Any] = []
+    significant: List[Tuple[str, str]] = []  # (kind, upper-cased text) of emitted tokens
+    in_list_depth: Optional[int] = None  # paren depth of an IN (...) literal list
+    depth = 0
+    between_pending = False
+    limit_clause = False
+
+    def emit(text: str, kind: str) -> None:
+        # Canonical spacing, so formatting differences share a template
+        if parts and not _no_space_between(significant[-1], (kind, text)):
+            parts.append(" ")
+        parts.append(text)
+
+    index = 0
+    while index < len(tokens):
+        kind, text, start, end = tokens[index]
+        if kind == "comment":
+            index += 1
+            continue
+
+        upper = text.upper()
+        prev = significant[-1][1] if significant else ""
+        is_literal = kind in ("string", "number")
+
+        negative_number = (
+            kind == "operator"
+            and text == "-"
+            and index + 1 < len(tokens)
+            and tokens[index + 1][0] == "number"
+            and tokens[index + 1][2] == end
+            and (prev in _COMPARISON_OPERATORS or prev in ("BETWEEN", "AND", ",", "(") and (between_pending or in_list_depth is not None))
+        )
+
+        parameterize = False
+        if not has_params and (is_literal or negative_number):
+            if prev in _COMPARISON_OPERATORS:
+                parameterize = True
+            elif prev in _PATTERN_OPERATORS and kind == "string":
+                parameterize = True
+            elif prev == "BETWEEN" or (prev == "AND" and between_pending):
+                parameterize = True
+            elif in_list_depth is not None and depth == in_list_depth and prev in ("(", ","):
+                parameterize = True
+            elif limit_clause and kind == "number" and (prev in _LIMIT_KEYWORDS or prev == ","):
+                parameterize = True
+
+        if parameterize:
+            if negative_number:
+                number_text = tokens[index + 1][1]
+                value = -_parse_number(number_text)
+                index += 1
+            elif kind == "string":
+                value = text[1:-1].replace("''", "'")
+            else:
+                value = _parse_number(text)
+            params.append(value)
+            emit("?", "param")
+            significant.append(("param", "?"))
+        else:
+            emit(upper if kind == "word" and upper in _KEYWORDS else text, kind)
+            significant.append((kind, upper))
+
+            if kind == "word" and (upper == "SELECT" or (upper in ("DISTINCT", "ALL") and prev == "SELECT")):
+                first, last, end = _select_list_span(tokens, index + 1)
+                if first is not None and not (upper == "SELECT" and tokens[first][1].upper() in ("DISTINCT", "ALL")):
+                    select_list = query[tokens[first][2] : tokens[last][3]]
+                    emit(select_list, "select_list")
+                    significant.append(("select_list", select_list.upper()))
+                    index = end
+                    continue
+
+            if upper == "(":
+                depth += 1
+                if prev == "IN" and in_list_depth is None:
+                    # Literal list unless it is a subquery
+                    following = next((t for t in tokens[index + 1 :] if t[0] != "comment"), None)
+                    if following is None or following[1].upper() not in ("SELECT", "WITH", "VALUES"):
+                        in_list_depth = depth
+            elif upper == ")":
+                if in_list_depth == depth:
+                    in_list_depth = None
+                depth -= 1
+            elif upper == "BETWEEN":
+                between_pending = True
+            elif upper == "LIMIT":
+                limit_clause = True
+
+            elif kind == "word" and upper not in _LIMIT_KEYWORDS and limit_clause:
+                limit_clause = False
+
+        if prev == "AND" and between_pending:
+            # The upper bound of BETWEEN has been consumed
+            between_pending = False
+        index += 1
+
+    template = "".join(parts).strip().rstrip(";").strip()
+    return template, tuple(params)
+
+
+def _select_list_span(tokens: List[Tuple[str, str, int, int]], index: int) -> Tuple[Optional[int], Optional[int], int]:
+    """First and last non-comment token of the select list starting at `index`, and the index after it."""
+    first = last = None
+    depth = 0
+    while index < len(tokens):
+        kind, text, _, _ = tokens[index]
+        upper = text.upper()
+        if depth == 0 and (upper in (")", ";") or (kind == "word" and upper in _SELECT_LIST_END)):
+            break
+        if kind != "comment":
+            if first is None:
+                first = index
+            last = index
+            depth += upper == "("
+            depth -= upper == ")"
+        index += 1
+    return first, last, index
+
+
+def _no_space_between(left: Tuple[str, str], right: Tuple[str, str]) -> bool:
+    if right[1] in (")", ",", ".", ";") or left[1] in ("(", "."):
+        return True
+    # Function calls: COUNT(*), date('now')
+    return right[1] == "(" and left[0] == "word" and left[1] not in _SPACED_KEYWORDS
+
+
+def _parse_number(text: str) -> Any:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def template_key(template: str) -> str:
+    """Short stable key of a query template, for use by other caches."""
+    return hashlib.sha1(template.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class TemplateStats:
+    template: str
+    hits: int = 0
+    total_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.hits if self.hits else 0.0
+
+
+class QueryTemplateRegistry:
+    """Thread-safe hit counts and latency per query template."""
+
+    def __init__(self, max_templates: int = 1000):
+        self.max_templates = max_templates
+        self._lock = threading.Lock()
+        self._stats: Dict[str, TemplateStats] = {}
+
+    def record(self, template: str, elapsed_ms: float) -> TemplateStats:
+        """Count one execution of `template`."""
+        key = template_key(template)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_templates:
+                    # Forget the least used template to bound memory
+                    coldest = min(self._stats, key=lambda k: self._stats[k].hits)
+                    del self._stats[coldest]
+                stats = self._stats[key] = TemplateStats(template)
+            stats.hits += 1
+            stats.total_ms += elapsed_ms
+        metrics.observe("sql.template_latency_ms", elapsed_ms)
+        if stats.hits > 1:
+            metrics.increment("sql.template_reuse")
+        return stats
+
+    def get(self, template: str) -> Optional[TemplateStats]:
+        with self._lock:
+            return self._stats.get(template_key(template))
+
+    def top(self, n: int = 10) -> List[TemplateStats]:
+        """The `n` most executed templates."""
+        with self._lock:
+            return sorted(self._stats.values(), key=lambda s: s.hits, reverse=True)[:n]
+
+    def log_top(self, n: int = 10) -> None:
+        for stats in self.top(n):
+            logger.info(f"{stats.hits:>6} hits {stats.avg_ms:>9.2f} ms avg  {stats.template[:160]}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+# Process-wide registry
+query_templates = QueryTemplateRegistry()
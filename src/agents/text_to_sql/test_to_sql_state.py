@@ -17,6 +17,8 @@ class State(MessagesState):
     
     # User input
     user_query: str
+    # Execution mode for this request: "agent" (tool loop) or "fast" (plan-then-execute)
+    mode: Optional[str]
     
     # SQL-specific state
     sql_query: Optional[str]
@@ -24,7 +26,16 @@ class State(MessagesState):
     
     # Final output
     model_output: Optional[str]
+    # How the final answer was produced: "template" or "llm"
+    answer_source: Optional[str]
     
     # Additional metadata
     error_message: Optional[str]
-    success: Optional[bool]
\ No newline at end of file
+    success: Optional[bool]
+
+    # Few-shot examples injected into every LLM call of this request
+    few_shot_examples: Optional[str]
+    # Number of LLM calls made so far for this request
+    iterations: Optional[int]
+    # Estimated prompt tokens removed by context compaction in this request
+    context_tokens_saved: Optional[int]
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""
+Few-shot example store for the Text-to-SQL agent.
+
+Holds curated and learned (question, SQL) pairs indexed by their question
+embedding. For each incoming question the top-k most similar pairs are
+formatted into a prompt block, giving the agent ready-made join paths.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FewShotExampleStore:
+    """Embedding-indexed store of (question, SQL) examples."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        examples_path: Union[str, Path],
+        seed_examples: Optional[List[Dict[str, str]]] = None,
+        max_learned_examples: int = 500,
+        duplicate_threshold: float = 0.95,
+    ):
+        """
+        Initialize the store and embed every known example in one batch.
+
+        Args:
+            embeddings: Embedding model used for questions
+            examples_path: JSON file where learned examples are persisted
+            seed_examples: Curated examples, always kept in the store
+            max_learned_examples: Cap on learned examples (oldest are dropped)
+            duplicate_threshold: Similarity above which a new question is a duplicate
+        """
+        self.embeddings = embeddings
+        self.examples_path = Path(examples_path)
+        self.max_learned_examples = max_learned_examples
+        self.duplicate_threshold = duplicate_threshold
+        self._lock = threading.RLock()
+
+        seeds = [
+            {"question": e["question"], "sql": e["sql"], "source": "curated"}
+            for e in (seed_examples or [])
+        ]
+        self._examples: List[Dict[str, Any]] = seeds + self._load_learned()
+        self._vectors = self._embed([e["question"] for e in self._examples])
+        logger.info(
+            f"Few-shot store ready with {len(seeds)} curated and "
+            f"{len(self._examples) - len(seeds)} learned example(s)"
+        )
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def _load_learned(self) -> List[Dict[str, Any]]:
+        """Read learned examples from disk, ignoring a missing or corrupt file."""
+        if not self.examples_path.exists():
+            return []
+        try:
+            with open(self.examples_path, "r", encoding="utf-8") as file:
+                learned = json.load(file)
+            return [{**e, "source": "learned"} for e in learned][-self.max_learned_examples:]
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read learned examples from {self.examples_path}: {e}")
+            return []
+
+    def _persist(self) -> None:
+        """Atomically write the learned examples to disk."""
+        learned = [
+            {k: v for k, v in e.items() if k != "source"}
+            for e in self._examples
+            if e["source"] == "learned"
+        ]
+        tmp_path = self.examples_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(learned, file, indent=2)
+            os.replace(tmp_path, self.examples_path)
+        except OSError as e:
+            logger.warning(f"Could not persist learned examples to {self.examples_path}: {e}")
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an L2-normalised float32 matrix."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _embed_query(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def search(
+        self, question: str, k: int = 3, min_similarity: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Return up to `k` examples most similar to `question`.
+
+        Args:
+            question: Natural language question
+            k: Maximum number of examples
+            min_similarity: Cosine similarity below which examples are dropped
+
+        Returns:
+            Examples (question, sql, source, similarity), most similar first.
+        """
+        with self._lock:
+            if not self._examples or k <= 0:
+                return []
+            scores = self._vectors @ self._embed_query(question)
+            top = np.argsort(-scores)[:k]
+            return [
+                {**self._examples[i], "similarity": float(scores[i])}
+                for i in top
+                if scores[i] >= min_similarity
+            ]
+
+    def add_example(self, question: str, sql: str) -> bool:
+        """
+        Learn a new (question, SQL) pair from a successful run.
+
+        Near-duplicate questions are skipped so the store keeps growing with
+        new query shapes rather than rephrasings.
+
+        Returns:
+            True if the example was added.
+        """
+        question, sql = question.strip(), sql.strip()
+        if not question or not sql:
+            return False
+
+        with self._lock:
+            vector = self._embed_query(question)
+            if self._examples and float(np.max(self._vectors @ vector)) >= self.duplicate_threshold:
+                logger.debug(f"Skipping duplicate few-shot example: {question}")
+                return False
+
+            self._examples.append({
+                "question": question,
+                "sql": sql,
+                "source": "learned",
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            self._vectors = (
+                np.vstack([self._vectors, vector]) if self._vectors.size else vector[None, :]
+            )
+
+            learned_idx = [i for i, e in enumerate(self._examples) if e["source"] == "learned"]
+            if len(learned_idx) > self.max_learned_examples:
+                drop = learned_idx[0]
+                del self._examples[drop]
+                self._vectors = np.delete(self._vectors, drop, axis=0)
+
+            self._persist()
+            logger.info(f"Learned new few-shot example: {question}")
+            return True
+
+
+def format_examples(examples: List[Dict[str, Any]]) -> str:
+    """Render examples as a compact question/SQL listing for the prompt."""
+    return "\n\n".join(
+        f"Question: {e['question']}\nSQL: {e['sql']}" for e in examples
+    )
@@ -1,19 +1,29 @@
 """
 SQL Database Tools for LangGraph - SQLite Implementation
-This module provides 4 SQL database tools compatible with LangGraph's ToolNode.
+This module provides 5 SQL database tools compatible with LangGraph's ToolNode.
 """
 
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import sqlite3
+import threading
+import time
 from langchain_core.tools import tool
 from langchain_core.language_models import BaseLanguageModel
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_community.utilities.sql_database import SQLDatabase
-from sqlalchemy import create_engine
 import re
+from pathlib import Path
 
+from src.utils import config
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.utils.sqlite_profiles import create_sqlite_engine
+from src.utils.sql_sandbox import SQLSandboxPool
+from src.utils.duckdb_backend import DuckDBBackend, DuckDBUnavailable, translate_sqlite_query
+from src.utils.fts_index import FTSIndex, describe_fts_indexes, discover_fts_indexes, internal_tables, rewrite_like_predicates, table_columns
+from src.agents.text_to_sql.column_profiles import ColumnProfiler, column_profile_cache_path
+from src.agents.text_to_sql.query_templates import normalize_query, query_templates
 
 logger = get_logger(__name__)
 
@@ -41,16 +51,30 @@ Output the final SQL query only.
 class SQLTools:
     """Container class for SQL database tools."""
 
-    def __init__(self, database_path: str, llm: Optional[BaseLanguageModel] = None):
+    def __init__(
+        self,
+        database_path: str,
+        llm: Optional[BaseLanguageModel] = None,
+        profile: Optional[str] = None,
+    ):
         """
         Initialize SQL Tools with SQLite database.
 
         Args:
             database_path: Path to the SQLite database file
             llm: Language model for query checking (optional)
+            profile: SQLite connection profile name (defaults to config.SQLITE_PROFILE)
         """
         self.database_path = database_path
-        self.db = SQLDatabase.from_uri(f"sqlite:///{database_path}")
+        # A larger sqlite3 statement cache keeps hot query templates prepared on each pooled connection
+        self.engine = create_sqlite_engine(
+            database_path,
+            profile or config.SQLITE_PROFILE,
+            connect_args={"cached_statements": config.SQL_STATEMENT_CACHE_SIZE},
+        )
+        # FTS5 indexes (built with src.utils.fts_index) are used, but their tables stay hidden
+        self.fts_indexes, hidden_tables, self.table_columns = self._discover_fts_indexes()
+        self.db = SQLDatabase(self.engine, ignore_tables=hidden_tables or None)
         self.llm = llm
 
         # Initialize LLM chain for query checker if LLM is provided
@@ -65,24 +89,253 @@ class SQLTools:
         else:
             self.llm_chain = None
 
+        self._schema_snapshot: Optional[str] = None
+        self._schema_lock = threading.Lock()
+
+        # Column statistics and value dictionary (computed at warm-up or in the background, persisted next to the databases)
+        self.column_profiler: Optional[ColumnProfiler] = None
+        if config.TEXT_TO_SQL_COLUMN_PROFILES:
+            self.column_profiler = ColumnProfiler(database_path, cache_path=column_profile_cache_path(database_path))
+
+        # Optional out-of-process execution with resource limits
+        self.sandbox: Optional[SQLSandboxPool] = None
+        if config.SQL_SANDBOX_ENABLED:
+            self.sandbox = SQLSandboxPool(
+                database_path,
+                workers=config.SQL_SANDBOX_WORKERS,
+                timeout_s=config.SQL_SANDBOX_TIMEOUT_S,
+                memory_limit_mb=config.SQL_SANDBOX_MEMORY_MB,
+                cpu_limit_s=config.SQL_SANDBOX_CPU_S,
+                profile=profile or config.SQLITE_PROFILE,
+                statement_cache_size=config.SQL_STATEMENT_CACHE_SIZE,
+            )
+
+        # Optional DuckDB engine for large scans and aggregations
+        self.duckdb_mode = "off"
+        self.analytics: Optional[DuckDBBackend] = None
+        if config.SQL_DUCKDB_MODE in ("auto", "all"):
+            try:
+                self.analytics = DuckDBBackend(
+                    database_path,
+                    source=config.SQL_DUCKDB_SOURCE,
+                    mirror_dir=config.DB_DIRECTORY / f"{Path(database_path).stem}.parquet_mirror",
+                    memory_limit=config.SQL_DUCKDB_MEMORY_LIMIT,
+                    sqlite_semantics=config.SQL_DUCKDB_MODE == "auto",
+                    excluded_tables=hidden_tables,
+                )
+                self.duckdb_mode = config.SQL_DUCKDB_MODE
+            except DuckDBUnavailable as e:
+                logger.warning(f"DuckDB backend disabled, using SQLite only: {e}")
+
+    @property
+    def dialect(self) -> str:
+        """SQL dialect the agent must write: DuckDB when it runs every query, otherwise SQLite."""
+        return "duckdb" if self.duckdb_mode == "all" else self.db.dialect
+
+    def _discover_fts_indexes(self) -> Tuple[Dict[str, FTSIndex], List[str], Dict[str, Set[str]]]:
+        """Full-text indexes of the database, the internal tables that back them and the columns of every table."""
+        try:
+            with self.engine.connect() as conn:
+                raw = conn.connection.dbapi_connection
+                indexes, hidden = discover_fts_indexes(raw), sorted(internal_tables(raw))
+                columns = table_columns(raw) if indexes else {}
+        except Exception as e:
+            logger.warning(f"Could not inspect FTS indexes: {e}")
+            return {}, [], {}
+        if indexes:
+            logger.info(f"Using FTS indexes: {', '.join(i.name for i in indexes.values())}")
+        return indexes, hidden, columns
+
+    def get_schema_snapshot(self) -> str:
+        """
+        Schema and sample rows of every usable table.
+
+        Computed once per process and reused, so planning a query does not
+        need schema tool calls.
+        """
+        with self._schema_lock:
+            if self._schema_snapshot is None:
+                self._schema_snapshot = self.db.get_table_info()
+            snapshot = self._schema_snapshot
+        extras = [self.describe_columns(values_only=True), describe_fts_indexes(self.fts_indexes)]
+        return "\n\n".join([snapshot] + [extra for extra in extras if extra])
+
+    def describe_columns(self, tables: Optional[List[str]] = None, values_only: bool = False) -> str:
+        """Column profiles for `tables` ('' if profiling is disabled or fails)."""
+        if self.column_profiler is None:
+            return ""
+        try:
+            return self.column_profiler.describe(tables, values_only=values_only)
+        except Exception as e:
+            logger.warning(f"Column profiles unavailable: {e}")
+            return ""
+
+    def prepare_query(self, query: str) -> Tuple[str, List[str]]:
+        """
+        Rewrite a query before execution.
+
+        Filter literals that differ from a stored value of their column only
+        in case or whitespace are corrected, other unknown literals get the
+        closest stored value as a suggestion, and `column LIKE '%term%'` on
+        columns with a full-text index becomes an FTS MATCH lookup.
+
+        Returns:
+            The query to run and notes describing each rewrite and suggestion.
+        """
+        notes: List[str] = []
+        if self.column_profiler is not None and config.TEXT_TO_SQL_VALUE_MATCHING:
+            try:
+                query, fixed, unknown = self.column_profiler.fix_literals(query, config.TEXT_TO_SQL_VALUE_MATCH_CUTOFF)
+                notes += [f"corrected filter value {note}" for note in fixed] + unknown
+            except Exception as e:
+                logger.warning(f"Literal matching skipped: {e}")
+        if self.fts_indexes and config.TEXT_TO_SQL_FTS_REWRITE and self.dialect == "sqlite":
+            query, rewritten = rewrite_like_predicates(query, self.fts_indexes, self.table_columns)
+            if rewritten:
+                metrics.increment("text_to_sql.like_rewrites", len(rewritten))
+                notes += [f"used full-text index for {note}" for note in rewritten]
+        return query, notes
+
+    def validate_read_query(self, query: str) -> Optional[str]:
+        """
+        Check that `query` is a single read-only statement SQLite can compile.
+
+        Returns:
+            An error message, or None if the query is valid.
+        """
+        checked = _simple_query_validation(query, self.dialect)
+        if checked.startswith("Error"):
+            return checked
+        if not re.match(r"^\s*(SELECT|WITH)\b", query, re.IGNORECASE):
+            return "Error: Only SELECT queries are allowed"
+        without_literals = re.sub(r"'(?:[^']|'')*'", "''", query).strip().rstrip(";")
+        if ";" in without_literals:
+            return "Error: Only a single statement is allowed"
+        if self.dialect == "duckdb":
+            error = self.analytics.explain(query)
+            return f"Error: {error}" if error else None
+        try:
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql(f"EXPLAIN {query.strip().rstrip(';')}").fetchall()
+        except Exception as e:
+            return f"Error: {e}"
+        return None
+
+    def execute(self, query: str, max_rows: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Execute a query and return structured results.
+
+        With SQL_QUERY_TEMPLATES the query runs as its normalized template
+        with the literals bound as parameters, so queries differing only in
+        literals reuse one prepared statement per connection. Large scans
+        and aggregations run on DuckDB when SQL_DUCKDB_MODE routes them
+        there; other queries run in the sandbox worker pool when it is
+        enabled, otherwise on the engine's connection pool in this process.
+
+        Args:
+            query: SQL query to execute
+            max_rows: Maximum rows to fetch (defaults to config.SQL_MAX_RESULT_ROWS)
+
+        Returns:
+            Dict with columns, rows (list of tuples), truncated flag, elapsed_ms
+            and the query template.
+
+        Raises:
+            Exception: Any database error raised by the query.
+        """
+        max_rows = max_rows or config.SQL_MAX_RESULT_ROWS
+        if not config.SQL_QUERY_TEMPLATES:
+            return {**self._run(query, (), max_rows), "template": query}
+
+        try:
+            template, params = normalize_query(query)
+        except Exception as e:
+            logger.warning(f"Could not normalize query, running it as is: {e}")
+            template, params = query, ()
+        try:
+            result = self._run(template, params, max_rows)
+        except Exception as e:
+            if "binding" not in str(e).lower():
+                raise
+            # The normalizer misjudged a literal position; the original text is still valid
+            logger.warning(f"Template binding failed ({e}), running the original query")
+            metrics.increment("sql.template_fallbacks")
+            template, result = query, self._run(query, (), max_rows)
+        query_templates.record(template, result["elapsed_ms"])
+        result["template"] = template
+        return result
+
+    def _run(self, query: str, params: Tuple[Any, ...], max_rows: int) -> Dict[str, Any]:
+        if self.analytics is not None:
+            duckdb_query = self._duckdb_query(query)
+            if duckdb_query is not None:
+                try:
+                    result = self.analytics.execute(duckdb_query, params, max_rows)
+                    metrics.increment("sql.backend", backend="duckdb")
+                    return result
+                except Exception as e:
+                    if self.duckdb_mode == "all":
+                        raise
+                    logger.info(f"DuckDB could not run the query, using SQLite: {e}")
+                    metrics.increment("sql.duckdb_fallbacks")
+        metrics.increment("sql.backend", backend="sqlite")
+
+        if self.sandbox is not None:
+            return self.sandbox.execute(query, max_rows, params=params)
+
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            result = conn.exec_driver_sql(query, params) if params else conn.exec_driver_sql(query)
+            if result.returns_rows:
+                columns = list(result.keys())
+                rows = [tuple(row) for row in result.fetchmany(max_rows + 1)]
+            else:
+                columns, rows = [], []
+            conn.commit()
+        return {
+            "columns": columns,
+            "rows": rows[:max_rows],
+            "truncated": len(rows) > max_rows,
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+
+
+    def _duckdb_query(self, query: str) -> Optional[str]:
+        """The query to run on DuckDB, or None if it belongs in SQLite."""
+        self.analytics.maybe_refresh(config.SQL_DUCKDB_REFRESH_S)
+        if self.duckdb_mode == "all":
+            return query
+        if self.analytics.route(query, config.SQL_DUCKDB_MIN_ROWS) != "duckdb":
+            return None
+        return translate_sqlite_query(query)
+
 
 # Global instance to be set by user
 _sql_tools_instance: Optional[SQLTools] = None
 
 
-def initialize_sql_tools(database_path: str, llm: Optional[BaseLanguageModel] = None):
+def initialize_sql_tools(
+    database_path: str,
+    llm: Optional[BaseLanguageModel] = None,
+    profile: Optional[str] = None,
+) -> SQLTools:
     """
     Initialize the global SQL tools instance.
 
     Args:
         database_path: Path to the SQLite database file
         llm: Language model for query checking (optional)
+        profile: SQLite connection profile name (optional)
+
+    Returns:
+        The initialized SQLTools instance.
     """
     logger.info(f"Initializing SQLTools with database {database_path}")
     try:
         global _sql_tools_instance
-        _sql_tools_instance = SQLTools(database_path, llm)
+        _sql_tools_instance = SQLTools(database_path, llm, profile)
         logger.info("SQLTools initialized successfully")
+        return _sql_tools_instance
     except Exception as e:
         logger.error(
             f"Failed to initialize SQLTools for {database_path}: {e}", exc_info=True
@@ -99,8 +352,15 @@ def _get_sql_tools() -> SQLTools:
     return _sql_tools_instance
 
 
-@tool
-def sql_db_query(query: str) -> str:
+def refresh_column_profiles() -> None:
+    """Profile the initialized database now (startup warm-up) rather than in the background of a query."""
+    profiler = _get_sql_tools().column_profiler
+    if profiler is not None:
+        profiler.ensure_fresh()
+
+
+@tool(response_format="content_and_artifact")
+def sql_db_query(query: str, final: bool = False) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Execute a SQL query against the database and get back the result.
     If the query is not correct, an error message will be returned.
@@ -108,19 +368,30 @@ def sql_db_query(query: str) -> str:
 
     Args:
         query: A detailed and correct SQL query.
+        final: True if the result of this query answers the user's question, so it
+            can be shown to the user directly; False for exploratory queries.
 
     Returns:
         Query results or error message.
     """
     logger.info(f"sql_db_query called with query: {query}")
     tools = _get_sql_tools()
+    query, notes = tools.prepare_query(query)
     try:
-        result = tools.db.run_no_throw(query)
-        logger.info(f"sql_db_query result: {result}")
-        return str(result)
+        result = tools.execute(query)
     except Exception as e:
         logger.error(f"Error executing query: {e}", exc_info=True)
-        return f"Error executing query: {e}"
+        return f"Error: {e}", None
+
+    # The model sees the rows as text; the structured result travels as the
+    # ToolMessage artifact for template answers and table rendering
+    content = str(result["rows"]) if result["rows"] else ""
+    if result["truncated"]:
+        content += f"\n(showing the first {len(result['rows'])} rows)"
+    if notes:
+        content = f"Note: {'; '.join(notes)}. Executed: {query}\n{content}"
+    logger.info(f"sql_db_query result: {content}")
+    return content, {**result, "query": query, "notes": notes, "final": final}
 
 
 @tool
@@ -140,6 +411,13 @@ def sql_db_schema(table_names: str) -> str:
     try:
         table_list = [t.strip() for t in table_names.split(",")]
         result = tools.db.get_table_info_no_throw(table_list)
+        # Known values of categorical columns save exploratory DISTINCT queries
+        if not result.startswith("Error"):
+            extras = [
+                tools.describe_columns(table_list, values_only=True),
+                describe_fts_indexes(tools.fts_indexes, table_list),
+            ]
+            result = "\n\n".join([result] + [extra for extra in extras if extra])
         logger.info(f"sql_db_schema result: {result}")
         return result
     except Exception as e:
@@ -147,6 +425,28 @@ def sql_db_schema(table_names: str) -> str:
         return f"Error getting schema: {e}"
 
 
+@tool
+def sql_db_column_profile(table_names: str) -> str:
+    """
+    Get column statistics for the specified tables: distinct count, null rate,
+    value range, and the stored values of categorical columns (city, brand,
+    status, position, ...). Use it to pick exact filter values instead of
+    running SELECT DISTINCT queries.
+
+    Args:
+        table_names: A comma-separated list of table names.
+                    Example input: 'customers, employees'
+
+    Returns:
+        Column profiles for the specified tables.
+    """
+    logger.info(f"sql_db_column_profile called with table_names: {table_names}")
+    tools = _get_sql_tools()
+    table_list = [t.strip() for t in table_names.split(",") if t.strip()]
+    result = tools.describe_columns(table_list)
+    return result or f"Error: no column profile available for {table_names}"
+
+
 @tool
 def sql_db_list_tables(tool_input: str = "") -> str:
     """
@@ -182,13 +482,13 @@ def sql_db_query_checker(query: str) -> str:
 
     if tools.llm_chain is None:
         # Simple validation without LLM
-        return _simple_query_validation(query, tools.db.dialect)
+        return _simple_query_validation(query, tools.dialect)
 
     try:
         # Use LLM for advanced query checking with the new invoke method
         result = tools.llm_chain.invoke({
             "query": query, 
-            "dialect": tools.db.dialect
+            "dialect": tools.dialect
         })
         
         # Extract just the SQL query from the result if it contains extra text
@@ -207,7 +507,7 @@ def sql_db_query_checker(query: str) -> str:
     except Exception as e:
         logger.error(f"Error in LLM query checker: {e}", exc_info=True)
         # Fall back to simple validation if LLM fails
-        return _simple_query_validation(query, tools.db.dialect)
+        return _simple_query_validation(query, tools.dialect)
 
 
 def _simple_query_validation(query: str, dialect: str) -> str:
@@ -222,7 +522,7 @@ def _simple_query_validation(query: str, dialect: str) -> str:
         return "Error: Empty query"
 
     if not query.upper().startswith(
-        ("SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER")
+        ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER")
     ):
         return "Error: Query should start with a valid SQL command"
 
@@ -252,6 +552,40 @@ def _simple_query_validation(query: str, dialect: str) -> str:
     return query
 
 
+def format_result_table(result: Dict[str, Any], max_rows: int = 50) -> str:
+    """
+    Render a structured query result as a markdown table.
+
+    Args:
+        result: Output of SQLTools.execute
+        max_rows: Maximum number of rows to render
+
+    Returns:
+        Markdown table, or a note if the query returned no rows.
+    """
+    columns, rows = result.get("columns") or [], result.get("rows") or []
+    if not columns:
+        return "(no columns returned)"
+    if not rows:
+        return "(no rows returned)"
+
+    def cell(value: Any) -> str:
+        if value is None:
+            return "NULL"
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value).replace("|", "\\|").replace("\n", " ")
+
+    lines = [
+        "| " + " | ".join(str(c) for c in columns) + " |",
+        "| " + " | ".join("---" for _ in columns) + " |",
+    ]
+    lines.extend("| " + " | ".join(cell(v) for v in row) + " |" for row in rows[:max_rows])
+    if len(rows) > max_rows:
+        lines.append(f"... {len(rows) - max_rows} more row(s)")
+    return "\n".join(lines)
+
+
 # Convenience function to get all tools
 def get_sql_tools() -> List[callable]:
     """
@@ -260,7 +594,7 @@ def get_sql_tools() -> List[callable]:
     Returns:
         List of SQL database tools for use with LangGraph ToolNode.
     """
-    return [sql_db_query, sql_db_schema, sql_db_list_tables, sql_db_query_checker]
+    return [sql_db_query, sql_db_schema, sql_db_list_tables, sql_db_query_checker, sql_db_column_profile]
 
 
 # Example usage:
@@ -1,22 +1,81 @@
 import os
+import re
 import asyncio
-from typing import Any, Dict, List
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_core.messages.tool import ToolMessage
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 
 from src.utils import config
 from src.utils.llm_adapter import LLMAdapter
 from src.utils.logger import get_logger
-from src.data.prompts.text_to_sql_prompt import system_prompt, user_prompt
+from src.utils.metrics import metrics
+from src.data.prompts.text_to_sql_prompt import (
+    system_prompt,
+    user_prompt,
+    few_shot_prompt,
+    plan_system_prompt,
+    plan_user_prompt,
+    plan_followup_prompt,
+    answer_prompt,
+    dialect_names,
+    dialect_guidelines,
+)
+from src.data.prompts.text_to_sql_examples import examples as seed_examples
+from src.agents.tool_execution import ParallelToolNode
 from src.agents.text_to_sql.test_to_sql_state import State  # Using the fixed State
-from src.agents.text_to_sql.text_to_sql_tools import initialize_sql_tools, get_sql_tools
+from src.agents.text_to_sql.text_to_sql_tools import (
+    initialize_sql_tools,
+    get_sql_tools,
+    format_result_table,
+)
+from src.agents.text_to_sql.text_to_sql_examples import FewShotExampleStore, format_examples
+from src.agents.text_to_sql.answer_synthesis import synthesize_answer
+from src.agents.text_to_sql.context_compactor import ToolContextCompactor
 
 
 logger = get_logger(__name__)
 
+# Earlier messages shown to fast mode's single LLM call (the supervisor's window)
+_PLAN_HISTORY_MESSAGES = 6
+
+_example_store_lock = threading.Lock()
+
+
+def get_example_store() -> Optional[FewShotExampleStore]:
+    """
+    The process-wide few-shot example store, or None if disabled/unavailable.
+
+    Built on first use rather than per workflow, so SQL workers only load the
+    embedding model when a question actually needs examples (or at warm-up).
+    """
+    with _example_store_lock:
+        return _create_example_store()
+
+
+@lru_cache(maxsize=1)
+def _create_example_store() -> Optional[FewShotExampleStore]:
+    """Build the few-shot example store, or return None if disabled/unavailable."""
+    if not config.TEXT_TO_SQL_FEW_SHOT_ENABLED:
+        logger.info("Few-shot example store disabled")
+        return None
+    try:
+        from src.utils.embeddings import get_embeddings
+
+        return FewShotExampleStore(
+            embeddings=get_embeddings(),
+            examples_path=config.TEXT_TO_SQL_EXAMPLES_PATH,
+            seed_examples=seed_examples,
+            max_learned_examples=config.TEXT_TO_SQL_MAX_LEARNED_EXAMPLES,
+        )
+    except Exception as e:
+        logger.warning(f"Few-shot example store unavailable, continuing without it: {e}")
+        return None
+
 
 class TextToSQLWorkflow:
     """
@@ -35,7 +94,14 @@ class TextToSQLWorkflow:
         self.llm_client = LLMAdapter(model_name=config.GROQ_MODEL_NAME, temperature=0.0)
 
         # Initialize SQL tools with the LLM for advanced query checking
-        initialize_sql_tools(database_path, self.llm_client.client)
+        self.sql_db = initialize_sql_tools(database_path, self.llm_client.client)
+
+        # The agent writes SQL in the dialect of the backend that runs it
+        dialect = self.sql_db.dialect
+        self.system_prompt = system_prompt.format(
+            dialect_name=dialect_names.get(dialect, dialect),
+            dialect_guideline=dialect_guidelines.get(dialect, f"Write {dialect}-compatible queries"),
+        )
 
         # Get all SQL tools
         self.sql_tools = get_sql_tools()
@@ -43,8 +109,348 @@ class TextToSQLWorkflow:
         # Bind tools to LLM
         self.llm_with_tools = self.llm_client.client.bind_tools(tools=self.sql_tools)
 
-        # Create tool node
-        self.tool_node = ToolNode(tools=self.sql_tools)
+        # Create tool node (independent tool calls of one turn run concurrently)
+        self.tool_node = ParallelToolNode(tools=self.sql_tools, name="sql_tools")
+
+        # Few-shot example store (optional, the agent works without it); built on first use
+        self._example_store: Optional[FewShotExampleStore] = None
+        self._example_store_resolved = False
+
+        # Shrinks superseded tool outputs before each agent-loop LLM call
+        self.context_compactor = (
+            ToolContextCompactor(token_budget=config.TEXT_TO_SQL_CONTEXT_TOKEN_BUDGET)
+            if config.TEXT_TO_SQL_CONTEXT_COMPACTION
+            else None
+        )
+
+    @property
+    def example_store(self) -> Optional[FewShotExampleStore]:
+        """The process-wide few-shot store, loaded (with the embedding model) on first access."""
+        if not self._example_store_resolved:
+            self._example_store = get_example_store()
+            self._example_store_resolved = True
+        return self._example_store
+
+    @example_store.setter
+    def example_store(self, store: Optional[FewShotExampleStore]) -> None:
+        self._example_store = store
+        self._example_store_resolved = True
+
+    def _retrieve_examples(self, user_query: str) -> str:
+        """Return the formatted few-shot block for a question ('' if none)."""
+        if self.example_store is None:
+            return ""
+        try:
+            examples = self.example_store.search(
+                user_query,
+                k=config.TEXT_TO_SQL_FEW_SHOT_K,
+                min_similarity=config.TEXT_TO_SQL_FEW_SHOT_MIN_SIMILARITY,
+            )
+        except Exception as e:
+            logger.warning(f"Few-shot lookup failed: {e}")
+            return ""
+        logger.debug(f"Injecting {len(examples)} few-shot example(s)")
+        return few_shot_prompt.format(examples=format_examples(examples)) if examples else ""
+
+    @staticmethod
+    def _with_examples(messages: List[BaseMessage], few_shot_examples: str) -> List[BaseMessage]:
+        """Insert the few-shot block right after the leading system prompt."""
+        messages = list(messages)
+        if not few_shot_examples:
+            return messages
+        insert_at = 1 if messages and isinstance(messages[0], SystemMessage) else 0
+        return messages[:insert_at] + [SystemMessage(content=few_shot_examples)] + messages[insert_at:]
+
+    def _prepare_messages(
+        self, messages: List[BaseMessage], few_shot_examples: str
+    ) -> Tuple[List[BaseMessage], int]:
+        """
+        Build the message list for one agent-loop LLM call.
+
+        Returns:
+            The compacted messages with few-shot examples, and the estimated tokens saved.
+        """
+        tokens_saved = 0
+        if self.context_compactor is not None:
+            messages, stats = self.context_compactor.compact(messages)
+            tokens_saved = stats.tokens_saved
+            metrics.observe("text_to_sql.context_tokens", stats.tokens_after)
+        return self._with_examples(messages, few_shot_examples), tokens_saved
+
+    @staticmethod
+    def _last_successful_result(messages: List[BaseMessage]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Find the last SQL that sql_db_query executed without an error, with its result."""
+        queries = {}
+        last_query, last_result = None, None
+        for msg in messages:
+            if isinstance(msg, AIMessage):
+                for call in msg.tool_calls or []:
+                    if call["name"] == "sql_db_query":
+                        queries[call["id"]] = call["args"].get("query")
+            elif isinstance(msg, ToolMessage) and msg.tool_call_id in queries:
+                if not str(msg.content).startswith("Error"):
+                    last_query, last_result = queries[msg.tool_call_id], msg.artifact
+        return last_query, last_result
+
+    @staticmethod
+    def _template_answer(user_query: str, result: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Template answer for a simple result, or None if the LLM should phrase it.
+
+        Rewrites of the query (corrected filter values, full-text lookups) are
+        noted below the answer, so the user sees what was actually asked.
+        """
+        if not config.TEXT_TO_SQL_TEMPLATE_ANSWERS or not result:
+            return None
+        answer = synthesize_answer(user_query, result, max_rows=config.TEXT_TO_SQL_TEMPLATE_MAX_ROWS)
+        if answer is not None and result.get("notes"):
+            answer += f"\n\nNote: {'; '.join(result['notes'])}."
+        return answer
+
+    @staticmethod
+    def _conversation_context(messages: List[BaseMessage], user_query: str) -> str:
+        """Earlier turns of the conversation as "User: / Assistant:" lines ('' for a first question)."""
+        current = (user_query, user_prompt.format(user_query=user_query))
+        turns = [
+            msg
+            for msg in messages
+            if isinstance(msg, HumanMessage) or (isinstance(msg, AIMessage) and msg.content and not msg.tool_calls)
+        ]
+        # The current question is the last message; graph.py adds it before routing here
+        if turns and isinstance(turns[-1], HumanMessage) and turns[-1].content in current:
+            turns = turns[:-1]
+        return "\n".join(
+            f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {msg.content}"
+            for msg in turns[-_PLAN_HISTORY_MESSAGES:]
+        )
+
+    def _record_answer(
+        self,
+        user_query: str,
+        sql: Optional[str],
+        iterations: int,
+        few_shot_examples: str,
+        mode: str = "agent",
+        context_tokens_saved: int = 0,
+        followup: bool = False,
+    ) -> None:
+        """
+        Record iteration metrics and learn the executed SQL as a new example.
+
+        The SQL of a follow-up question is not learned: it answers the question
+        together with earlier turns, not its text alone.
+        """
+        used_examples = "on" if few_shot_examples else "off"
+        metrics.observe("text_to_sql.iterations", iterations, few_shot=used_examples)
+        metrics.observe("text_to_sql.iterations_by_mode", iterations, mode=mode)
+        if self.context_compactor is not None:
+            metrics.observe("text_to_sql.context_tokens_saved", context_tokens_saved)
+        logger.info(
+            f"Answered in {iterations} LLM call(s) (mode {mode}, few-shot {used_examples}, "
+            f"~{context_tokens_saved} prompt tokens saved by compaction)"
+        )
+
+        if self.example_store is not None and sql and not followup:
+            try:
+                if self.example_store.add_example(user_query, sql):
+                    metrics.increment("text_to_sql.examples_learned")
+            except Exception as e:
+                logger.warning(f"Could not learn few-shot example: {e}")
+
+    @staticmethod
+    def _extract_sql(text: str) -> Optional[str]:
+        """Pull the SQL statement out of a model response."""
+        text = re.sub(r"<think>.*?</think>", "", text or "", flags=re.DOTALL).strip()
+        fenced = re.search(r"```(?:sql)?\s*(.*?)```", text, flags=re.DOTALL | re.IGNORECASE)
+        sql = (fenced.group(1) if fenced else text).strip()
+        return sql or None
+
+    async def plan_sql_node(self, state: State) -> Dict[str, Any]:
+        """
+        Fast mode: write the SQL with one LLM call over the cached schema,
+        then validate and execute it locally without any tool round trips.
+        """
+        user_query = state["user_query"]
+        iterations = (state.get("iterations") or 0) + 1
+        few_shot_examples = state.get("few_shot_examples")
+        if few_shot_examples is None:
+            few_shot_examples = self._retrieve_examples(user_query)
+
+        history = self._conversation_context(state.get("messages") or [], user_query)
+        question = (
+            plan_followup_prompt.format(history=history, user_query=user_query)
+            if history
+            else plan_user_prompt.format(user_query=user_query)
+        )
+
+        sql = None
+        try:
+            schema = await asyncio.to_thread(self.sql_db.get_schema_snapshot)
+            plan_messages = [
+                SystemMessage(content=plan_system_prompt.format(dialect=self.sql_db.dialect, schema=schema)),
+                HumanMessage(content=question),
+            ]
+            llm_response = await self.llm_client.client.ainvoke(
+                self._with_examples(plan_messages, few_shot_examples)
+            )
+            sql = self._extract_sql(llm_response.content)
+            notes = []
+            if sql:
+                sql, notes = self.sql_db.prepare_query(sql)
+            error = (
+                await asyncio.to_thread(self.sql_db.validate_read_query, sql)
+                if sql
+                else "Error: No SQL query found in the model output"
+            )
+            if error is None:
+                result = {**await asyncio.to_thread(self.sql_db.execute, sql), "notes": notes}
+        except Exception as e:
+            error = f"Error: {e}"
+
+        if error:
+            logger.warning(f"Fast mode failed, falling back to the agent loop: {error}")
+            metrics.increment("text_to_sql.fast_mode", outcome="fallback")
+            return {
+                "sql_query": sql,
+                "error_message": error,
+                "success": False,
+                "iterations": iterations,
+                "few_shot_examples": few_shot_examples,
+            }
+
+        logger.info(f"Fast mode executed SQL ({len(result['rows'])} row(s)): {sql}")
+        metrics.increment("text_to_sql.fast_mode", outcome="executed")
+        return {
+            "sql_query": sql,
+            "query_results": result,
+            "error_message": None,
+            "success": True,
+            "iterations": iterations,
+            "few_shot_examples": few_shot_examples,
+        }
+
+    async def answer_node(self, state: State) -> Dict[str, Any]:
+        """Phrase the answer to a query executed in fast mode."""
+        try:
+            user_query = state["user_query"]
+            result = state["query_results"]
+
+            answer = self._template_answer(user_query, result)
+            if answer is not None:
+                return self._template_answer_update(state, state["sql_query"], result, answer, mode="fast")
+
+            iterations = (state.get("iterations") or 0) + 1
+            prompt = answer_prompt.format(
+                user_query=user_query,
+                sql_query=state["sql_query"],
+                row_count=len(result["rows"]),
+                truncated_note=", truncated" if result.get("truncated") else "",
+                result_table=format_result_table(result),
+            )
+            llm_response = await self.llm_client.client.ainvoke([HumanMessage(content=prompt)])
+            self._record_answer(
+                user_query,
+                state["sql_query"],
+                iterations,
+                state.get("few_shot_examples") or "",
+                mode="fast",
+                followup=self._is_followup(state),
+            )
+            metrics.increment("text_to_sql.answer_source", source="llm")
+
+            return {
+                "messages": [llm_response],
+                "model_output": llm_response.content,
+                "sql_query": state["sql_query"],
+                "query_results": result,
+                "answer_source": "llm",
+                "iterations": iterations,
+            }
+
+        except Exception as exc:
+            logger.exception("Error in SQL answer node")
+            raise RuntimeError(f"SQL answer error: {exc}") from exc
+
+    def _template_answer_update(
+        self, state: State, sql: Optional[str], result: Dict[str, Any], answer: str, mode: str
+    ) -> Dict[str, Any]:
+        """State update for an answer rendered from a template (no LLM call)."""
+        iterations = state.get("iterations") or 0
+        self._record_answer(
+            state["user_query"],
+            sql,
+            iterations,
+            state.get("few_shot_examples") or "",
+            mode=mode,
+            context_tokens_saved=state.get("context_tokens_saved") or 0,
+            followup=self._is_followup(state),
+        )
+        metrics.increment("text_to_sql.answer_source", source="template")
+        logger.info(f"Answered from template ({len(result.get('rows') or [])} row(s))")
+        return {
+            "messages": [AIMessage(content=answer)],
+            "model_output": answer,
+            "sql_query": sql,
+            "query_results": result,
+            "answer_source": "template",
+            "iterations": iterations,
+        }
+
+    def _last_tool_batch_result(self, state: State) -> Optional[Dict[str, Any]]:
+        """
+        Result of the tool batch that just ran, if it was a single successful
+        sql_db_query the agent marked as final.
+
+        Other queries may be exploration (e.g. the distinct values of a column
+        before the real query), as are batches with several calls; they go back
+        to the agent.
+        """
+        messages = state["messages"]
+        batch = []
+        for msg in reversed(messages):
+            if not isinstance(msg, ToolMessage):
+                break
+            batch.append(msg)
+        if len(batch) != 1 or batch[0].name != "sql_db_query" or batch[0].status == "error":
+            return None
+        result = batch[0].artifact
+        return result if result and result.get("final") else None
+
+    def tool_outcome_condition(self, state: State) -> str:
+        """Answer simple query results from a template, otherwise return to the agent."""
+        result = self._last_tool_batch_result(state)
+        if result is not None and self._template_answer(state["user_query"], result) is not None:
+            return "synthesize"
+        return "sql_agent"
+
+    async def synthesize_answer_node(self, state: State) -> Dict[str, Any]:
+        """Answer the last sql_db_query result from a template, skipping the final LLM call."""
+        try:
+            result = self._last_tool_batch_result(state)
+            answer = self._template_answer(state["user_query"], result)
+            return self._template_answer_update(
+                state, result.get("query"), result, answer, mode=self._agent_mode_label(state)
+            )
+        except Exception as exc:
+            logger.exception("Error in SQL answer synthesis node")
+            raise RuntimeError(f"SQL answer synthesis error: {exc}") from exc
+
+    def _agent_mode_label(self, state: State) -> str:
+        """Metrics label for answers produced by the agent loop."""
+        return "fast_fallback" if self.select_mode_condition(state) == "plan_sql" else "agent"
+
+    def _is_followup(self, state: State) -> bool:
+        """Whether the question comes after earlier turns of the conversation."""
+        return bool(self._conversation_context(state.get("messages") or [], state["user_query"]))
+
+    def select_mode_condition(self, state: State) -> str:
+        """Route a request to fast mode or to the agent loop."""
+        mode = (state.get("mode") or config.TEXT_TO_SQL_MODE or "agent").lower()
+        return "plan_sql" if mode == "fast" else "sql_agent"
+
+    def plan_outcome_condition(self, state: State) -> str:
+        """Answer directly if the planned query ran, otherwise fall back to the agent loop."""
+        return "answer" if state.get("success") else "sql_agent"
 
     async def sql_agent_node(self, state: State) -> Dict[str, Any]:
         """
@@ -53,6 +459,12 @@ class TextToSQLWorkflow:
         try:
             user_query = state["user_query"]
             messages = state["messages"]
+            iterations = (state.get("iterations") or 0) + 1
+
+            # Similar solved examples are looked up once and reused on every iteration
+            few_shot_examples = state.get("few_shot_examples")
+            if few_shot_examples is None:
+                few_shot_examples = self._retrieve_examples(user_query)
 
             # Check if we have tool messages to process
             has_tool_responses = any(isinstance(msg, ToolMessage) for msg in messages)
@@ -60,14 +472,34 @@ class TextToSQLWorkflow:
             if has_tool_responses and len(messages) > 0:
                 logger.debug("Processing tool response and generating final answer")
                 
-                # The messages already contain the conversation history
-                # Just invoke with the current messages
-                llm_response = await self.llm_with_tools.ainvoke(messages)
-                
-                return {
+                # The messages already contain the conversation history;
+                # superseded tool outputs are compacted for this call only
+                llm_messages, tokens_saved = self._prepare_messages(messages, few_shot_examples)
+                context_tokens_saved = (state.get("context_tokens_saved") or 0) + tokens_saved
+                llm_response = await self.llm_with_tools.ainvoke(llm_messages)
+                update = {
                     "messages": [llm_response],  # LangGraph will automatically append this
                     "model_output": llm_response.content,
+                    "iterations": iterations,
+                    "few_shot_examples": few_shot_examples,
+                    "context_tokens_saved": context_tokens_saved,
                 }
+                if not llm_response.tool_calls:
+                    sql, result = self._last_successful_result(messages)
+                    self._record_answer(
+                        user_query,
+                        sql,
+                        iterations,
+                        few_shot_examples,
+                        mode=self._agent_mode_label(state),
+                        context_tokens_saved=context_tokens_saved,
+                        followup=self._is_followup(state),
+                    )
+                    metrics.increment("text_to_sql.answer_source", source="llm")
+                    # The rows go to the client as a table alongside the answer
+                    update.update({"sql_query": sql, "query_results": result, "answer_source": "llm"})
+
+                return update
 
             logger.debug("Generating initial SQL response for query: %s", user_query)
 
@@ -75,18 +507,33 @@ class TextToSQLWorkflow:
             if not messages:
                 # Create initial conversation
                 conversation_messages = [
-                    SystemMessage(content=system_prompt),
+                    SystemMessage(content=self.system_prompt),
                     HumanMessage(content=user_prompt.format(user_query=user_query)),
                 ]
             else:
                 # Use existing messages
                 conversation_messages = messages
 
-            llm_response = await self.llm_with_tools.ainvoke(conversation_messages)
+            llm_messages, tokens_saved = self._prepare_messages(conversation_messages, few_shot_examples)
+            context_tokens_saved = (state.get("context_tokens_saved") or 0) + tokens_saved
+            llm_response = await self.llm_with_tools.ainvoke(llm_messages)
+            if not llm_response.tool_calls:
+                self._record_answer(
+                    user_query,
+                    self._last_successful_result(messages)[0],
+                    iterations,
+                    few_shot_examples,
+                    mode=self._agent_mode_label(state),
+                    context_tokens_saved=context_tokens_saved,
+                    followup=self._is_followup(state),
+                )
 
             return {
                 "messages": [llm_response],  # LangGraph will automatically append this
-                "user_query": user_query
+                "user_query": user_query,
+                "iterations": iterations,
+                "few_shot_examples": few_shot_examples,
+                "context_tokens_saved": context_tokens_saved,
             }
 
         except Exception as exc:
@@ -105,9 +552,24 @@ class TextToSQLWorkflow:
         # Add nodes
         graph.add_node("sql_agent", self.sql_agent_node)
         graph.add_node("tool_execution", self.tool_node)
+        graph.add_node("plan_sql", self.plan_sql_node)
+        graph.add_node("answer", self.answer_node)
+        graph.add_node("synthesize_answer", self.synthesize_answer_node)
 
-        # Add edges
-        graph.add_edge(START, "sql_agent")
+        # Add edges: each request picks the agent loop or the fast plan-then-execute path
+        graph.add_conditional_edges(
+            START,
+            self.select_mode_condition,
+            {"plan_sql": "plan_sql", "sql_agent": "sql_agent"},
+        )
+
+        # Fast mode falls back to the agent loop if its query fails
+        graph.add_conditional_edges(
+            "plan_sql",
+            self.plan_outcome_condition,
+            {"answer": "answer", "sql_agent": "sql_agent"},
+        )
+        graph.add_edge("answer", END)
 
         # Conditional edge from sql_agent
         graph.add_conditional_edges(
@@ -116,20 +578,27 @@ class TextToSQLWorkflow:
             {"tools": "tool_execution", END: END},
         )
 
-        # Edge from tool_execution back to sql_agent
-        graph.add_edge("tool_execution", "sql_agent")
+        # Simple query results are answered from a template, everything else
+        # goes back to sql_agent
+        graph.add_conditional_edges(
+            "tool_execution",
+            self.tool_outcome_condition,
+            {"synthesize": "synthesize_answer", "sql_agent": "sql_agent"},
+        )
+        graph.add_edge("synthesize_answer", END)
 
         # Compile the graph
         compiled = graph.compile()
         logger.info("Text-to-SQL StateGraph compiled successfully")
         return compiled
 
-    async def run_query(self, user_query: str) -> Dict[str, Any]:
+    async def run_query(self, user_query: str, mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Run a single text-to-SQL query.
 
         Args:
             user_query: Natural language query from user
+            mode: "agent" or "fast" (defaults to config.TEXT_TO_SQL_MODE)
 
         Returns:
             Dictionary containing the results and metadata
@@ -142,8 +611,9 @@ class TextToSQLWorkflow:
             # Initialize state with system and user messages
             initial_state = {
                 "user_query": user_query,
+                "mode": mode,
                 "messages": [
-                    SystemMessage(content=system_prompt),
+                    SystemMessage(content=self.system_prompt),
                     HumanMessage(content=user_prompt.format(user_query=user_query)),
                 ]
             }
@@ -162,6 +632,8 @@ class TextToSQLWorkflow:
                             "response": node_state["model_output"],
                             "sql_query": node_state.get("sql_query"),
                             "query_results": node_state.get("query_results"),
+                            "answer_source": node_state.get("answer_source"),
+                            "iterations": node_state.get("iterations"),
                             "success": True,
                         }
 
@@ -221,19 +693,20 @@ class TextToSQLWorkflow:
 
 
 # Standalone usage functions for flexibility
-async def run_single_query(database_path: str, query: str) -> Dict[str, Any]:
+async def run_single_query(database_path: str, query: str, mode: Optional[str] = None) -> Dict[str, Any]:
     """
     Run a single text-to-SQL query without interactive loop.
 
     Args:
         database_path: Path to SQLite database
         query: Natural language query
+        mode: "agent" or "fast" (optional)
 
     Returns:
         Query results and metadata
     """
     workflow = TextToSQLWorkflow(database_path)
-    return await workflow.run_query(query)
+    return await workflow.run_query(query, mode)
 
 
 async def start_interactive_session(database_path: str):
@@ -0,0 +1,114 @@
+"""
+Concurrent tool execution node shared by the agent workflows.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+from src.utils import config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class ParallelToolNode:
+    """
+    LangGraph node that runs every tool call of the last AI message concurrently.
+
+    Results are returned in the order of the tool calls, so the conversation
+    stays identical to sequential execution while latency becomes that of the
+    slowest call. A semaphore created per invocation caps how many calls of
+    one request run at the same time.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        max_concurrency: Optional[int] = None,
+        name: str = "tools",
+        intercept: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Optional[Any]]]] = None,
+    ):
+        """
+        Args:
+            tools: Tools the node may call
+            max_concurrency: Concurrent calls per request (defaults to config.TOOL_MAX_CONCURRENCY)
+            name: Label used in logs and metrics
+            intercept: Awaited with the state and a tool call before the tool runs; a result
+                other than None is used as the tool's output instead of running it
+        """
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.max_concurrency = max(1, max_concurrency or config.TOOL_MAX_CONCURRENCY)
+        self.name = name
+        self.intercept = intercept
+
+    async def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        messages = state["messages"]
+        last_message = messages[-1] if messages else None
+        if not isinstance(last_message, AIMessage) or not last_message.tool_calls:
+            logger.warning(f"{self.name}: no tool calls to execute")
+            return {"messages": []}
+
+        tool_calls = last_message.tool_calls
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+
+        results: List[ToolMessage] = await asyncio.gather(
+            *(self._run_tool_call(state, call, semaphore) for call in tool_calls)
+        )
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("tools.batch_size", len(tool_calls), node=self.name)
+        metrics.observe("tools.batch_latency_ms", elapsed_ms, node=self.name)
+        logger.info(
+            f"{self.name}: executed {len(tool_calls)} tool call(s) in {elapsed_ms:.0f} ms "
+            f"(max concurrency {self.max_concurrency})"
+        )
+        return {"messages": results}
+
+    async def _run_tool_call(
+        self, state: Dict[str, Any], call: Dict[str, Any], semaphore: asyncio.Semaphore
+    ) -> ToolMessage:
+        """Execute one tool call, turning failures into error ToolMessages."""
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            return ToolMessage(
+                content=(
+                    f"Error: {call['name']} is not a valid tool, "
+                    f"try one of [{', '.join(self.tools_by_name)}]."
+                ),
+                name=call["name"],
+                tool_call_id=call["id"],
+                status="error",
+            )
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await self.intercept(state, call) if self.intercept is not None else None
+                if result is None:
+                    # Passing the full tool call makes the tool return a ToolMessage,
+                    # including any artifact it produces
+                    result = await tool.ainvoke({**call, "type": "tool_call"})
+            except Exception as e:
+                logger.error(f"Tool '{call['name']}' failed: {e}", exc_info=True)
+                return ToolMessage(
+                    content=f"Error: {e!r}\n Please fix your mistakes.",
+                    name=call["name"],
+                    tool_call_id=call["id"],
+                    status="error",
+                )
+            finally:
+                metrics.observe(
+                    "tools.call_latency_ms",
+                    (time.perf_counter() - started) * 1000,
+                    tool=call["name"],
+                )
+
+        if isinstance(result, ToolMessage):
+            return result
+        return ToolMessage(content=str(result), name=call["name"], tool_call_id=call["id"])
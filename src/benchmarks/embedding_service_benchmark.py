@@ -0,0 +1,143 @@
+"""
+Benchmark the shared embedding service against one model per worker process.
+
+`--workers` processes each embed `--requests` queries from `--threads`
+threads, either with a model of their own ("local") or through the
+embedding service ("service"). Each variant reports throughput, latency
+percentiles and the mean RSS of a worker.
+
+By default the model is a fake one that spends the CPU time of a small
+encoder (see `rag_concurrency_benchmark`); `--model` loads the configured
+EMBEDDING_MODEL instead, which shows the memory saved per worker.
+
+Usage:
+    python -m src.benchmarks.embedding_service_benchmark --workers 4 --threads 4
+    python -m src.benchmarks.embedding_service_benchmark --model --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from src.utils import config
+from src.benchmarks.rag_concurrency_benchmark import SimulatedCostEmbedding
+from src.benchmarks.rag_retrieval_benchmark import WORDS
+
+
+def rss_mb() -> float:
+    """Resident set size of this process (Linux), 0 elsewhere."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def make_model(real: bool) -> Embeddings:
+    if real:
+        from src.utils.embeddings import get_local_embeddings
+
+        return get_local_embeddings()
+    return SimulatedCostEmbedding(size=384)
+
+
+def serve(socket_path: str, real: bool, ready) -> None:
+    import asyncio
+
+    from src.utils.embedding_service import EmbeddingService
+
+    service = EmbeddingService(make_model(real), socket_path, config.EMBEDDING_MODEL)
+    asyncio.run(service.serve(ready=ready.set))
+
+
+def worker(mode: str, socket_path: str, real: bool, requests: int, threads: int, seed: int, results) -> None:
+    if mode == "service":
+        from src.utils.embedding_service import RemoteEmbeddings
+
+        embeddings: Embeddings = RemoteEmbeddings(socket_path, config.EMBEDDING_MODEL)
+    else:
+        embeddings = make_model(real)
+    embeddings.embed_query("warm-up")
+    rng = random.Random(seed)
+    queries = [" ".join(rng.choices(WORDS, k=8)) for _ in range(requests)]
+    latencies: List[float] = []
+
+    def run(part: List[str]) -> None:
+        for query in part:
+            started = time.perf_counter()
+            embeddings.embed_query(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    pool = [threading.Thread(target=run, args=(queries[i::threads],)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put({"latencies": latencies, "rss_mb": rss_mb()})
+
+
+def run_variant(mode: str, args, socket_path: str) -> Dict[str, float]:
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=worker, args=(mode, socket_path, args.model, args.requests, args.threads, i, results))
+        for i in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for process in workers:
+        process.start()
+    outputs = [results.get() for _ in workers]
+    elapsed = time.perf_counter() - started
+    for process in workers:
+        process.join()
+    latencies = sorted(latency for output in outputs for latency in output["latencies"])
+    return {
+        "req/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies),
+        "p90 ms": latencies[int(len(latencies) * 0.9) - 1],
+        "worker RSS MB": statistics.mean(output["rss_mb"] for output in outputs),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare per-worker embedding models with the shared service.")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent requests per worker")
+    parser.add_argument("--requests", type=int, default=200, help="Queries per worker")
+    parser.add_argument("--model", action="store_true", help="Use the configured EMBEDDING_MODEL instead of a fake")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "embeddings.sock")
+        ctx = multiprocessing.get_context("fork")
+        ready = ctx.Event()
+        server = ctx.Process(target=serve, args=(socket_path, args.model, ready), daemon=True)
+        server.start()
+        if not ready.wait(300):
+            raise RuntimeError("Embedding service did not start")
+        try:
+            rows = {mode: run_variant(mode, args, socket_path) for mode in ("local", "service")}
+        finally:
+            server.terminate()
+            server.join()
+
+    print(f"{args.workers} workers x {args.threads} threads x {args.requests} queries")
+    columns = list(next(iter(rows.values())))
+    print(f"{'variant':10}" + "".join(f"{column:>15}" for column in columns))
+    for mode, row in rows.items():
+        print(f"{mode:10}" + "".join(f"{row[column]:15.1f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Import-time profile of the agent's entry modules.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+which reports the time of every (transitive) import. The report lists the
+wall time and resident memory after the import, the slowest imports, and
+which heavy optional dependencies were loaded, e.g. to check that a
+SQL-only worker does not pull in torch or chromadb.
+
+Usage:
+    python -m src.benchmarks.import_profile
+    python -m src.benchmarks.import_profile src.agents.graph --top 25 --load-embeddings
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULES = [
+    "src.agents.text_to_sql.text_to_sql_workflow",
+    "src.agents.rag.rag_workflow",
+    "src.agents.graph",
+]
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "chromadb",
+    "langchain_chroma",
+    "duckdb",
+]
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# Runs in the child interpreter: import, then report timing, memory and loaded heavy modules as JSON
+_CHILD = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+import_s = time.perf_counter() - started
+load_s = None
+if {load_embeddings!r}:
+    from src.utils.embeddings import get_embeddings
+    started = time.perf_counter()
+    get_embeddings().embed_query("warm-up")
+    load_s = time.perf_counter() - started
+rss_kb = None
+try:
+    with open("/proc/self/status") as f:
+        rss_kb = int(next(line for line in f if line.startswith("VmRSS")).split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"import_s": import_s, "load_s": load_s, "rss_kb": rss_kb, "heavy": heavy}}))
+"""
+
+
+def profile_module(module: str, load_embeddings: bool = False) -> Tuple[Dict, List[Tuple[int, int, str]]]:
+    """
+    Import `module` in a fresh interpreter.
+
+    Returns:
+        (summary dict, [(self us, cumulative us, top-level import name)] for top-level imports)
+    """
+    code = _CHILD.format(module=module, load_embeddings=load_embeddings, heavy=HEAVY_MODULES)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=False
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr.strip().splitlines()[-1]}")
+    summary = json.loads(process.stdout.strip().splitlines()[-1])
+    imports = []
+    for line in process.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            imports.append((int(match.group(1)), int(match.group(2)), match.group(4)))
+    return summary, imports
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Report import time and memory of the agent's entry modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports listed per module")
+    parser.add_argument(
+        "--load-embeddings", action="store_true", help="Also time loading the embedding model after the import"
+    )
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        try:
+            summary, imports = profile_module(module, args.load_embeddings)
+        except RuntimeError as e:
+            print(f"{module}: {e}\n")
+            continue
+        print(f"{module}")
+        print(f"  import {summary['import_s'] * 1000:8.0f} ms   RSS {summary['rss_kb'] / 1024:7.1f} MB")
+        if summary["load_s"] is not None:
+            print(f"  embedding model load {summary['load_s'] * 1000:8.0f} ms")
+        print(f"  heavy modules loaded: {', '.join(summary['heavy']) or 'none'}")
+        # Cumulative time of packages, counting each top-level package once (its outermost import)
+        packages: Dict[str, int] = {}
+        for _, cumulative, name in imports:
+            package = name.split(".")[0]
+            packages[package] = max(packages.get(package, 0), cumulative)
+        print(f"  slowest packages (cumulative ms):")
+        for package, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+            print(f"    {cumulative / 1000:8.1f}  {package}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
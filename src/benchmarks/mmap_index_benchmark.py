@@ -0,0 +1,179 @@
+"""
+Benchmark the memory-mapped vector index against Chroma: recall, latency and memory.
+
+A collection of clustered unit vectors is created (or an existing one is
+used with `--persist-dir`) and exported as int8 and float16, flat and IVF.
+Queries are perturbed copies of stored vectors. Recall@k is measured
+against exact float32 search; each backend runs in a fresh process so its
+memory is measured in isolation. The synthetic chunks are spread over
+`--manuals` vehicle models; with `--filtered` every query is restricted to
+the model of the chunk it was drawn from, as the retrieval tool does when a
+question names a vehicle. The mmap backends' file-backed memory
+(`RssFile`) lives in the page cache and is shared by every process on the
+host; `RssAnon` is what each additional worker costs.
+
+Usage:
+    python -m src.benchmarks.mmap_index_benchmark --docs 20000 --dim 384
+    python -m src.benchmarks.mmap_index_benchmark --docs 20000 --manuals 40 --filtered
+    python -m src.benchmarks.mmap_index_benchmark --persist-dir db --collection my_rag_collection
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+import numpy as np
+
+from src.utils import config
+from src.agents.rag.mmap_index import MmapVectorIndex, build_mmap_index
+from src.agents.rag.vector_store import client_settings
+
+
+def build_collection(persist_dir: str, collection: str, docs: int, dim: int, manuals: int, seed: int = 5) -> None:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, docs // 200), dim)).astype(np.float32)
+    client = chromadb.PersistentClient(path=persist_dir, settings=client_settings())
+    target = client.get_or_create_collection(collection)
+    for start in range(0, docs, 2000):
+        count = min(2000, docs - start)
+        vectors = centers[rng.integers(len(centers), size=count)] + rng.normal(scale=0.6, size=(count, dim))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        target.add(
+            ids=[f"chunk-{i}" for i in range(start, start + count)],
+            embeddings=vectors.astype(np.float32),
+            documents=[f"synthetic chunk {i}" for i in range(start, start + count)],
+            metadatas=[
+                {"source": f"doc-{i // 20}.pdf", "brand": "Synthetic", "model": f"model-{(i // 20) % manuals}"}
+                for i in range(start, start + count)
+            ],
+        )
+
+
+def load_vectors(persist_dir: str, collection: str) -> Tuple[List[str], List[str], np.ndarray]:
+    target = chromadb.PersistentClient(path=persist_dir, settings=client_settings()).get_collection(collection)
+    ids, models, batches = [], [], []
+    for offset in range(0, target.count(), 5000):
+        batch = target.get(include=["embeddings", "metadatas"], limit=5000, offset=offset)
+        ids += batch["ids"]
+        models += [str((metadata or {}).get("model", "")) for metadata in batch["metadatas"]]
+        batches.append(np.asarray(batch["embeddings"], dtype=np.float32))
+    vectors = np.concatenate(batches)
+    return ids, models, vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def memory_kb() -> Dict[str, int]:
+    """RssAnon / RssFile of this process (Linux), or the peak RSS elsewhere."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return {name: int(fields[name].split()[0]) for name in ("RssAnon", "RssFile")}
+    except (OSError, KeyError):
+        import resource
+
+        return {"RssAnon": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "RssFile": 0}
+
+
+def run_backend(
+    spec: Dict[str, Any], queries: np.ndarray, filters: List[Optional[Dict[str, str]]], k: int
+) -> Dict[str, Any]:
+    """Open one backend, run the queries (each with its filter); executed in a fresh process."""
+    before = memory_kb()
+    started = time.perf_counter()
+    if spec["kind"] == "chroma":
+        client = chromadb.PersistentClient(path=spec["persist_dir"], settings=client_settings())
+        collection = client.get_collection(spec["collection"])
+        search = lambda q, f: collection.query(query_embeddings=[q], n_results=k, where=f, include=[])["ids"][0]
+    else:
+        index = MmapVectorIndex(spec["directory"], embeddings=None, nprobe=spec.get("nprobe", 8))
+        index.get_by_ids([])  # loads the id map, as a warm worker would have it
+        search = lambda q, f: [doc.id for doc in index.similarity_search_by_vector(q, k=k, filter=f)]
+    search(queries[0], filters[0])
+    open_ms = (time.perf_counter() - started) * 1000
+
+    latencies, results = [], []
+    for query, where in zip(queries, filters):
+        began = time.perf_counter()
+        results.append(search(query.tolist(), where))
+        latencies.append((time.perf_counter() - began) * 1000)
+    after = memory_kb()
+    return {
+        "open_ms": open_ms,
+        "latencies": latencies,
+        "results": results,
+        "anon_mb": (after["RssAnon"] - before["RssAnon"]) / 1024,
+        "file_mb": (after["RssFile"] - before["RssFile"]) / 1024,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare Chroma and the memory-mapped vector index.")
+    parser.add_argument("--persist-dir", help="Existing Chroma directory (default: build a temporary one)")
+    parser.add_argument("--collection", default=config.COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--docs", type=int, default=20000, help="Synthetic vectors in the temporary collection")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per backend")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--nlist", type=int, help="IVF lists (default: 4 * sqrt(vectors))")
+    parser.add_argument("--nprobe", type=int, default=config.RAG_MMAP_NPROBE, help="IVF lists scanned per query")
+    parser.add_argument("--manuals", type=int, default=1, help="Vehicle models the synthetic chunks are spread over")
+    parser.add_argument("--filtered", action="store_true", help="Restrict each query to the model of its chunk")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persist_dir = args.persist_dir or tmp
+        if not args.persist_dir:
+            build_collection(persist_dir, args.collection, args.docs, args.dim, args.manuals)
+        ids, models, vectors = load_vectors(persist_dir, args.collection)
+
+        rng = np.random.default_rng(9)
+        drawn = rng.integers(len(vectors), size=args.queries)
+        noise = rng.normal(scale=0.3 / np.sqrt(vectors.shape[1]), size=(len(drawn), vectors.shape[1]))
+        queries = vectors[drawn] + noise
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+        filters = [{"model": models[i]} if args.filtered else None for i in drawn]
+        model_array = np.asarray(models)
+        truth = []
+        for query, where in zip(queries, filters):
+            scores = vectors @ query
+            if where is not None:
+                scores[model_array != where["model"]] = -np.inf
+            truth.append(set(ids[i] for i in np.argsort(scores)[::-1][: args.k]))
+
+        collection = chromadb.PersistentClient(path=persist_dir, settings=client_settings()).get_collection(
+            args.collection
+        )
+        nlist = args.nlist or int(4 * np.sqrt(len(ids)))
+        specs: List[Tuple[str, Dict[str, Any]]] = [
+            ("chroma hnsw", {"kind": "chroma", "persist_dir": persist_dir, "collection": args.collection})
+        ]
+        for dtype, lists in (("int8", 0), ("float16", 0), ("int8", nlist)):
+            directory = Path(tmp) / f"export-{dtype}-{lists}"
+            build_mmap_index(collection, directory, dtype=dtype, nlist=lists)
+            label = f"mmap {dtype} " + (f"ivf{lists}/{args.nprobe}" if lists else "flat")
+            specs.append((label, {"kind": "mmap", "directory": str(directory), "nprobe": args.nprobe}))
+
+        print(
+            f"{len(ids)} vectors of dimension {vectors.shape[1]}, {len(queries)} "
+            f"{'filtered ' if args.filtered else ''}queries, recall@{args.k}"
+        )
+        print(f"{'backend':22}{'recall':>8}{'open ms':>10}{'p50 ms':>9}{'p90 ms':>9}{'anon MB':>9}{'file MB':>9}")
+        context = multiprocessing.get_context("spawn")
+        for label, spec in specs:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_backend, (spec, queries, filters, args.k))
+            recall = statistics.mean(len(truth[i] & set(r)) / args.k for i, r in enumerate(result["results"]))
+            latencies = sorted(result["latencies"])
+            p90 = latencies[int(len(latencies) * 0.9) - 1]
+            print(
+                f"{label:22}{recall:8.3f}{result['open_ms']:10.1f}{statistics.median(latencies):9.2f}"
+                f"{p90:9.2f}{result['anon_mb']:9.1f}{result['file_mb']:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
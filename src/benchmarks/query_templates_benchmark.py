@@ -0,0 +1,109 @@
+"""
+Benchmark literal-inlined SQL vs parameterized templates on hot query shapes.
+
+Each round runs the same few query shapes with different literals (ids,
+date ranges, cities). Inlined literals make every query text unique, so
+SQLite parses and plans each one; the normalized templates hit the
+connection's prepared statement cache after their first execution. The
+normalizer's own cost is reported separately: it pays off when planning
+is expensive (joins, many tables) and is memoized for repeated texts.
+
+Usage:
+    python -m src.benchmarks.query_templates_benchmark --db src/db/showroom_management.db --rounds 2000
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+from typing import List, Tuple
+
+from src.utils import config
+from src.agents.text_to_sql.query_templates import QueryTemplateRegistry, normalize_query
+
+SHAPES = [
+    "SELECT COUNT(*) FROM sales WHERE showroom_id = {showroom} AND sale_date BETWEEN '{start}' AND '{end}'",
+    "SELECT first_name, last_name FROM customers WHERE customer_id = {customer}",
+    "SELECT COUNT(*) FROM customers WHERE city = '{city}'",
+    "SELECT s.sale_id, s.final_amount FROM sales s WHERE s.showroom_id = {showroom} ORDER BY s.sale_date DESC LIMIT {limit}",
+]
+CITIES = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Pune", "Hyderabad", "Kolkata", "Ahmedabad"]
+
+
+def make_queries(rounds: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(rounds):
+        year = rng.randint(2021, 2024)
+        month = rng.randint(1, 12)
+        for shape in SHAPES:
+            queries.append(
+                shape.format(
+                    showroom=rng.randint(1, 20),
+                    customer=rng.randint(1, 500),
+                    city=rng.choice(CITIES),
+                    start=f"{year}-{month:02d}-01",
+                    end=f"{year}-{month:02d}-28",
+                    limit=rng.choice([5, 10, 20]),
+                )
+            )
+    return queries
+
+
+def run_inlined(database_path: str, queries: List[str]) -> float:
+    conn = _connect(database_path)
+    try:
+        started = time.perf_counter()
+        for query in queries:
+            conn.execute(query).fetchall()
+        return time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def run_templated(database_path: str, queries: List[str]) -> Tuple[float, float]:
+    """Returns (normalization seconds, execution seconds)."""
+    started = time.perf_counter()
+    normalized = [normalize_query.__wrapped__(query) for query in queries]  # unmemoized: all texts are distinct
+    normalizing = time.perf_counter() - started
+
+    conn = _connect(database_path)
+    registry = QueryTemplateRegistry()
+    try:
+        started = time.perf_counter()
+        for template, params in normalized:
+            began = time.perf_counter()
+            conn.execute(template, params).fetchall()
+            registry.record(template, (time.perf_counter() - began) * 1000)
+        executing = time.perf_counter() - started
+    finally:
+        conn.close()
+    for stats in registry.top(len(SHAPES)):
+        print(f"  {stats.hits:>7} hits {stats.avg_ms:>8.3f} ms avg  {stats.template[:90]}")
+    return normalizing, executing
+
+
+def _connect(database_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(
+        f"file:{database_path}?mode=ro", uri=True, cached_statements=config.SQL_STATEMENT_CACHE_SIZE
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare inlined-literal and templated query execution.")
+    parser.add_argument("--db", default=str(config.DB_PATH), help="SQLite database to query")
+    parser.add_argument("--rounds", type=int, default=1000, help="Executions of each query shape")
+    args = parser.parse_args(argv)
+
+    queries = make_queries(args.rounds)
+    per_query = lambda seconds: seconds / len(queries) * 1e6
+    inlined = run_inlined(args.db, queries)
+    normalizing, executing = run_templated(args.db, queries)
+    print(f"Database: {args.db}  ({len(queries)} queries, {len(SHAPES)} shapes)")
+    print(f"{'inlined literals':24}{per_query(inlined):>8.1f} us/query")
+    print(f"{'templates (execute)':24}{per_query(executing):>8.1f} us/query")
+    print(f"{'templates (normalize)':24}{per_query(normalizing):>8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark concurrent RAG retrievals: sync tool vs async tool with micro-batched embeddings.
+
+"sync" is the retrieval tool without its coroutine: `ainvoke` then runs the
+whole call, one query embedding per call, on LangChain's default executor.
+"async" is the tool as built by `create_database_retrieval_tool`: searches
+on the bounded retrieval pool and query embeddings micro-batched. Each
+concurrency level runs `--requests` retrievals with that many in flight.
+
+Without `--persist-dir` a temporary collection is built and queries are
+embedded by a fake model that spends the CPU time of a forward pass
+(`--call-ms` per call plus `--text-ms` per text) in matrix products. With
+`--persist-dir` the configured embedding model is used. The retrieval cache
+is disabled so every query is embedded.
+
+Usage:
+    python -m src.benchmarks.rag_concurrency_benchmark --concurrency 1 4 16 32
+    python -m src.benchmarks.rag_concurrency_benchmark --persist-dir db --collection my_rag_collection
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, List
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.tools import StructuredTool
+
+from src.utils import config
+from src.utils.metrics import metrics
+from src.agents.rag.rag_tools import create_database_retrieval_tool
+from src.agents.rag.vector_store import VectorStoreManager
+from src.benchmarks.rag_retrieval_benchmark import WORDS, build_collection
+
+
+class SimulatedCostEmbedding(DeterministicFakeEmbedding):
+    """Deterministic fake embeddings that cost as much CPU as a small CPU model."""
+
+    call_ms: float = 8.0
+    text_ms: float = 0.5
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Matrix products, like a forward pass: CPU-bound, mostly outside the GIL
+        block = np.ones((96, 96), dtype=np.float32)
+        deadline = time.thread_time() + (self.call_ms + self.text_ms * len(texts)) / 1000
+        while time.thread_time() < deadline:
+            block = block @ block / 96
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+async def run_level(tool: Any, queries: List[str], concurrency: int) -> List[float]:
+    """Latencies (ms) of all queries with `concurrency` retrievals in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query: str) -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            await tool.ainvoke({"query": query})
+            return (time.perf_counter() - started) * 1000
+
+    return await asyncio.gather(*(one(query) for query in queries))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare sync and async RAG retrieval under concurrency.")
+    parser.add_argument("--persist-dir", help="Existing Chroma directory (default: build a temporary one)")
+    parser.add_argument("--collection", default=config.COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--docs", type=int, default=2000, help="Synthetic documents in the temporary collection")
+    parser.add_argument("--requests", type=int, default=128, help="Retrievals per concurrency level and variant")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32], help="Retrievals in flight")
+    parser.add_argument("--call-ms", type=float, default=8.0, help="Simulated cost of one embedding call")
+    parser.add_argument("--text-ms", type=float, default=0.5, help="Simulated cost per embedded text")
+    args = parser.parse_args(argv)
+
+    config.RAG_CACHE_ENABLED = False
+    if args.persist_dir:
+        from src.utils.embeddings import get_embeddings
+
+        embeddings: Embeddings = get_embeddings()
+    else:
+        embeddings = SimulatedCostEmbedding(size=384, call_ms=args.call_ms, text_ms=args.text_ms)
+
+    rng = random.Random(5)
+    queries = [" ".join(rng.choices(WORDS, k=6)) for _ in range(args.requests)]
+    with tempfile.TemporaryDirectory() as tmp:
+        persist_dir = args.persist_dir or tmp
+        if not args.persist_dir:
+            build_collection(persist_dir, args.collection, DeterministicFakeEmbedding(size=384), args.docs)
+        manager = VectorStoreManager(persist_dir, args.collection, embeddings)
+        async_tool = create_database_retrieval_tool("mmr", vector_store_manager=manager)
+        sync_tool = StructuredTool.from_function(func=async_tool.func, name=async_tool.name)
+        sync_tool.invoke({"query": queries[0]})  # warm-up: first open
+
+        print(f"{args.requests} retrievals per level, {config.RAG_RETRIEVAL_WORKERS} retrieval workers")
+        print(f"{'variant':8}{'in flight':>10}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'batch':>7}")
+        for concurrency in args.concurrency:
+            for name, tool in (("sync", sync_tool), ("async", async_tool)):
+                metrics.reset()
+                started = time.perf_counter()
+                latencies = sorted(asyncio.run(run_level(tool, queries, concurrency)))
+                elapsed = time.perf_counter() - started
+                batch = metrics.get_observation("rag.query_embedding_batch_size")
+                print(
+                    f"{name:8}{concurrency:10}{len(queries) / elapsed:9.1f}{statistics.median(latencies):9.1f}"
+                    f"{latencies[int(len(latencies) * 0.9) - 1]:9.1f}{batch['mean'] if batch else 1.0:7.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark RAG context packing: prompt tokens, and optionally LLM latency, per answer.
+
+Without `--persist-dir`, synthetic manual pages are split with the ingestion
+chunk settings and the top `k` chunks per query are taken from a BM25 index
+over them. Overlapping neighbours share their terms, so the results include
+neighbouring chunks that repeat each other's text. With
+`--persist-dir` the configured embedding model and MMR over that collection
+are used instead. `--llm` also times an answer from the configured Groq model
+with the raw chunks and with the packed passages (requires GROQ_API_KEY).
+
+Usage:
+    python -m src.benchmarks.rag_context_packing_benchmark --queries 200
+    python -m src.benchmarks.rag_context_packing_benchmark --persist-dir db --llm --queries 10
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.utils import config
+from src.agents.rag.context_packing import estimate_tokens, format_passage, pack_context
+from src.agents.rag.keyword_index import KeywordIndex
+
+WORDS = (
+    "brake fluid reservoir level check engine oil coolant fuse box relay headlamp bulb tyre pressure wheel nut "
+    "torque clutch lever chain slack battery terminal spark plug air filter warranty service interval key mykey "
+    "seat belt airbag wiper blade washer mirror indicator horn ignition gear shift parking"
+).split()
+
+
+def synthetic_chunks(pages: int, seed: int = 13) -> List[Document]:
+    rng = random.Random(seed)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=config.RAG_CHUNK_SIZE, chunk_overlap=config.RAG_CHUNK_OVERLAP)
+    chunks: List[Document] = []
+    for page in range(pages):
+        topic = rng.sample(WORDS, 8)
+        sentences = [
+            " ".join(rng.choices(topic, k=4) + rng.choices(WORDS, k=rng.randint(6, 12))).capitalize() + "."
+            for _ in range(rng.randint(25, 45))
+        ]
+        document = Document(page_content=" ".join(sentences), metadata={"source": "manual.pdf", "page": page})
+        for chunk in splitter.split_documents([document]):
+            chunk.metadata["chunk_index"] = len(chunks)
+            chunk.id = f"manual.pdf:{len(chunks)}"
+            chunks.append(chunk)
+    return chunks
+
+
+def keyword_retriever(chunks: List[Document], directory: str, k: int) -> Callable[[str], List[Document]]:
+    index = KeywordIndex(Path(directory) / "bench.keywords.sqlite3")
+    index.upsert([c.id for c in chunks], [c.page_content for c in chunks], [c.metadata["source"] for c in chunks])
+    by_id = {chunk.id: chunk for chunk in chunks}
+    return lambda query: [by_id[chunk_id] for chunk_id, _ in index.search(query, k)]
+
+
+def vector_retriever(persist_dir: str, collection: str, k: int) -> Callable[[str], List[Document]]:
+    from src.agents.rag.vector_store import VectorStoreManager
+    from src.utils.embeddings import get_embeddings
+
+    manager = VectorStoreManager(persist_dir, collection, get_embeddings())
+    return lambda query: manager.get_vectorstore().max_marginal_relevance_search(query, k=k, fetch_k=50)
+
+
+def time_answer(llm, question: str, context: List[str]) -> float:
+    started = time.perf_counter()
+    llm.invoke(
+        "Context:\n\n" + "\n\n".join(context) + f"\n\nQuestion: {question}",
+        system_prompt="Answer the question from the vehicle manual context.",
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def describe(values: List[float]) -> str:
+    ordered = sorted(values)
+    return f"mean {statistics.mean(ordered):8.1f}   p90 {ordered[max(0, int(len(ordered) * 0.9) - 1)]:8.1f}"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure prompt tokens saved by RAG context packing.")
+    parser.add_argument("--persist-dir", help="Existing Chroma directory (default: synthetic chunks, BM25 retrieval)")
+    parser.add_argument("--collection", default=config.COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--pages", type=int, default=300, help="Synthetic manual pages")
+    parser.add_argument("--queries", type=int, default=200, help="Retrievals to pack")
+    parser.add_argument("--k", type=int, default=5, help="Chunks retrieved per query")
+    parser.add_argument("--budget", type=int, default=config.RAG_CONTEXT_TOKEN_BUDGET, help="Packing token budget")
+    parser.add_argument("--llm", action="store_true", help="Also time LLM answers with raw and packed context")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    queries = [" ".join(rng.sample(WORDS, 4)) for _ in range(args.queries)]
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.persist_dir:
+            retrieve = vector_retriever(args.persist_dir, args.collection, args.k)
+        else:
+            retrieve = keyword_retriever(synthetic_chunks(args.pages), tmp, args.k)
+
+        raw_tokens, packed_tokens, pack_ms, passages = [], [], [], []
+        raw_ms, packed_ms = [], []
+        llm = None
+        if args.llm:
+            from src.utils.llm_adapter import LLMAdapter
+
+            llm = LLMAdapter(model_name=config.GROQ_MODEL_NAME, temperature=0.0)
+        for query in queries:
+            docs = retrieve(query)
+            started = time.perf_counter()
+            packed, stats = pack_context(docs, token_budget=args.budget)
+            pack_ms.append((time.perf_counter() - started) * 1000)
+            raw_tokens.append(sum(estimate_tokens(doc.page_content) for doc in docs))
+            packed_tokens.append(stats.tokens_after)
+            passages.append(stats.passages)
+            if llm is not None:
+                raw_ms.append(time_answer(llm, query, [doc.page_content for doc in docs]))
+                packed_ms.append(time_answer(llm, query, [format_passage(passage) for passage in packed]))
+
+    print(f"{len(queries)} queries, k={args.k}, budget {args.budget} tokens")
+    print(f"{'raw tokens':18}{describe(raw_tokens)}")
+    print(f"{'packed tokens':18}{describe(packed_tokens)}")
+    print(f"{'saved':18}{1 - sum(packed_tokens) / max(1, sum(raw_tokens)):.1%}")
+    print(f"{'passages':18}mean {statistics.mean(passages):8.2f}")
+    print(f"{'pack ms':18}{describe(pack_ms)}")
+    if raw_ms:
+        print(f"{'LLM ms raw':18}{describe(raw_ms)}")
+        print(f"{'LLM ms packed':18}{describe(packed_ms)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark per-retrieval latency with a client per call vs the shared vector store.
+
+"per-call" reproduces the former retrieval tool: a new PersistentClient,
+Chroma wrapper and retriever for every query. "shared" goes through
+`VectorStoreManager`, which keeps them open. Without `--persist-dir` a
+temporary collection of synthetic documents is built first.
+
+Usage:
+    python -m src.benchmarks.rag_retrieval_benchmark --docs 5000 --queries 100
+    python -m src.benchmarks.rag_retrieval_benchmark --persist-dir db --collection my_rag_collection
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from src.utils import config
+from src.agents.rag.vector_store import VectorStoreManager, client_settings
+
+WORDS = (
+    "warranty service engine brake battery insurance finance loan emi test drive showroom delivery "
+    "registration mileage electric hybrid diesel petrol suv sedan hatchback discount exchange policy"
+).split()
+
+
+def build_collection(persist_dir: str, collection: str, embeddings: Embeddings, docs: int) -> None:
+    rng = random.Random(11)
+    documents = [
+        Document(page_content=" ".join(rng.choices(WORDS, k=60)), metadata={"source": f"doc-{i // 20}.pdf"})
+        for i in range(docs)
+    ]
+    client = chromadb.PersistentClient(path=persist_dir, settings=client_settings())
+    store = Chroma(client=client, embedding_function=embeddings, collection_name=collection)
+    for start in range(0, len(documents), 1000):
+        store.add_documents(documents[start : start + 1000])
+
+
+def retrieve_per_call(persist_dir: str, collection: str, embeddings: Embeddings) -> Callable[[str], List[str]]:
+    def retrieve(query: str) -> List[str]:
+        client = chromadb.PersistentClient(path=persist_dir, settings=client_settings())
+        vectorstore = Chroma(client=client, embedding_function=embeddings, collection_name=collection)
+        retriever = vectorstore.as_retriever(search_type="mmr", search_kwargs={"k": 5, "fetch_k": 50})
+        return [doc.page_content for doc in retriever.invoke(query)]
+
+    return retrieve
+
+
+def retrieve_shared(persist_dir: str, collection: str, embeddings: Embeddings) -> Callable[[str], List[str]]:
+    manager = VectorStoreManager(persist_dir, collection, embeddings, check_interval_s=config.RAG_STORE_CHECK_INTERVAL_S)
+
+    def retrieve(query: str) -> List[str]:
+        vectorstore = manager.get_vectorstore()
+        return [doc.page_content for doc in vectorstore.max_marginal_relevance_search(query, k=5, fetch_k=50)]
+
+    return retrieve
+
+
+def measure(retrieve: Callable[[str], List[str]], queries: List[str]) -> List[float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        retrieve(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare per-call and shared Chroma clients for RAG retrieval.")
+    parser.add_argument("--persist-dir", help="Existing Chroma directory (default: build a temporary one)")
+    parser.add_argument("--collection", default=config.COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--docs", type=int, default=2000, help="Synthetic documents in the temporary collection")
+    parser.add_argument("--queries", type=int, default=50, help="Retrievals per variant")
+    parser.add_argument(
+        "--fake-embeddings", action="store_true", help="Use deterministic fake embeddings instead of EMBEDDING_MODEL"
+    )
+    args = parser.parse_args(argv)
+
+    if args.fake_embeddings:
+        embeddings: Embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        from src.utils.embeddings import get_embeddings
+
+        embeddings = get_embeddings()
+
+    rng = random.Random(3)
+    queries = [" ".join(rng.choices(WORDS, k=6)) for _ in range(args.queries)]
+    with tempfile.TemporaryDirectory() as tmp:
+        persist_dir = args.persist_dir or tmp
+        if not args.persist_dir:
+            build_collection(persist_dir, args.collection, embeddings, args.docs)
+
+        print(f"Collection '{args.collection}' at {persist_dir}, {len(queries)} retrievals per variant")
+        for name, factory in (("per-call client", retrieve_per_call), ("shared client", retrieve_shared)):
+            retrieve = factory(persist_dir, args.collection, embeddings)
+            retrieve(queries[0])  # warm-up: model and first open
+            latencies = sorted(measure(retrieve, queries))
+            p90 = latencies[int(len(latencies) * 0.9) - 1]
+            print(f"{name:18}median {statistics.median(latencies):8.2f} ms   p90 {p90:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark concurrent analytical queries in-process vs in the SQL sandbox pool.
+
+In-process queries from several threads share one interpreter; the sandbox
+runs each in its own worker process, so concurrent queries use several
+cores. Use a large database from `src.data.showroom_data_generator`.
+
+Usage:
+    python -m src.benchmarks.sql_sandbox_benchmark --db src/db/showroom_management_scale.db --concurrency 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils import config
+from src.utils.sql_sandbox import SQLSandboxPool
+from src.utils.sqlite_profiles import create_sqlite_engine
+from src.benchmarks.sqlite_profiles_benchmark import WORKLOAD
+
+
+def run_in_process(database_path: str, concurrency: int, rounds: int) -> float:
+    engine = create_sqlite_engine(database_path, config.SQLITE_PROFILE, pool_size=concurrency)
+
+    def execute(sql: str) -> None:
+        with engine.connect() as conn:
+            conn.exec_driver_sql(sql).fetchall()
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(execute, list(WORKLOAD.values()) * rounds))
+        return time.perf_counter() - started
+    finally:
+        engine.dispose()
+
+
+def run_in_sandbox(database_path: str, concurrency: int, rounds: int) -> float:
+    sandbox = SQLSandboxPool(database_path, workers=concurrency, timeout_s=600, profile=config.SQLITE_PROFILE)
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda sql: sandbox.execute(sql, max_rows=100_000), list(WORKLOAD.values()) * rounds))
+        return time.perf_counter() - started
+    finally:
+        sandbox.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare in-process and sandboxed concurrent SQL execution.")
+    parser.add_argument("--db", default=str(config.DB_PATH), help="SQLite database to query")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent queries / sandbox workers")
+    parser.add_argument("--rounds", type=int, default=3, help="Times the workload is repeated")
+    args = parser.parse_args(argv)
+
+    queries = len(WORKLOAD) * args.rounds
+    in_process = run_in_process(args.db, args.concurrency, args.rounds)
+    sandboxed = run_in_sandbox(args.db, args.concurrency, args.rounds)
+    print(f"Database: {args.db}  ({queries} queries, concurrency {args.concurrency})")
+    print(f"{'in-process threads':22}{in_process:>10.2f} s")
+    print(f"{'sandbox workers':22}{sandboxed:>10.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark SQLite connection profiles on the showroom workload.
+
+Runs a fixed set of analytical queries (the kind the Text-to-SQL agent
+generates) through an engine configured with each profile and reports the
+first-run and median warm latency per profile. Use a large database from
+`src.data.showroom_data_generator` to see meaningful differences.
+
+Usage:
+    python -m src.benchmarks.sqlite_profiles_benchmark --db src/db/showroom_management_scale.db
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from src.utils import config
+from src.utils.sqlite_profiles import PROFILES, create_sqlite_engine
+
+WORKLOAD = {
+    "revenue_by_showroom": """
+        SELECT sh.showroom_name, SUM(s.final_amount) AS revenue
+        FROM sales s JOIN showrooms sh ON s.showroom_id = sh.showroom_id
+        GROUP BY sh.showroom_id ORDER BY revenue DESC""",
+    "sales_by_brand": """
+        SELECT v.brand, COUNT(*) AS units, SUM(s.final_amount) AS total
+        FROM sales s JOIN vehicles v ON s.vehicle_id = v.vehicle_id
+        GROUP BY v.brand""",
+    "monthly_revenue": """
+        SELECT strftime('%Y-%m', sale_date) AS month, SUM(final_amount) AS revenue
+        FROM sales GROUP BY month ORDER BY month""",
+    "top_salespeople": """
+        SELECT e.first_name, e.last_name, SUM(s.final_amount) AS revenue
+        FROM sales s JOIN employees e ON s.salesperson_id = e.employee_id
+        GROUP BY e.employee_id ORDER BY revenue DESC LIMIT 10""",
+    "service_cost_by_model": """
+        SELECT v.model_name, COUNT(*) AS services, SUM(sr.cost) AS total_cost
+        FROM service_records sr JOIN vehicles v ON sr.vehicle_id = v.vehicle_id
+        GROUP BY v.model_name ORDER BY total_cost DESC""",
+    "showroom_point_lookup": """
+        SELECT COUNT(*) FROM sales WHERE showroom_id = 7 AND sale_date >= '2024-01-01'""",
+}
+
+
+def run_profile(database_path: str, profile: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time every workload query with a fresh engine for `profile`."""
+    engine = create_sqlite_engine(database_path, profile)
+    results = {}
+    try:
+        with engine.connect() as conn:
+            for name, sql in WORKLOAD.items():
+                timings: List[float] = []
+                for _ in range(repeat + 1):
+                    started = time.perf_counter()
+                    conn.execute(text(sql)).fetchall()
+                    timings.append((time.perf_counter() - started) * 1000)
+                results[name] = {
+                    "first_ms": timings[0],
+                    "median_ms": statistics.median(timings[1:]),
+                }
+    finally:
+        engine.dispose()
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection profiles on the showroom workload.")
+    parser.add_argument("--db", default=str(config.DB_PATH), help="SQLite database to benchmark")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--repeat", type=int, default=5, help="Warm runs per query")
+    args = parser.parse_args(argv)
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    all_results = {p: run_profile(args.db, p, args.repeat) for p in profiles}
+
+    header = f"{'query':24}" + "".join(f"{p:>24}" for p in profiles)
+    print(f"Database: {args.db}  (first run / median of {args.repeat} warm runs, ms)")
+    print(header)
+    print("-" * len(header))
+    for name in WORKLOAD:
+        cells = "".join(
+            f"{all_results[p][name]['first_ms']:>11.1f} /{all_results[p][name]['median_ms']:>10.1f}"
+            for p in profiles
+        )
+        print(f"{name:24}{cells}")
+    totals = "".join(
+        f"{sum(r['median_ms'] for r in all_results[p].values()):>24.1f}" for p in profiles
+    )
+    print(f"{'total (median)':24}{totals}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark the text-to-SQL agent loop against the fast plan-then-execute mode.
+
+Runs the same questions through both modes with the configured LLM and
+reports latency, success rate, fallback rate and LLM calls per answer.
+Requires GROQ_API_KEY / GROQ_MODEL_NAME.
+
+Usage:
+    python -m src.benchmarks.text_to_sql_modes_benchmark --repeat 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+
+from src.utils import config
+from src.utils.metrics import metrics
+from src.agents.text_to_sql.text_to_sql_workflow import TextToSQLWorkflow
+
+QUESTIONS = [
+    "How many showrooms do we have in each city?",
+    "What is the average sale price of Ford vehicles?",
+    "Which vehicle model has the highest total sales revenue?",
+    "List the employees working at Royal Enfield showrooms in Pune.",
+    "How many test drives were cancelled?",
+    "What is the total amount spent on marketing across all showrooms?",
+    "Which customers bought more than one vehicle?",
+    "What is the average commission rate of sales executives?",
+]
+
+
+async def run_mode(workflow: TextToSQLWorkflow, mode: str, questions: List[str], repeat: int) -> Dict[str, Any]:
+    """Run every question `repeat` times in one mode and summarise the outcomes."""
+    metrics.reset()
+    latencies, iterations, successes = [], [], 0
+    for _ in range(repeat):
+        for question in questions:
+            started = time.perf_counter()
+            result = await workflow.run_query(question, mode=mode)
+            latencies.append(time.perf_counter() - started)
+            if result.get("success") and not str(result.get("response", "")).startswith("Error"):
+                successes += 1
+            if result.get("iterations"):
+                iterations.append(result["iterations"])
+
+    runs = len(questions) * repeat
+    fallbacks = metrics.get_counter("text_to_sql.fast_mode", outcome="fallback")
+    return {
+        "runs": runs,
+        "success_rate": successes / runs,
+        "fallback_rate": fallbacks / runs,
+        "median_s": statistics.median(latencies),
+        "p90_s": sorted(latencies)[int(0.9 * (len(latencies) - 1))],
+        "mean_llm_calls": statistics.mean(iterations) if iterations else float("nan"),
+    }
+
+
+async def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare text-to-SQL agent and fast modes.")
+    parser.add_argument("--db", default=str(config.DB_PATH), help="SQLite database to query")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per question and mode")
+    args = parser.parse_args(argv)
+
+    workflow = TextToSQLWorkflow(args.db)
+    results = {mode: await run_mode(workflow, mode, QUESTIONS, args.repeat) for mode in ("agent", "fast")}
+
+    print(f"{'metric':18}{'agent':>12}{'fast':>12}")
+    for key in ("runs", "success_rate", "fallback_rate", "median_s", "p90_s", "mean_llm_calls"):
+        print(f"{key:18}" + "".join(f"{results[m][key]:>12.2f}" for m in ("agent", "fast")))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
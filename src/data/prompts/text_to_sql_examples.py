@@ -0,0 +1,45 @@
+"""
+Curated (question, SQL) examples for the Text-to-SQL agent.
+
+These seed the few-shot example store; the most similar ones are injected
+into the prompt so the agent can reuse known join paths instead of
+rediscovering them through tool calls.
+"""
+
+examples = [
+    {"question": "How many customers do we have?", "sql": "SELECT COUNT(*) AS total_customers FROM customers;"},
+    {"question": "What is the total revenue of each showroom?",
+     "sql": "SELECT sh.showroom_name, SUM(s.final_amount) AS total_revenue FROM sales s JOIN showrooms sh ON s.showroom_id = sh.showroom_id GROUP BY sh.showroom_id, sh.showroom_name ORDER BY total_revenue DESC;"},
+    {"question": "Which vehicle models were sold at the Ford Downtown showroom?",
+     "sql": "SELECT DISTINCT v.brand, v.model_name, v.variant FROM sales s JOIN showrooms sh ON s.showroom_id = sh.showroom_id JOIN vehicles v ON s.vehicle_id = v.vehicle_id WHERE sh.showroom_name = 'Ford Downtown';"},
+    {"question": "Total sales amount by vehicle brand",
+     "sql": "SELECT v.brand, COUNT(*) AS units_sold, SUM(s.final_amount) AS total_sales FROM sales s JOIN vehicles v ON s.vehicle_id = v.vehicle_id GROUP BY v.brand;"},
+    {"question": "Who are the top 5 salespeople by revenue?",
+     "sql": "SELECT e.first_name, e.last_name, sh.showroom_name, SUM(s.final_amount) AS revenue FROM sales s JOIN employees e ON s.salesperson_id = e.employee_id JOIN showrooms sh ON e.showroom_id = sh.showroom_id GROUP BY e.employee_id ORDER BY revenue DESC LIMIT 5;"},
+    {"question": "Which showrooms have vehicles below their reorder level?",
+     "sql": "SELECT sh.showroom_name, v.model_name, i.available_quantity, i.reorder_level FROM inventory i JOIN showrooms sh ON i.showroom_id = sh.showroom_id JOIN vehicles v ON i.vehicle_id = v.vehicle_id WHERE i.available_quantity < i.reorder_level;"},
+    {"question": "How much stock of each Royal Enfield model is available across showrooms?",
+     "sql": "SELECT v.model_name, v.variant, SUM(i.available_quantity) AS available FROM inventory i JOIN vehicles v ON i.vehicle_id = v.vehicle_id WHERE v.brand = 'Royal Enfield' GROUP BY v.vehicle_id ORDER BY available DESC;"},
+    {"question": "List customers who bought a car along with the model they bought",
+     "sql": "SELECT c.first_name, c.last_name, v.brand, v.model_name, s.sale_date FROM sales s JOIN customers c ON s.customer_id = c.customer_id JOIN vehicles v ON s.vehicle_id = v.vehicle_id WHERE v.vehicle_type = 'Car';"},
+    {"question": "What percentage of test drives converted to a sale per vehicle model?",
+     "sql": "SELECT v.model_name, COUNT(*) AS test_drives, ROUND(100.0 * SUM(td.converted_to_sale) / COUNT(*), 2) AS conversion_pct FROM test_drives td JOIN vehicles v ON td.vehicle_id = v.vehicle_id GROUP BY v.model_name ORDER BY conversion_pct DESC;"},
+    {"question": "Monthly sales revenue for the last 12 months",
+     "sql": "SELECT strftime('%Y-%m', sale_date) AS month, SUM(final_amount) AS revenue FROM sales WHERE sale_date >= date('now', '-12 months') GROUP BY month ORDER BY month;"},
+    {"question": "Total expenses of each showroom by category",
+     "sql": "SELECT sh.showroom_name, ex.expense_category, SUM(ex.amount) AS total_amount FROM expenses ex JOIN showrooms sh ON ex.showroom_id = sh.showroom_id GROUP BY sh.showroom_name, ex.expense_category ORDER BY sh.showroom_name, total_amount DESC;"},
+    {"question": "Which employees achieved their sales targets?",
+     "sql": "SELECT e.first_name, e.last_name, t.target_period, t.target_type, t.target_value, t.achieved_value FROM targets t JOIN employees e ON t.employee_id = e.employee_id WHERE t.achieved_value >= t.target_value;"},
+    {"question": "Which showroom made the most profit (sales minus expenses)?",
+     "sql": "SELECT sh.showroom_name, COALESCE(s.revenue, 0) - COALESCE(ex.total_expenses, 0) AS profit FROM showrooms sh LEFT JOIN (SELECT showroom_id, SUM(final_amount) AS revenue FROM sales GROUP BY showroom_id) s ON s.showroom_id = sh.showroom_id LEFT JOIN (SELECT showroom_id, SUM(amount) AS total_expenses FROM expenses GROUP BY showroom_id) ex ON ex.showroom_id = sh.showroom_id ORDER BY profit DESC LIMIT 1;"},
+    {"question": "How many sales were made in each city?",
+     "sql": "SELECT sh.city, COUNT(s.sale_id) AS total_sales FROM showrooms sh LEFT JOIN sales s ON s.showroom_id = sh.showroom_id GROUP BY sh.city ORDER BY total_sales DESC;"},
+    {"question": "Which employees were hired in August?",
+     "sql": "SELECT first_name, last_name, position, hire_date FROM employees WHERE strftime('%m', hire_date) = '08';"},
+    {"question": "What is the total service cost per vehicle model?",
+     "sql": "SELECT v.model_name, COUNT(sr.service_id) AS services, SUM(sr.cost) AS total_cost FROM service_records sr JOIN vehicles v ON sr.vehicle_id = v.vehicle_id GROUP BY v.model_name ORDER BY total_cost DESC;"},
+    {"question": "Average discount given by payment method",
+     "sql": "SELECT payment_method, COUNT(*) AS sales, ROUND(AVG(discount_amount), 2) AS avg_discount FROM sales GROUP BY payment_method;"},
+    {"question": "Who manages the showrooms in Mumbai?",
+     "sql": "SELECT showroom_name, brand, manager_name, phone FROM showrooms WHERE city = 'Mumbai';"},
+]
@@ -0,0 +1,663 @@
+"""
+Synthetic showroom data generator for load and scale testing.
+
+Creates the same 10-table schema as `src/Notebooks/Text_To_SQL.ipynb`, but
+generates rows column-wise with NumPy and bulk-loads them with `executemany`
+inside large transactions, so tens of millions of `sales` / `service_records`
+rows can be produced in minutes. Output is fully determined by the seed and
+the batch size. Secondary indexes are built after the data is loaded.
+
+Usage:
+    python -m src.data.showroom_data_generator --output scale.db --sales 10000000 --service-records 5000000
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from src.utils import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+SCHEMA = [
+    """
+    CREATE TABLE showrooms (
+        showroom_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        showroom_name TEXT NOT NULL,
+        brand TEXT NOT NULL,
+        address TEXT NOT NULL,
+        city TEXT NOT NULL,
+        state TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        email TEXT NOT NULL,
+        manager_name TEXT NOT NULL,
+        opening_date DATE,
+        status TEXT DEFAULT 'Active'
+    )""",
+    """
+    CREATE TABLE vehicles (
+        vehicle_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        brand TEXT NOT NULL,
+        model_name TEXT NOT NULL,
+        variant TEXT,
+        vehicle_type TEXT NOT NULL,
+        engine_capacity TEXT,
+        fuel_type TEXT,
+        transmission TEXT,
+        color_options TEXT,
+        base_price REAL NOT NULL,
+        launch_date DATE,
+        status TEXT DEFAULT 'Active'
+    )""",
+    """
+    CREATE TABLE customers (
+        customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        phone TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE,
+        address TEXT,
+        city TEXT,
+        state TEXT,
+        date_of_birth DATE,
+        registration_date DATE DEFAULT CURRENT_DATE,
+        customer_type TEXT DEFAULT 'New'
+    )""",
+    """
+    CREATE TABLE employees (
+        employee_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        showroom_id INTEGER,
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        position TEXT NOT NULL,
+        phone TEXT,
+        email TEXT,
+        hire_date DATE,
+        salary REAL,
+        commission_rate REAL DEFAULT 0.02,
+        status TEXT DEFAULT 'Active',
+        FOREIGN KEY (showroom_id) REFERENCES showrooms (showroom_id)
+    )""",
+    """
+    CREATE TABLE inventory (
+        inventory_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        showroom_id INTEGER,
+        vehicle_id INTEGER,
+        stock_quantity INTEGER DEFAULT 0,
+        reserved_quantity INTEGER DEFAULT 0,
+        available_quantity INTEGER DEFAULT 0,
+        reorder_level INTEGER DEFAULT 5,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (showroom_id) REFERENCES showrooms (showroom_id),
+        FOREIGN KEY (vehicle_id) REFERENCES vehicles (vehicle_id)
+    )""",
+    """
+    CREATE TABLE sales (
+        sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        showroom_id INTEGER,
+        customer_id INTEGER,
+        vehicle_id INTEGER,
+        salesperson_id INTEGER,
+        sale_date DATE,
+        sale_price REAL,
+        discount_amount REAL DEFAULT 0,
+        final_amount REAL,
+        payment_method TEXT,
+        delivery_date DATE,
+        sale_status TEXT DEFAULT 'Completed',
+        FOREIGN KEY (showroom_id) REFERENCES showrooms (showroom_id),
+        FOREIGN KEY (customer_id) REFERENCES customers (customer_id),
+        FOREIGN KEY (vehicle_id) REFERENCES vehicles (vehicle_id),
+        FOREIGN KEY (salesperson_id) REFERENCES employees (employee_id)
+    )""",
+    """
+    CREATE TABLE test_drives (
+        test_drive_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        vehicle_id INTEGER,
+        showroom_id INTEGER,
+        scheduled_date DATE,
+        scheduled_time TIME,
+        duration INTEGER DEFAULT 30,
+        status TEXT DEFAULT 'Scheduled',
+        feedback TEXT,
+        converted_to_sale BOOLEAN DEFAULT 0,
+        FOREIGN KEY (customer_id) REFERENCES customers (customer_id),
+        FOREIGN KEY (vehicle_id) REFERENCES vehicles (vehicle_id),
+        FOREIGN KEY (showroom_id) REFERENCES showrooms (showroom_id)
+    )""",
+    """
+    CREATE TABLE service_records (
+        service_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        vehicle_id INTEGER,
+        showroom_id INTEGER,
+        service_date DATE,
+        service_type TEXT,
+        description TEXT,
+        cost REAL,
+        technician_id INTEGER,
+        next_service_due DATE,
+        FOREIGN KEY (customer_id) REFERENCES customers (customer_id),
+        FOREIGN KEY (vehicle_id) REFERENCES vehicles (vehicle_id),
+        FOREIGN KEY (showroom_id) REFERENCES showrooms (showroom_id),
+        FOREIGN KEY (technician_id) REFERENCES employees (employee_id)
+    )""",
+    """
+    CREATE TABLE expenses (
+        expense_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        showroom_id INTEGER,
+        expense_category TEXT,
+        description TEXT,
+        amount REAL,
+        expense_date DATE,
+        approved_by TEXT,
+        receipt_number TEXT,
+        FOREIGN KEY (showroom_id) REFERENCES showrooms (showroom_id)
+    )""",
+    """
+    CREATE TABLE targets (
+        target_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        showroom_id INTEGER,
+        employee_id INTEGER,
+        target_period TEXT,
+        target_type TEXT,
+        target_value REAL,
+        achieved_value REAL DEFAULT 0,
+        start_date DATE,
+        end_date DATE,
+        FOREIGN KEY (showroom_id) REFERENCES showrooms (showroom_id),
+        FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
+    )""",
+]
+
+# Built after loading: maintaining them row by row during the load is far slower
+INDEXES = [
+    "CREATE INDEX idx_employees_showroom ON employees (showroom_id)",
+    "CREATE INDEX idx_inventory_showroom_vehicle ON inventory (showroom_id, vehicle_id)",
+    "CREATE INDEX idx_sales_showroom_date ON sales (showroom_id, sale_date)",
+    "CREATE INDEX idx_sales_vehicle ON sales (vehicle_id)",
+    "CREATE INDEX idx_sales_customer ON sales (customer_id)",
+    "CREATE INDEX idx_sales_salesperson ON sales (salesperson_id)",
+    "CREATE INDEX idx_sales_date ON sales (sale_date)",
+    "CREATE INDEX idx_test_drives_vehicle ON test_drives (vehicle_id)",
+    "CREATE INDEX idx_test_drives_showroom ON test_drives (showroom_id)",
+    "CREATE INDEX idx_service_records_showroom_date ON service_records (showroom_id, service_date)",
+    "CREATE INDEX idx_service_records_vehicle ON service_records (vehicle_id)",
+    "CREATE INDEX idx_service_records_customer ON service_records (customer_id)",
+    "CREATE INDEX idx_expenses_showroom_date ON expenses (showroom_id, expense_date)",
+    "CREATE INDEX idx_targets_employee ON targets (employee_id)",
+]
+
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256 MB
+    "PRAGMA foreign_keys = OFF",
+]
+
+# Reference data (same catalogue as the notebook)
+BRANDS = ["Ford", "Royal Enfield"]
+CITIES = [
+    ("Mumbai", "Maharashtra"), ("Delhi", "Delhi"), ("Bangalore", "Karnataka"),
+    ("Chennai", "Tamil Nadu"), ("Hyderabad", "Telangana"), ("Pune", "Maharashtra"),
+    ("Ahmedabad", "Gujarat"), ("Kolkata", "West Bengal"), ("Jaipur", "Rajasthan"),
+    ("Indore", "Madhya Pradesh"),
+]
+FIRST_NAMES = [
+    "Rahul", "Priya", "Amit", "Sneha", "Vikram", "Kavya", "Arjun", "Neha", "Rohit", "Anita",
+    "Sanjay", "Deepika", "Manoj", "Shreya", "Karan", "Pooja", "Gaurav", "Ritika", "Abhishek", "Ravi",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Kumar", "Singh", "Agarwal", "Gupta", "Joshi", "Mehta", "Reddy", "Nair",
+    "Tiwari", "Desai", "Banerjee", "Ghosh", "Jain", "Pandey", "Rao", "Iyer", "Chopra", "Malhotra",
+]
+VEHICLES = [
+    ("Ford", "EcoSport", "Titanium", "Car", "1.5L", "Petrol", "Manual", "White, Black, Silver, Red", 1150000, "2021-01-15", "Active"),
+    ("Ford", "EcoSport", "Titanium Plus", "Car", "1.5L", "Petrol", "Automatic", "White, Black, Silver, Blue", 1280000, "2021-01-15", "Active"),
+    ("Ford", "Figo", "Titanium", "Car", "1.2L", "Petrol", "Manual", "White, Silver, Red, Blue", 750000, "2020-08-20", "Active"),
+    ("Ford", "Figo", "Titanium Plus", "Car", "1.2L", "Petrol", "Automatic", "White, Silver, Black, Red", 850000, "2020-08-20", "Active"),
+    ("Ford", "Aspire", "Titanium", "Car", "1.2L", "Petrol", "Manual", "White, Black, Silver, Gold", 950000, "2021-03-10", "Active"),
+    ("Ford", "Aspire", "Titanium Plus", "Car", "1.5L", "Diesel", "Manual", "White, Black, Silver, Blue", 1080000, "2021-03-10", "Active"),
+    ("Ford", "Endeavour", "Titanium", "Car", "2.0L", "Diesel", "Automatic", "White, Black, Silver, Brown", 3500000, "2020-11-05", "Active"),
+    ("Ford", "Endeavour", "Titanium Plus", "Car", "3.2L", "Diesel", "Automatic", "White, Black, Silver, Blue", 3800000, "2020-11-05", "Active"),
+    ("Ford", "Freestyle", "Titanium", "Car", "1.2L", "Petrol", "Manual", "White, Silver, Red, Orange", 820000, "2022-01-12", "Active"),
+    ("Ford", "Mustang", "GT", "Car", "5.0L", "Petrol", "Automatic", "Red, Black, White, Yellow", 7500000, "2021-12-01", "Active"),
+    ("Royal Enfield", "Classic 350", "Standard", "Bike", "349cc", "Petrol", "Manual", "Black, Chrome, Desert Storm", 180000, "2019-05-15", "Active"),
+    ("Royal Enfield", "Classic 350", "Halcyon", "Bike", "349cc", "Petrol", "Manual", "Black, Green, Maroon", 185000, "2020-02-28", "Active"),
+    ("Royal Enfield", "Bullet 350", "Standard", "Bike", "346cc", "Petrol", "Manual", "Black, Silver, Royal Blue", 165000, "2021-07-20", "Active"),
+    ("Royal Enfield", "Himalayan", "Standard", "Bike", "411cc", "Petrol", "Manual", "Granite Black, Snow White, Rock Red", 210000, "2020-09-18", "Active"),
+    ("Royal Enfield", "Interceptor 650", "Standard", "Bike", "648cc", "Petrol", "Manual", "Orange Crush, Baker Express, Ventura Storm", 290000, "2022-04-10", "Active"),
+    ("Royal Enfield", "Continental GT 650", "Standard", "Bike", "648cc", "Petrol", "Manual", "Ventura Storm, Mr. Clean, Ice Queen", 310000, "2021-01-25", "Active"),
+    ("Royal Enfield", "Meteor 350", "Fireball", "Bike", "349cc", "Petrol", "Manual", "Fireball Red, Fireball Yellow", 195000, "2020-10-30", "Active"),
+    ("Royal Enfield", "Meteor 350", "Stellar", "Bike", "349cc", "Petrol", "Manual", "Stellar Black, Stellar Blue", 200000, "2022-02-14", "Active"),
+    ("Royal Enfield", "Hunter 350", "Retro", "Bike", "349cc", "Petrol", "Manual", "Rebel Black, Rebel Blue, Rebel Red", 175000, "2021-11-08", "Active"),
+    ("Royal Enfield", "Scram 411", "Standard", "Bike", "411cc", "Petrol", "Manual", "Graphite Red, Graphite Blue, Graphite Yellow", 205000, "2021-05-20", "Active"),
+]
+POSITIONS = ["Sales Executive", "Service Advisor", "Technician", "Sales Manager", "Service Manager", "Cashier", "Receptionist"]
+SALARY_RANGES = np.array([
+    (25000, 35000), (30000, 40000), (20000, 30000), (45000, 60000), (50000, 65000), (20000, 25000), (18000, 25000),
+])
+PAYMENT_METHODS = ["Cash", "Card", "Bank Transfer", "Finance", "Cheque"]
+SALE_STATUSES = ["Completed", "Pending", "Delivered"]
+TEST_DRIVE_STATUSES = ["Scheduled", "Completed", "Cancelled"]
+TEST_DRIVE_TIMES = ["09:00", "10:30", "14:00", "16:30"]
+TEST_DRIVE_FEEDBACK = [
+    "Smooth ride and comfortable seating",
+    "Loved the pickup, but the price is on the higher side",
+    "Brakes felt spongy at low speed",
+    "Great handling on the highway, cabin noise is noticeable",
+    "Customer wants to compare with a competitor before deciding",
+    "Very impressed with the infotainment system",
+    "Clutch is heavy in city traffic",
+    "Excellent mileage claims, wants a second test drive",
+]
+SERVICE_TYPES = ["Periodic Maintenance", "Oil Change", "Brake Service", "Tyre Replacement", "Battery Replacement", "Accident Repair", "Warranty Repair"]
+SERVICE_BASE_COST = np.array([4500, 2500, 3500, 12000, 6000, 25000, 0])
+SERVICE_DESCRIPTIONS = [
+    "Engine oil and filter replaced, general inspection done",
+    "Front brake pads replaced and brake fluid topped up",
+    "Wheel alignment and balancing performed",
+    "Battery terminals cleaned, battery replaced under warranty",
+    "Clutch plate adjusted and chain lubricated",
+    "Minor dent repair and paint touch-up on rear bumper",
+    "Air filter cleaned, spark plug replaced",
+    "Coolant flushed and AC gas recharged",
+]
+EXPENSE_CATEGORIES = ["Rent", "Utilities", "Marketing", "Maintenance", "Salaries", "Insurance"]
+TARGET_PERIODS = ["Monthly", "Quarterly", "Yearly"]
+TARGET_TYPES = ["Sales", "Revenue"]
+
+START_DATE = np.datetime64("2019-01-01")
+END_DATE = np.datetime64("2025-12-31")
+
+Rows = List[Tuple]
+
+
+def _pick(rng: np.random.Generator, values: Sequence, n: int) -> np.ndarray:
+    """Vectorised random choice from a small list of values."""
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def _dates(rng: np.random.Generator, n: int, start=START_DATE, end=END_DATE) -> np.ndarray:
+    """Uniform random ISO dates in [start, end]."""
+    days = int((end - start).astype(int)) + 1
+    return start + rng.integers(0, days, n).astype("timedelta64[D]")
+
+
+def _iso(dates: np.ndarray) -> List[str]:
+    return np.datetime_as_string(dates, unit="D").tolist()
+
+
+def _join(*parts) -> np.ndarray:
+    """Element-wise string concatenation of arrays and scalars."""
+    result = np.asarray(parts[0]).astype(str)
+    for part in parts[1:]:
+        result = np.char.add(result, np.asarray(part).astype(str))
+    return result
+
+
+def _rows(*columns) -> Rows:
+    """Turn column arrays into the list of tuples `executemany` expects."""
+    return list(zip(*[c.tolist() if isinstance(c, np.ndarray) else c for c in columns]))
+
+
+class ShowroomDataGenerator:
+    """Column-wise generator for every table of the showroom schema."""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        showrooms: int = 20,
+        customers: int = 10_000,
+        employees: int = 400,
+        sales: int = 100_000,
+        test_drives: int = 50_000,
+        service_records: int = 100_000,
+        expenses: int = 20_000,
+        targets: int = 2_000,
+        batch_size: int = 200_000,
+    ):
+        if employees < showrooms:
+            raise ValueError("Need at least one employee per showroom")
+        self.rng = np.random.default_rng(seed)
+        self.counts = {
+            "showrooms": showrooms,
+            "vehicles": len(VEHICLES),
+            "customers": customers,
+            "employees": employees,
+            "sales": sales,
+            "test_drives": test_drives,
+            "service_records": service_records,
+            "expenses": expenses,
+            "targets": targets,
+        }
+        self.batch_size = batch_size
+
+        # Showroom i has brand i % 2; employee e works at showroom ((e - 1) % S) + 1,
+        # so picking a colleague for a showroom is pure arithmetic.
+        self.showroom_brand = np.arange(showrooms) % len(BRANDS)
+        self.vehicle_brand = np.array([BRANDS.index(v[0]) for v in VEHICLES])
+        self.vehicle_price = np.array([v[8] for v in VEHICLES], dtype=np.float64)
+        self.brand_vehicles = [np.flatnonzero(self.vehicle_brand == b) + 1 for b in range(len(BRANDS))]
+        self.staff_per_showroom = employees // showrooms
+
+    # -- helpers -------------------------------------------------------------
+
+    def _showroom_ids(self, n: int) -> np.ndarray:
+        return self.rng.integers(1, self.counts["showrooms"] + 1, n)
+
+    def _vehicles_for(self, showroom_ids: np.ndarray) -> np.ndarray:
+        """A vehicle of the showroom's own brand for every showroom id."""
+        brands = self.showroom_brand[showroom_ids - 1]
+        vehicles = np.empty(len(showroom_ids), dtype=np.int64)
+        for b, candidates in enumerate(self.brand_vehicles):
+            mask = brands == b
+            vehicles[mask] = candidates[self.rng.integers(0, len(candidates), int(mask.sum()))]
+        return vehicles
+
+    def _staff_for(self, showroom_ids: np.ndarray) -> np.ndarray:
+        """An employee working at each given showroom."""
+        slot = self.rng.integers(0, self.staff_per_showroom, len(showroom_ids))
+        return showroom_ids + slot * self.counts["showrooms"]
+
+    def _chunks(self, table: str) -> Iterator[Tuple[int, int]]:
+        total = self.counts[table]
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    # -- tables --------------------------------------------------------------
+
+    def showrooms(self) -> Iterator[Rows]:
+        n = self.counts["showrooms"]
+        ids = np.arange(1, n + 1)
+        city_idx = (np.arange(n) // len(BRANDS)) % len(CITIES)
+        brands = np.asarray(BRANDS, dtype=object)[self.showroom_brand]
+        cities = np.array([c for c, _ in CITIES], dtype=object)[city_idx]
+        states = np.array([s for _, s in CITIES], dtype=object)[city_idx]
+        managers = _join(_pick(self.rng, FIRST_NAMES, n), " ", _pick(self.rng, LAST_NAMES, n))
+        yield _rows(
+            _join(brands, " ", cities, " ", ids),
+            brands,
+            _join(self.rng.integers(1, 999, n), " Main Road"),
+            cities,
+            states,
+            _join("+91-", 7000000000 + ids),
+            _join("showroom", ids, "@example.com"),
+            managers,
+            _iso(_dates(self.rng, n, np.datetime64("2015-01-01"), np.datetime64("2022-12-31"))),
+            ["Active"] * n,
+        )
+
+    def vehicles(self) -> Iterator[Rows]:
+        yield list(VEHICLES)
+
+    def customers(self) -> Iterator[Rows]:
+        for start, n in self._chunks("customers"):
+            ids = np.arange(start + 1, start + n + 1)
+            first = _pick(self.rng, FIRST_NAMES, n)
+            last = _pick(self.rng, LAST_NAMES, n)
+            city_idx = self.rng.integers(0, len(CITIES), n)
+            yield _rows(
+                first,
+                last,
+                _join("+91-", 9000000000 + ids),
+                _join(np.char.lower(first.astype(str)), ".", np.char.lower(last.astype(str)), ids, "@email.com"),
+                _join(self.rng.integers(100, 999, n), " Street, Area ", self.rng.integers(1, 50, n)),
+                np.array([c for c, _ in CITIES], dtype=object)[city_idx],
+                np.array([s for _, s in CITIES], dtype=object)[city_idx],
+                _iso(_dates(self.rng, n, np.datetime64("1960-01-01"), np.datetime64("2005-12-31"))),
+                _iso(_dates(self.rng, n)),
+                _pick(self.rng, ["New", "Returning"], n),
+            )
+
+    def employees(self) -> Iterator[Rows]:
+        for start, n in self._chunks("employees"):
+            ids = np.arange(start + 1, start + n + 1)
+            position_idx = self.rng.integers(0, len(POSITIONS), n)
+            low, high = SALARY_RANGES[position_idx, 0], SALARY_RANGES[position_idx, 1]
+            yield _rows(
+                (ids - 1) % self.counts["showrooms"] + 1,
+                _pick(self.rng, FIRST_NAMES, n),
+                _pick(self.rng, LAST_NAMES, n),
+                np.asarray(POSITIONS, dtype=object)[position_idx],
+                _join("+91-", 8000000000 + ids),
+                _join("employee", ids, "@company.com"),
+                _iso(_dates(self.rng, n, np.datetime64("2015-01-01"))),
+                self.rng.integers(low, high + 1).astype(np.float64),
+                np.round(self.rng.uniform(0.01, 0.05, n), 3),
+                _pick(self.rng, ["Active"] * 9 + ["Inactive"], n),
+            )
+
+    def inventory(self) -> Iterator[Rows]:
+        # One row per (showroom, vehicle of the showroom's brand)
+        pairs = [
+            (s + 1, int(v))
+            for s in range(self.counts["showrooms"])
+            for v in self.brand_vehicles[self.showroom_brand[s]]
+        ]
+        n = len(pairs)
+        self.counts["inventory"] = n
+        stock = self.rng.integers(5, 51, n)
+        reserved = self.rng.integers(0, 6, n)
+        yield _rows(
+            np.array([p[0] for p in pairs]),
+            np.array([p[1] for p in pairs]),
+            stock,
+            reserved,
+            stock - reserved,
+            self.rng.integers(3, 11, n),
+            _join(_iso(_dates(self.rng, n, np.datetime64("2025-01-01"))), " 10:00:00"),
+        )
+
+    def sales(self) -> Iterator[Rows]:
+        for _, n in self._chunks("sales"):
+            showroom_ids = self._showroom_ids(n)
+            vehicle_ids = self._vehicles_for(showroom_ids)
+            price = np.round(self.vehicle_price[vehicle_ids - 1] * self.rng.normal(1.0, 0.03, n), 0)
+            discount = np.round(price * self.rng.uniform(0.0, 0.05, n), 0)
+            sale_dates = _dates(self.rng, n)
+            yield _rows(
+                showroom_ids,
+                self.rng.integers(1, self.counts["customers"] + 1, n),
+                vehicle_ids,
+                self._staff_for(showroom_ids),
+                _iso(sale_dates),
+                price,
+                discount,
+                price - discount,
+                _pick(self.rng, PAYMENT_METHODS, n),
+                _iso(sale_dates + self.rng.integers(7, 31, n).astype("timedelta64[D]")),
+                _pick(self.rng, SALE_STATUSES, n),
+            )
+
+    def test_drives(self) -> Iterator[Rows]:
+        for _, n in self._chunks("test_drives"):
+            showroom_ids = self._showroom_ids(n)
+            feedback = _pick(self.rng, TEST_DRIVE_FEEDBACK, n)
+            feedback[self.rng.random(n) < 0.4] = None
+            yield _rows(
+                self.rng.integers(1, self.counts["customers"] + 1, n),
+                self._vehicles_for(showroom_ids),
+                showroom_ids,
+                _iso(_dates(self.rng, n)),
+                _pick(self.rng, TEST_DRIVE_TIMES, n),
+                _pick(self.rng, [30, 45, 60], n),
+                _pick(self.rng, TEST_DRIVE_STATUSES, n),
+                feedback,
+                (self.rng.random(n) < 0.3).astype(np.int64),
+            )
+
+    def service_records(self) -> Iterator[Rows]:
+        for _, n in self._chunks("service_records"):
+            showroom_ids = self._showroom_ids(n)
+            type_idx = self.rng.integers(0, len(SERVICE_TYPES), n)
+            service_dates = _dates(self.rng, n)
+            cost = np.round(SERVICE_BASE_COST[type_idx] * self.rng.uniform(0.8, 1.5, n), 2)
+            yield _rows(
+                self.rng.integers(1, self.counts["customers"] + 1, n),
+                self._vehicles_for(showroom_ids),
+                showroom_ids,
+                _iso(service_dates),
+                np.asarray(SERVICE_TYPES, dtype=object)[type_idx],
+                _pick(self.rng, SERVICE_DESCRIPTIONS, n),
+                cost,
+                self._staff_for(showroom_ids),
+                _iso(service_dates + np.timedelta64(180, "D")),
+            )
+
+    def expenses(self) -> Iterator[Rows]:
+        for start, n in self._chunks("expenses"):
+            category = _pick(self.rng, EXPENSE_CATEGORIES, n)
+            yield _rows(
+                self._showroom_ids(n),
+                category,
+                _join(category, " expense"),
+                self.rng.integers(5000, 100001, n).astype(np.float64),
+                _iso(_dates(self.rng, n)),
+                _join("Manager", self.rng.integers(1, 6, n)),
+                _join("RCP", np.arange(start + 1, start + n + 1) + 1000),
+            )
+
+    def targets(self) -> Iterator[Rows]:
+        for _, n in self._chunks("targets"):
+            employee_ids = self.rng.integers(1, self.counts["employees"] + 1, n)
+            target = self.rng.integers(100000, 5000001, n).astype(np.float64)
+            year = self.rng.integers(2019, 2026, n)
+            yield _rows(
+                (employee_ids - 1) % self.counts["showrooms"] + 1,
+                employee_ids,
+                _pick(self.rng, TARGET_PERIODS, n),
+                _pick(self.rng, TARGET_TYPES, n),
+                target,
+                np.round(target * self.rng.uniform(0.3, 1.3, n), 0),
+                _join(year, "-01-01"),
+                _join(year, "-12-31"),
+            )
+
+
+# Insert order respects foreign keys; the column lists match the notebook's inserts
+TABLE_COLUMNS: Dict[str, List[str]] = {
+    "showrooms": ["showroom_name", "brand", "address", "city", "state", "phone", "email", "manager_name", "opening_date", "status"],
+    "vehicles": ["brand", "model_name", "variant", "vehicle_type", "engine_capacity", "fuel_type", "transmission", "color_options", "base_price", "launch_date", "status"],
+    "customers": ["first_name", "last_name", "phone", "email", "address", "city", "state", "date_of_birth", "registration_date", "customer_type"],
+    "employees": ["showroom_id", "first_name", "last_name", "position", "phone", "email", "hire_date", "salary", "commission_rate", "status"],
+    "inventory": ["showroom_id", "vehicle_id", "stock_quantity", "reserved_quantity", "available_quantity", "reorder_level", "last_updated"],
+    "sales": ["showroom_id", "customer_id", "vehicle_id", "salesperson_id", "sale_date", "sale_price", "discount_amount", "final_amount", "payment_method", "delivery_date", "sale_status"],
+    "test_drives": ["customer_id", "vehicle_id", "showroom_id", "scheduled_date", "scheduled_time", "duration", "status", "feedback", "converted_to_sale"],
+    "service_records": ["customer_id", "vehicle_id", "showroom_id", "service_date", "service_type", "description", "cost", "technician_id", "next_service_due"],
+    "expenses": ["showroom_id", "expense_category", "description", "amount", "expense_date", "approved_by", "receipt_number"],
+    "targets": ["showroom_id", "employee_id", "target_period", "target_type", "target_value", "achieved_value", "start_date", "end_date"],
+}
+
+
+def _load_table(conn: sqlite3.Connection, table: str, batches: Callable[[], Iterator[Rows]]) -> int:
+    """Insert every batch of a table inside a single transaction."""
+    columns = TABLE_COLUMNS[table]
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    started = time.perf_counter()
+    total = 0
+    conn.execute("BEGIN")
+    for rows in batches():
+        conn.executemany(sql, rows)
+        total += len(rows)
+    conn.execute("COMMIT")
+    elapsed = time.perf_counter() - started
+    logger.info(f"Loaded {total:,} rows into {table} in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
+
+
+def generate_database(output_path: str, generator: ShowroomDataGenerator, overwrite: bool = False) -> Dict[str, int]:
+    """
+    Create a new SQLite database at `output_path` and fill it with synthetic data.
+
+    Args:
+        output_path: Path of the database file to create
+        generator: Configured data generator
+        overwrite: Replace an existing file instead of refusing
+
+    Returns:
+        Mapping of table name to inserted row count.
+    """
+    output_path = Path(output_path)
+    if output_path.exists():
+        if not overwrite:
+            raise FileExistsError(f"{output_path} already exists (use --overwrite to replace it)")
+        output_path.unlink()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(output_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA page_size = 8192")
+        for pragma in BULK_LOAD_PRAGMAS:
+            conn.execute(pragma)
+        for ddl in SCHEMA:
+            conn.execute(ddl)
+
+        counts = {table: _load_table(conn, table, getattr(generator, table)) for table in TABLE_COLUMNS}
+
+        index_started = time.perf_counter()
+        for ddl in INDEXES:
+            conn.execute(ddl)
+        conn.execute("ANALYZE")
+        logger.info(f"Built {len(INDEXES)} indexes in {time.perf_counter() - index_started:.1f}s")
+
+        # Leave the file in a normal, crash-safe state for the agent
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("PRAGMA synchronous = FULL")
+    finally:
+        conn.close()
+
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    logger.info(f"Generated {output_path} ({size_mb:,.1f} MB) in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic showroom database for load and scale testing.")
+    parser.add_argument("--output", default=str(config.DB_DIRECTORY / "showroom_management_scale.db"), help="Database file to create")
+    parser.add_argument("--overwrite", action="store_true", help="Replace the output file if it exists")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (output is reproducible for a given seed and batch size)")
+    parser.add_argument("--batch-size", type=int, default=200_000, help="Rows generated and inserted per executemany call")
+    parser.add_argument("--showrooms", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--employees", type=int, default=400)
+    parser.add_argument("--sales", type=int, default=100_000)
+    parser.add_argument("--test-drives", type=int, default=50_000)
+    parser.add_argument("--service-records", type=int, default=100_000)
+    parser.add_argument("--expenses", type=int, default=20_000)
+    parser.add_argument("--targets", type=int, default=2_000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    generator = ShowroomDataGenerator(
+        seed=args.seed,
+        showrooms=args.showrooms,
+        customers=args.customers,
+        employees=args.employees,
+        sales=args.sales,
+        test_drives=args.test_drives,
+        service_records=args.service_records,
+        expenses=args.expenses,
+        targets=args.targets,
+        batch_size=args.batch_size,
+    )
+    counts = generate_database(args.output, generator, overwrite=args.overwrite)
+    for table, count in counts.items():
+        print(f"{table:16}: {count:>12,} rows")
+
+
+if __name__ == "__main__":
+    main()
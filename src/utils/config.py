@@ -28,6 +28,59 @@ _PDF_RELATIVE_DIR = Path(os.getenv("PDF_DIRECTORY", "data/pdfs"))
 _DB_RELATIVE_DIR = Path(os.getenv("DB_DIRECTORY", "db"))
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "my_rag_collection")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Shared embedding service (python -m src.utils.embedding_service): Unix socket of the process holding the
+# model (empty: each process loads its own), request timeout, seconds before retrying after a failure
+# (embedding in-process meanwhile) and texts per batch
+EMBEDDING_SERVICE_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET", "")
+EMBEDDING_SERVICE_TIMEOUT_S = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT_S", 30))
+EMBEDDING_SERVICE_RETRY_S = float(os.getenv("EMBEDDING_SERVICE_RETRY_S", 30))
+EMBEDDING_SERVICE_MAX_BATCH = int(os.getenv("EMBEDDING_SERVICE_MAX_BATCH", 64))
+# Seconds between health / on-disk change checks of the shared RAG vector store
+RAG_STORE_CHECK_INTERVAL_S = float(os.getenv("RAG_STORE_CHECK_INTERVAL_S", 5))
+# RAG retrieval caches: query embeddings and retrieved chunk ids (memory caps in MB)
+RAG_CACHE_ENABLED = os.getenv("RAG_CACHE_ENABLED", "true").lower() == "true"
+RAG_EMBEDDING_CACHE_MB = float(os.getenv("RAG_EMBEDDING_CACHE_MB", 16))
+RAG_RESULT_CACHE_MB = float(os.getenv("RAG_RESULT_CACHE_MB", 4))
+# RAG ingestion: chunking of the PDFs and chunks per embedding / Chroma upsert batch
+RAG_CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", 1000))
+RAG_CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", 300))
+RAG_INGEST_BATCH_SIZE = int(os.getenv("RAG_INGEST_BATCH_SIZE", 256))
+# RAG ingestion pipeline: PDF parsing processes, chunks per embedding call, embedding threads,
+# and embedded batches buffered before the upsert stage
+RAG_INGEST_WORKERS = int(os.getenv("RAG_INGEST_WORKERS", os.cpu_count() or 1))
+RAG_EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", 256))
+RAG_EMBED_THREADS = int(os.getenv("RAG_EMBED_THREADS", 1))
+RAG_INGEST_QUEUE_SIZE = int(os.getenv("RAG_INGEST_QUEUE_SIZE", 4))
+# RAG search: "mmr" (vector MMR) or "hybrid" (BM25 keyword index fused with vector similarity
+# by reciprocal rank fusion); the keyword index is maintained by ingestion when enabled
+RAG_SEARCH_TYPE = os.getenv("RAG_SEARCH_TYPE", "mmr").lower()
+RAG_KEYWORD_INDEX_ENABLED = os.getenv("RAG_KEYWORD_INDEX_ENABLED", "true").lower() == "true"
+RAG_HYBRID_RRF_K = int(os.getenv("RAG_HYBRID_RRF_K", 60))
+RAG_HYBRID_KEYWORD_WEIGHT = float(os.getenv("RAG_HYBRID_KEYWORD_WEIGHT", 1.0))
+# Merge overlapping retrieved chunks, drop repeated text and cap the retrieval context (estimated tokens)
+RAG_CONTEXT_PACKING = os.getenv("RAG_CONTEXT_PACKING", "true").lower() == "true"
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 1000))
+# Search only the manuals of the vehicle a question names (brand / model chunk metadata)
+RAG_VEHICLE_FILTER = os.getenv("RAG_VEHICLE_FILTER", "true").lower() == "true"
+# Async retrieval: threads running searches and embedding batches, and query-embedding micro-batching
+RAG_RETRIEVAL_WORKERS = int(os.getenv("RAG_RETRIEVAL_WORKERS", 4))
+RAG_EMBED_BATCH_WINDOW_MS = float(os.getenv("RAG_EMBED_BATCH_WINDOW_MS", 3))
+RAG_EMBED_MAX_BATCH = int(os.getenv("RAG_EMBED_MAX_BATCH", 32))
+# Start retrieving the user query while the RAG agent's first LLM call runs; the result is reused
+# when the tool call's query is the same or its embedding at least this similar (above 1: same text only)
+RAG_SPECULATIVE_PREFETCH = os.getenv("RAG_SPECULATIVE_PREFETCH", "true").lower() == "true"
+RAG_PREFETCH_MIN_SIMILARITY = float(os.getenv("RAG_PREFETCH_MIN_SIMILARITY", 0.9))
+# Persistent semantic answer cache: answers of questions at least this similar (cosine of the question
+# embeddings), for the same vehicle and corpus version, are served without LLM calls
+RAG_ANSWER_CACHE = os.getenv("RAG_ANSWER_CACHE", "true").lower() == "true"
+RAG_ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("RAG_ANSWER_CACHE_MIN_SIMILARITY", 0.95))
+RAG_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("RAG_ANSWER_CACHE_MAX_ENTRIES", 5000))
+# RAG vector backend: "chroma", or "mmap" (quantized matrix exported next to the collection, memory-mapped
+# and shared by all processes); dtype int8 / float16, IVF lists (0: exact search) and lists probed per query
+RAG_VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma").lower()
+RAG_MMAP_DTYPE = os.getenv("RAG_MMAP_DTYPE", "int8").lower()
+RAG_MMAP_NLIST = int(os.getenv("RAG_MMAP_NLIST", 0))
+RAG_MMAP_NPROBE = int(os.getenv("RAG_MMAP_NPROBE", 8))
 DB_NAME = os.getenv("DB_NAME", "showroom_management.db")
 
 # Absolute paths
@@ -35,6 +88,63 @@ PDF_DIRECTORY = PROJECT_ROOT / _PDF_RELATIVE_DIR
 DB_DIRECTORY = PROJECT_ROOT / _DB_RELATIVE_DIR
 DB_PATH = DB_DIRECTORY / DB_NAME
 
+# Components loaded in a background thread at startup (embeddings, vector_store, few_shot, column_profiles);
+# only column_profiles for SQL-only workers, which then never load the embedding model or chromadb
+_WARMUP = os.getenv("WARMUP_COMPONENTS", "embeddings,vector_store,few_shot,column_profiles")
+WARMUP_COMPONENTS = [component.strip() for component in _WARMUP.split(",") if component.strip()]
+
+# Maximum number of tool calls from one LLM turn executed concurrently
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", 4))
+
+# SQLite connection profile for the agent's database (see src/utils/sqlite_profiles.py)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "read_heavy")
+
+# Run SQL in a pool of sandboxed worker processes (memory/CPU limits, hard kill on timeout)
+SQL_SANDBOX_ENABLED = os.getenv("SQL_SANDBOX_ENABLED", "false").lower() == "true"
+SQL_SANDBOX_WORKERS = int(os.getenv("SQL_SANDBOX_WORKERS", 2))
+SQL_SANDBOX_TIMEOUT_S = float(os.getenv("SQL_SANDBOX_TIMEOUT_S", 30))
+SQL_SANDBOX_MEMORY_MB = int(os.getenv("SQL_SANDBOX_MEMORY_MB", 1024))
+SQL_SANDBOX_CPU_S = int(os.getenv("SQL_SANDBOX_CPU_S", 30))
+
+# Optional DuckDB backend for large scans and aggregations (pip install duckdb; see src/utils/duckdb_backend.py)
+# off | auto (route analytical queries, the agent keeps writing SQLite SQL) | all (every query, DuckDB dialect)
+SQL_DUCKDB_MODE = os.getenv("SQL_DUCKDB_MODE", "off").lower()
+# parquet (incrementally refreshed mirror) | attach (reads the SQLite file, needs DuckDB's sqlite extension)
+SQL_DUCKDB_SOURCE = os.getenv("SQL_DUCKDB_SOURCE", "parquet").lower()
+SQL_DUCKDB_MIN_ROWS = int(os.getenv("SQL_DUCKDB_MIN_ROWS", 100000))
+SQL_DUCKDB_REFRESH_S = float(os.getenv("SQL_DUCKDB_REFRESH_S", 300))
+SQL_DUCKDB_MEMORY_LIMIT = os.getenv("SQL_DUCKDB_MEMORY_LIMIT", "1GB")
+
+# Text-to-SQL execution mode: "agent" (tool loop) or "fast" (single-shot plan with agent fallback)
+TEXT_TO_SQL_MODE = os.getenv("TEXT_TO_SQL_MODE", "agent").lower()
+# Maximum rows fetched from a single SQL query
+SQL_MAX_RESULT_ROWS = int(os.getenv("SQL_MAX_RESULT_ROWS", 200))
+# Execute queries as parameterized templates (literals bound as parameters) so each
+# connection's prepared statement cache is reused across queries differing only in literals
+SQL_QUERY_TEMPLATES = os.getenv("SQL_QUERY_TEMPLATES", "true").lower() == "true"
+SQL_STATEMENT_CACHE_SIZE = int(os.getenv("SQL_STATEMENT_CACHE_SIZE", 256))
+# Answer simple SQL results (scalars, small tables) from templates instead of another LLM call
+TEXT_TO_SQL_TEMPLATE_ANSWERS = os.getenv("TEXT_TO_SQL_TEMPLATE_ANSWERS", "true").lower() == "true"
+# Largest result (rows) rendered as a table without LLM interpretation
+TEXT_TO_SQL_TEMPLATE_MAX_ROWS = int(os.getenv("TEXT_TO_SQL_TEMPLATE_MAX_ROWS", 50))
+# Column statistics / value dictionary shown to the agent, and checking of filter literals against it:
+# case/whitespace differences are fixed, values closer than the cutoff are suggested
+TEXT_TO_SQL_COLUMN_PROFILES = os.getenv("TEXT_TO_SQL_COLUMN_PROFILES", "true").lower() == "true"
+TEXT_TO_SQL_VALUE_MATCHING = os.getenv("TEXT_TO_SQL_VALUE_MATCHING", "true").lower() == "true"
+TEXT_TO_SQL_VALUE_MATCH_CUTOFF = float(os.getenv("TEXT_TO_SQL_VALUE_MATCH_CUTOFF", 0.8))
+# Rewrite LIKE '%term%' on columns with an FTS5 index into MATCH lookups (see src/utils/fts_index.py)
+TEXT_TO_SQL_FTS_REWRITE = os.getenv("TEXT_TO_SQL_FTS_REWRITE", "true").lower() == "true"
+# Compact superseded tool outputs in the agent loop and cap the prompt size (estimated tokens)
+TEXT_TO_SQL_CONTEXT_COMPACTION = os.getenv("TEXT_TO_SQL_CONTEXT_COMPACTION", "true").lower() == "true"
+TEXT_TO_SQL_CONTEXT_TOKEN_BUDGET = int(os.getenv("TEXT_TO_SQL_CONTEXT_TOKEN_BUDGET", 6000))
+
+# Text-to-SQL few-shot example store
+TEXT_TO_SQL_FEW_SHOT_ENABLED = os.getenv("TEXT_TO_SQL_FEW_SHOT_ENABLED", "true").lower() == "true"
+TEXT_TO_SQL_FEW_SHOT_K = int(os.getenv("TEXT_TO_SQL_FEW_SHOT_K", 3))
+TEXT_TO_SQL_FEW_SHOT_MIN_SIMILARITY = float(os.getenv("TEXT_TO_SQL_FEW_SHOT_MIN_SIMILARITY", 0.35))
+TEXT_TO_SQL_MAX_LEARNED_EXAMPLES = int(os.getenv("TEXT_TO_SQL_MAX_LEARNED_EXAMPLES", 500))
+TEXT_TO_SQL_EXAMPLES_PATH = DB_DIRECTORY / os.getenv("TEXT_TO_SQL_EXAMPLES_FILE", "text_to_sql_examples.json")
+
 # Create directories if they don’t exist
 for directory in [LOG_DIR, PDF_DIRECTORY, DB_DIRECTORY]:
     try:
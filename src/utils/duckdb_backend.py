@@ -0,0 +1,582 @@
+"""
+Optional DuckDB backend for analytical queries.
+
+SQLite executes one row at a time, which makes wide aggregations over
+years of `sales` slow. This module gives the agent a DuckDB view of the
+showroom database, backed either by
+
+- a Parquet mirror (`source="parquet"`): every table is copied to Parquet
+  files next to the databases and refreshed incrementally (rows appended
+  since the last refresh become a new file; tables whose rows were deleted,
+  updated in a way that changes the row count, or whose schema changed are
+  rebuilt), or
+- the SQLite file itself (`source="attach"`), through DuckDB's sqlite
+  extension, which must be installed.
+
+`route_query` decides per query: scans and aggregations over large tables
+go to DuckDB's vectorized engine, point lookups and anything using
+SQLite-only syntax stay in SQLite. In that mode the agent keeps writing
+SQLite SQL, and DuckDB runs with SQLite-compatible settings (integer
+division, NULL ordering) plus a few rewrites (`LIKE` -> `ILIKE`,
+`strftime` on text dates).
+
+Build or refresh the mirror:
+    python -m src.utils.duckdb_backend --db src/db/showroom_management.db
+"""
+
+import argparse
+import datetime
+import decimal
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from .fts_index import internal_tables
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _import_duckdb() -> Any:
+    """The duckdb module, imported on first use so processes that never route to it skip it; None if missing."""
+    try:
+        import duckdb
+    except ImportError:  # optional dependency: pip install duckdb
+        return None
+    return duckdb
+
+
+DUCKDB_SOURCES = ("parquet", "attach")
+# DuckDB settings that make it evaluate SQLite-dialect queries like SQLite does
+SQLITE_COMPAT_SETTINGS = [
+    "SET integer_division = true",
+    "SET default_null_order = 'nulls_first_on_asc_last_on_desc'",
+]
+_FETCH_BATCH_ROWS = 100_000
+
+# Constructs that have no DuckDB equivalent or a different meaning there
+_SQLITE_FUNCTION_CALL = re.compile(
+    r"\b(?:date|datetime|julianday|time|unixepoch|iif|total|typeof|printf|random|randomblob|zeroblob|likelihood)\s*\(",
+    re.IGNORECASE,
+)
+_SQLITE_KEYWORD = re.compile(r"\b(?:GLOB|MATCH|REGEXP|rowid|oid|_rowid_|sqlite_\w+)\b", re.IGNORECASE)
+_ANALYTICAL = re.compile(r"\b(?:COUNT|SUM|AVG|MIN|MAX|GROUP_CONCAT|GROUP\s+BY|DISTINCT|OVER)\b", re.IGNORECASE)
+_STRFTIME_SAFE_FORMAT = re.compile(r"^(?:%[YmdHMS]|[-/: T])+$")
+
+
+class DuckDBUnavailable(RuntimeError):
+    """DuckDB (or the requested source) cannot be used."""
+
+
+def _duckdb_type(declared: str) -> str:
+    """DuckDB column type for a SQLite declared type, following SQLite's affinity rules."""
+    declared = (declared or "").upper()
+    if "INT" in declared or "BOOL" in declared:
+        return "BIGINT"
+    if any(t in declared for t in ("CHAR", "CLOB", "TEXT")):
+        return "VARCHAR"
+    if "BLOB" in declared:
+        return "BLOB"
+    if any(t in declared for t in ("REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")):
+        return "DOUBLE"
+    # DATE/DATETIME and untyped columns hold ISO text in this schema;
+    # VARCHAR keeps SQLite's string comparison semantics
+    return "VARCHAR"
+
+
+def _strip_literals(query: str) -> str:
+    """Blank out string literals, keeping every other character at its position."""
+    return re.sub(r"'(?:[^']|'')*'", lambda m: "'" + " " * (len(m.group()) - 2) + "'", query)
+
+
+def _matching_paren(text: str, open_index: int) -> int:
+    depth = 0
+    in_string = False
+    for i in range(open_index, len(text)):
+        char = text[i]
+        if char == "'":
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _translate_strftime(query: str) -> Optional[str]:
+    """`strftime('%Y', col)` -> `strftime('%Y', CAST(col AS TIMESTAMP))`; None if a call can't be translated."""
+    out = []
+    position = 0
+    for m in re.finditer(r"\bstrftime\s*\(", _strip_literals(query), re.IGNORECASE):
+        if m.start() < position:
+            continue
+        open_index = m.end() - 1
+        close_index = _matching_paren(query, open_index)
+        if close_index < 0:
+            return None
+        args = query[open_index + 1 : close_index]
+        fmt = re.match(r"\s*'((?:[^']|'')*)'\s*,", args)
+        if not fmt or not _STRFTIME_SAFE_FORMAT.match(fmt.group(1)):
+            return None
+        value = args[fmt.end() :]
+        if _strip_literals(value).count(",") > _strip_literals(value).count("("):
+            return None  # SQLite modifiers ('start of month', ...) have no direct equivalent
+        out.append(query[position : m.start()])
+        out.append(f"strftime('{fmt.group(1)}', CAST({value.strip()} AS TIMESTAMP))")
+        position = close_index + 1
+    out.append(query[position:])
+    return "".join(out)
+
+
+def _order_groups(query: str) -> str:
+    """
+    Append `ORDER BY <group keys>` to a top-level GROUP BY without ORDER BY.
+
+    SQLite usually returns groups sorted by their keys and answers rely on
+    that order; DuckDB returns them in arbitrary order.
+    """
+    stripped = _strip_literals(query)
+    depth = 0
+    top_level = []
+    for i, char in enumerate(stripped):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        top_level.append(char if depth == 0 else " ")
+    flat = "".join(top_level)
+    group = list(re.finditer(r"\bGROUP\s+BY\b", flat, re.IGNORECASE))
+    if not group or re.search(r"\b(?:ORDER\s+BY|LIMIT|UNION|INTERSECT|EXCEPT)\b", flat[group[-1].end() :], re.IGNORECASE):
+        return query
+    having = re.search(r"\bHAVING\b", flat[group[-1].end() :], re.IGNORECASE)
+    keys_end = group[-1].end() + having.start() if having else len(query.rstrip())
+    keys = query[group[-1].end() : keys_end].strip()
+    return f"{query.rstrip()} ORDER BY {keys}"
+
+
+def translate_sqlite_query(query: str) -> Optional[str]:
+    """
+    Rewrite a SQLite query so DuckDB (with SQLITE_COMPAT_SETTINGS) returns the same result.
+
+    Returns:
+        The DuckDB query, or None if the query uses SQLite-only constructs.
+    """
+    query = query.strip().rstrip(";")
+    without_literals = _strip_literals(query)
+    if _SQLITE_FUNCTION_CALL.search(without_literals) or _SQLITE_KEYWORD.search(without_literals):
+        return None
+    translated = _translate_strftime(query)
+    if translated is None:
+        return None
+    # SQLite's LIKE is case-insensitive
+    for m in reversed(list(re.finditer(r"\bLIKE\b", _strip_literals(translated), re.IGNORECASE))):
+        translated = translated[: m.start()] + "ILIKE" + translated[m.end() :]
+    return _order_groups(translated)
+
+
+def referenced_tables(query: str) -> Set[str]:
+    """Lower-cased names after FROM / JOIN (CTE names included)."""
+    return {
+        name.lower()
+        for name in re.findall(r"\b(?:FROM|JOIN)\s+\"?([A-Za-z_]\w*)\"?", _strip_literals(query), re.IGNORECASE)
+    }
+
+
+def route_query(
+    query: str,
+    table_rows: Dict[str, int],
+    primary_keys: Dict[str, str],
+    min_rows: int,
+) -> str:
+    """
+    Pick the engine for a SQLite-dialect query by its shape.
+
+    Args:
+        query: SQL query (SQLite dialect)
+        table_rows: Approximate row count per table (lower-cased names) available in DuckDB
+        primary_keys: Integer primary key column per table (lower-cased names)
+        min_rows: Smallest scanned table size worth sending to DuckDB
+
+    Returns:
+        "duckdb" or "sqlite".
+    """
+    without_literals = _strip_literals(query)
+    if not _ANALYTICAL.search(without_literals):
+        return "sqlite"  # plain row fetches are index lookups in SQLite
+    tables = referenced_tables(query)
+    known = {table for table in tables if table in table_rows}
+    if not known or not known.issuperset(tables - _cte_names(query)):
+        return "sqlite"
+    if max(table_rows[table] for table in known) < min_rows:
+        return "sqlite"
+    for table in known:
+        key = primary_keys.get(table)
+        if key and re.search(rf"(?:\b\w+\.)?\b{re.escape(key)}\s*=\s*(?:\?|\d+)", without_literals, re.IGNORECASE):
+            return "sqlite"  # keyed lookup
+    return "duckdb"
+
+
+def _cte_names(query: str) -> Set[str]:
+    return {name.lower() for name in re.findall(r"(?:\bWITH|,)\s*([A-Za-z_]\w*)\s+AS\s*\(", query, re.IGNORECASE)}
+
+
+def _plain_value(value: Any) -> Any:
+    """Convert DuckDB values to the types SQLite returns."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    return value
+
+
+class DuckDBBackend:
+    """DuckDB view of a SQLite database, over a Parquet mirror or the attached file."""
+
+    def __init__(
+        self,
+        database_path: Union[str, Path],
+        source: str = "parquet",
+        mirror_dir: Optional[Union[str, Path]] = None,
+        memory_limit: Optional[str] = "1GB",
+        threads: Optional[int] = None,
+        sqlite_semantics: bool = True,
+        excluded_tables: Sequence[str] = (),
+    ):
+        """
+        Args:
+            database_path: SQLite database file
+            source: "parquet" (incrementally refreshed mirror) or "attach" (needs the sqlite extension)
+            mirror_dir: Directory of the Parquet mirror (default: next to the database)
+            memory_limit: DuckDB memory limit, e.g. "1GB"
+            threads: DuckDB worker threads (default: all cores)
+            sqlite_semantics: Apply SQLITE_COMPAT_SETTINGS, for queries written in SQLite dialect
+            excluded_tables: Tables never mirrored (FTS index tables are always skipped)
+
+        Raises:
+            DuckDBUnavailable: duckdb is not installed or the source cannot be opened.
+        """
+        duckdb = _import_duckdb()
+        if duckdb is None:
+            raise DuckDBUnavailable("duckdb is not installed (pip install duckdb)")
+        if source not in DUCKDB_SOURCES:
+            raise ValueError(f"Unknown DuckDB source '{source}', expected one of {DUCKDB_SOURCES}")
+
+        self.database_path = Path(database_path).resolve()
+        self.source = source
+        self.mirror_dir = Path(mirror_dir) if mirror_dir else self.database_path.with_name(
+            f"{self.database_path.stem}.parquet_mirror"
+        )
+        self.manifest_path = self.mirror_dir / "manifest.json"
+        self.excluded_tables = {t.lower() for t in excluded_tables}
+
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._garbage: List[Path] = []
+        self.last_refresh = 0.0
+        self.last_actions: Dict[str, str] = {}
+        self.table_rows: Dict[str, int] = {}
+        self.primary_keys: Dict[str, str] = {}
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+
+        self.con = duckdb.connect()
+        # Session settings are per cursor; memory and thread limits are global
+        self._session_settings = list(SQLITE_COMPAT_SETTINGS) if sqlite_semantics else []
+        settings = list(self._session_settings)
+        if memory_limit:
+            settings.append(f"SET memory_limit = '{memory_limit}'")
+        if threads:
+            settings.append(f"SET threads = {int(threads)}")
+        for statement in settings:
+            self.con.execute(statement)
+
+        if source == "attach":
+            try:
+                self.con.execute(f"ATTACH '{self.database_path}' AS showroom (TYPE sqlite, READ_ONLY)")
+                self.con.execute("USE showroom")
+            except Exception as e:
+                raise DuckDBUnavailable(f"Could not attach {self.database_path} (is the sqlite extension installed?): {e}")
+            self._load_table_stats()
+        else:
+            self._manifest = self._read_manifest()
+            self.refresh()
+
+    # ------------------------------------------------------------------ stats
+
+    def _sqlite(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"{self.database_path.as_uri()}?mode=ro", uri=True)
+
+    def _user_tables(self, conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+        rows = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE 'CREATE VIRTUAL%'"
+        ).fetchall()
+        hidden = self.excluded_tables | {name.lower() for name in internal_tables(conn)}
+        return [(name, sql) for name, sql in rows if name.lower() not in hidden]
+
+    @staticmethod
+    def _table_columns(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str, bool]]:
+        """(name, declared type, is primary key) per column."""
+        return [(row[1], row[2], bool(row[5])) for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+    @staticmethod
+    def _fingerprint(conn: sqlite3.Connection, table: str) -> Tuple[int, Optional[int]]:
+        try:
+            count, max_rowid = conn.execute(f'SELECT COUNT(*), MAX(rowid) FROM "{table}"').fetchone()
+        except sqlite3.OperationalError:  # WITHOUT ROWID table
+            count, max_rowid = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0], None
+        return count, max_rowid
+
+    def _load_table_stats(self) -> None:
+        conn = self._sqlite()
+        try:
+            for table, _ in self._user_tables(conn):
+                self.table_rows[table.lower()] = self._fingerprint(conn, table)[0]
+                self._record_primary_key(conn, table)
+        finally:
+            conn.close()
+
+    def _record_primary_key(self, conn: sqlite3.Connection, table: str) -> None:
+        keys = [name for name, declared, pk in self._table_columns(conn, table) if pk]
+        if len(keys) == 1:
+            self.primary_keys[table.lower()] = keys[0]
+
+    # ---------------------------------------------------------------- mirror
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self) -> None:
+        self.mirror_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._manifest, indent=1))
+        tmp.replace(self.manifest_path)
+
+    def _write_part(
+        self, conn: sqlite3.Connection, table: str, columns: List[Tuple[str, str, bool]], after_rowid: Optional[int]
+    ) -> Tuple[str, int]:
+        """Copy the rows of `table` with rowid > after_rowid (all if None) to a new Parquet file."""
+        import pandas as pd
+
+        names = [name for name, _, _ in columns]
+        select = ", ".join(f'"{name}"' for name in names)
+        if after_rowid is None:
+            cursor = conn.execute(f'SELECT {select} FROM "{table}"')
+        else:
+            cursor = conn.execute(f'SELECT {select} FROM "{table}" WHERE rowid > ? ORDER BY rowid', (after_rowid,))
+
+        scratch = _import_duckdb().connect()
+        try:
+            scratch.execute(
+                "CREATE TABLE part ("
+                + ", ".join(f'"{name}" {_duckdb_type(declared)}' for name, declared, _ in columns)
+                + ")"
+            )
+            written = 0
+            while True:
+                rows = cursor.fetchmany(_FETCH_BATCH_ROWS)
+                if not rows:
+                    break
+                batch = pd.DataFrame.from_records(rows, columns=names)
+                scratch.register("batch", batch)
+                scratch.execute("INSERT INTO part SELECT * FROM batch")
+                scratch.unregister("batch")
+                written += len(rows)
+
+            self.mirror_dir.mkdir(parents=True, exist_ok=True)
+            file_name = f"{table}-{time.time_ns()}.parquet"
+            scratch.execute(f"COPY part TO '{self.mirror_dir / file_name}' (FORMAT parquet)")
+        finally:
+            scratch.close()
+        return file_name, written
+
+    def refresh(self, full: bool = False) -> Dict[str, str]:
+        """
+        Bring the Parquet mirror up to date with the SQLite database.
+
+        Appended rows are copied incrementally; a table is rebuilt when its
+        schema changed or rows were deleted. In-place updates that keep the
+        row count and max rowid are not detected; use `full=True` after bulk
+        updates.
+
+        Returns:
+            Table -> action taken ("unchanged", "appended N", "rebuilt").
+        """
+        if self.source != "parquet":
+            return {}
+        actions: Dict[str, str] = {}
+        with self._refresh_lock:
+            started = time.perf_counter()
+            for path in self._garbage:
+                path.unlink(missing_ok=True)
+            self._garbage = []
+
+            conn = self._sqlite()
+            try:
+                tables = self._user_tables(conn)
+                for table, schema_sql in tables:
+                    try:
+                        actions[table] = self._refresh_table(conn, table, schema_sql, full)
+                    except Exception as e:
+                        # Tables that cannot be mirrored (e.g. values not matching their declared type) stay in SQLite
+                        logger.warning(f"Could not mirror table '{table}' to Parquet: {e}")
+                        self._drop_table(table)
+                        actions[table] = "failed"
+                    self._record_primary_key(conn, table)
+                for table in set(self._manifest) - {t for t, _ in tables}:
+                    self._drop_table(table)
+                    actions[table] = "dropped"
+            finally:
+                conn.close()
+
+            self._write_manifest()
+            self._create_views()
+            self.last_refresh = time.time()
+            self.last_actions = actions
+        changed = {t: a for t, a in actions.items() if a != "unchanged"}
+        if changed:
+            logger.info(f"Parquet mirror refreshed in {(time.perf_counter() - started) * 1000:.0f} ms: {changed}")
+        return actions
+
+    def _refresh_table(self, conn: sqlite3.Connection, table: str, schema_sql: str, full: bool) -> str:
+        count, max_rowid = self._fingerprint(conn, table)
+        entry = self._manifest.get(table)
+        parts_exist = entry is not None and all((self.mirror_dir / part).exists() for part in entry["parts"])
+
+        if not full and parts_exist and entry["schema"] == schema_sql:
+            if (entry["rows"], entry["max_rowid"]) == (count, max_rowid):
+                return "unchanged"
+            if max_rowid is not None and entry["max_rowid"] is not None and max_rowid > entry["max_rowid"]:
+                new_rows = conn.execute(
+                    f'SELECT COUNT(*) FROM "{table}" WHERE rowid > ?', (entry["max_rowid"],)
+                ).fetchone()[0]
+                if entry["rows"] + new_rows == count:
+                    part, written = self._write_part(conn, table, self._table_columns(conn, table), entry["max_rowid"])
+                    entry["parts"].append(part)
+                    entry.update(rows=count, max_rowid=max_rowid)
+                    return f"appended {written}"
+
+        columns = self._table_columns(conn, table)
+        part, _ = self._write_part(conn, table, columns, None)
+        if entry:
+            self._garbage += [self.mirror_dir / old for old in entry["parts"]]
+        self._manifest[table] = {"schema": schema_sql, "parts": [part], "rows": count, "max_rowid": max_rowid}
+        return "rebuilt"
+
+    def _drop_table(self, table: str) -> None:
+        entry = self._manifest.pop(table, None)
+        if entry:
+            self._garbage += [self.mirror_dir / part for part in entry["parts"]]
+        with self._lock:
+            self.con.execute(f'DROP VIEW IF EXISTS "{table}"')
+
+    def _create_views(self) -> None:
+        with self._lock:
+            for table, entry in self._manifest.items():
+                files = ", ".join(f"'{self.mirror_dir / part}'" for part in entry["parts"])
+                self.con.execute(f'CREATE OR REPLACE VIEW "{table}" AS SELECT * FROM read_parquet([{files}])')
+            self.table_rows = {table.lower(): entry["rows"] for table, entry in self._manifest.items()}
+
+    def maybe_refresh(self, interval_s: float) -> None:
+        """
+        Start a refresh in a daemon thread if the last one is older than `interval_s`.
+
+        Never waits: queries keep reading the current mirror until the refresh
+        swaps in the new views.
+        """
+        if self.source != "parquet" or time.time() - self.last_refresh < interval_s:
+            return
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self._background_refresh, name="parquet-mirror", daemon=True)
+            self._refresh_thread.start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Parquet mirror refresh failed: {e}")
+            # Retried after the next interval, not on every query
+            self.last_refresh = time.time()
+
+    # --------------------------------------------------------------- queries
+
+    def route(self, query: str, min_rows: int) -> str:
+        return route_query(query, self.table_rows, self.primary_keys, min_rows)
+
+    def _cursor(self):
+        """A new DuckDB session for the calling thread."""
+        with self._lock:
+            cursor = self.con.cursor()
+        for statement in self._session_settings:
+            cursor.execute(statement)
+        return cursor
+
+    def execute(self, query: str, params: Sequence[Any] = (), max_rows: int = 200) -> Dict[str, Any]:
+        """
+        Run a query on DuckDB.
+
+        Returns:
+            Dict with columns, rows (list of tuples), truncated flag and elapsed_ms,
+            the same shape as SQLTools.execute.
+        """
+        started = time.perf_counter()
+        cursor = self._cursor()
+        try:
+            cursor.execute(query, list(params) if params else None)
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            rows = cursor.fetchmany(max_rows + 1) if columns else []
+        finally:
+            cursor.close()
+        return {
+            "columns": columns,
+            "rows": [tuple(_plain_value(v) for v in row) for row in rows[:max_rows]],
+            "truncated": len(rows) > max_rows,
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    def explain(self, query: str) -> Optional[str]:
+        """Compile `query` without running it; returns an error message or None."""
+        cursor = self._cursor()
+        try:
+            cursor.execute(f"EXPLAIN {query.strip().rstrip(';')}")
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self.con.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build or refresh the Parquet mirror used by the DuckDB backend.")
+    parser.add_argument("--db", required=True, help="SQLite database to mirror")
+    parser.add_argument("--mirror-dir", help="Mirror directory (default: next to the database)")
+    parser.add_argument("--full", action="store_true", help="Rebuild every table instead of appending new rows")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    backend = DuckDBBackend(args.db, source="parquet", mirror_dir=args.mirror_dir)
+    actions = backend.refresh(full=True) if args.full else backend.last_actions
+    backend.close()
+    print(f"Parquet mirror of {args.db} at {backend.mirror_dir} ({time.perf_counter() - started:.1f} s)")
+    for table, action in sorted(actions.items()):
+        print(f"  {table:20} {action}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Shared embedding service for several worker processes.
+
+Every Streamlit / API worker used to load its own sentence-transformer
+(and torch), hundreds of MB of RSS each. With `EMBEDDING_SERVICE_SOCKET`
+set, one service process holds the model and the workers embed through a
+Unix socket:
+
+    python -m src.utils.embedding_service --socket /tmp/embeddings.sock
+
+Requests are batched dynamically: the texts of all requests that arrived
+while the model was busy are encoded together in the next forward pass,
+which torch spreads over all cores. There is no waiting window, so a
+lone request is encoded at once.
+
+`get_embeddings()` returns a `RemoteEmbeddings` client when the socket is
+configured. If the service cannot be reached or fails, the client loads the
+model in-process and uses it, retrying the service every
+`EMBEDDING_SERVICE_RETRY_S` seconds. The service refuses requests made for
+another model, so vectors never mix models.
+
+Messages are a 4-byte big-endian length followed by a marshal-encoded tuple:
+`(model, texts)` for requests, `(True, dim, float32 bytes)` or
+`(False, 0, error)` for replies. Unix sockets are POSIX only.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import marshal
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from . import config
+from .logger import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+_LENGTH = struct.Struct(">I")
+
+
+class EmbeddingServiceError(RuntimeError):
+    """The embedding service rejected or failed a request."""
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Embedding service closed the connection")
+        buffer += chunk
+    return bytes(buffer)
+
+
+def _send_message(sock: socket.socket, payload: object) -> None:
+    data = marshal.dumps(payload)
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _recv_message(sock: socket.socket) -> object:
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return marshal.loads(_recv_exactly(sock, size))
+
+
+class _Request:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: List[str], future: "asyncio.Future"):
+        self.texts = texts
+        self.future = future
+
+
+class EmbeddingService:
+    """Serves an embedding model to other processes over a Unix socket, batching concurrent requests."""
+
+    def __init__(self, embeddings: Embeddings, socket_path: str, model_name: str, max_batch: int = 64):
+        """
+        Args:
+            embeddings: The model; only this process loads it
+            socket_path: Unix socket to listen on (a stale socket file is replaced)
+            model_name: Name clients must ask for (EMBEDDING_MODEL)
+            max_batch: Texts per forward pass; a single larger request is encoded on its own
+        """
+        self.embeddings = embeddings
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.max_batch = max(1, max_batch)
+        # One batch at a time: torch already uses every core for it
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-service")
+        self._queue: Optional["asyncio.Queue[_Request]"] = None
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            count = len(batch[0].texts)
+            while count < self.max_batch and not self._queue.empty():
+                request = self._queue.get_nowait()
+                batch.append(request)
+                count += len(request.texts)
+            texts = [text for request in batch for text in request.texts]
+            started = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.embeddings.embed_documents, texts)
+                matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+            except Exception as e:
+                logger.exception("Embedding batch failed")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            metrics.observe("embedding_service.batch_size", len(texts))
+            metrics.observe("embedding_service.batch_ms", (time.perf_counter() - started) * 1000)
+            offset = 0
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result(matrix[offset : offset + len(request.texts)])
+                offset += len(request.texts)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # A connection carries the requests of one client thread, one after the other
+        try:
+            while True:
+                try:
+                    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                    model, texts = marshal.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    return
+                if model != self.model_name:
+                    reply: Tuple = (False, 0, f"Service runs '{self.model_name}', not '{model}'")
+                elif not texts:
+                    reply = (True, 0, b"")
+                else:
+                    future = asyncio.get_running_loop().create_future()
+                    await self._queue.put(_Request(list(texts), future))
+                    try:
+                        matrix = await future
+                        reply = (True, int(matrix.shape[1]), matrix.tobytes())
+                    except Exception as e:
+                        reply = (False, 0, f"{type(e).__name__}: {e}")
+                data = marshal.dumps(reply)
+                writer.write(_LENGTH.pack(len(data)) + data)
+                await writer.drain()
+        except (ConnectionError, ValueError, EOFError) as e:
+            logger.debug(f"Embedding client connection dropped: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self, ready: Optional[Callable[[], None]] = None) -> None:
+        """Listen until cancelled."""
+        self._queue = asyncio.Queue()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        batcher = asyncio.ensure_future(self._batch_loop())
+        logger.info(f"Embedding service for '{self.model_name}' listening on {self.socket_path}")
+        if ready is not None:
+            ready()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings computed by the embedding service, with in-process fallback."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        model_name: str,
+        timeout_s: float = 30.0,
+        fallback: Optional[Callable[[], Embeddings]] = None,
+        retry_after_s: float = 30.0,
+    ):
+        """
+        Args:
+            socket_path: Unix socket of the service
+            model_name: Model the vectors must come from
+            timeout_s: Socket timeout per request
+            fallback: Returns the in-process model, used while the service is unavailable;
+                without it, service errors are raised
+            retry_after_s: Time before the service is tried again after a failure
+        """
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.timeout_s = timeout_s
+        self.fallback = fallback
+        self.retry_after_s = retry_after_s
+        self._local = threading.local()
+        self._unavailable_until = 0.0
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout_s)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _request(self, texts: List[str]) -> np.ndarray:
+        sock = self._connection()
+        _send_message(sock, (self.model_name, texts))
+        ok, dim, payload = _recv_message(sock)
+        if not ok:
+            raise EmbeddingServiceError(payload)
+        return np.frombuffer(payload, dtype=np.float32).reshape(len(texts), dim)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.fallback is not None and time.monotonic() < self._unavailable_until:
+            return self.fallback().embed_documents(texts)
+        started = time.perf_counter()
+        try:
+            matrix = self._request(texts)
+        except (OSError, EOFError, ValueError, EmbeddingServiceError) as e:
+            # The connection may hold half a reply: never reuse it
+            self._disconnect()
+            if self.fallback is None:
+                raise
+            logger.warning(
+                f"Embedding service at {self.socket_path} unavailable ({e}); "
+                f"embedding in-process for {self.retry_after_s:.0f}s"
+            )
+            metrics.increment("embedding_service.fallbacks")
+            self._unavailable_until = time.monotonic() + self.retry_after_s
+            return self.fallback().embed_documents(texts)
+        metrics.observe("embedding_service.request_ms", (time.perf_counter() - started) * 1000)
+        return matrix.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Query embeddings in one request: the service encodes queries and documents alike."""
+        return self.embed_documents(texts)
+
+    def close(self) -> None:
+        self._disconnect()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the embedding model to worker processes over a Unix socket.")
+    parser.add_argument("--socket", default=config.EMBEDDING_SERVICE_SOCKET, help="Unix socket path")
+    parser.add_argument("--max-batch", type=int, default=config.EMBEDDING_SERVICE_MAX_BATCH, help="Texts per batch")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (default: torch's choice, all cores)")
+    args = parser.parse_args(argv)
+    if not args.socket:
+        parser.error("--socket or EMBEDDING_SERVICE_SOCKET is required")
+
+    from .embeddings import get_local_embeddings
+
+    if args.threads:
+        import torch
+
+        torch.set_num_threads(args.threads)
+    embeddings = get_local_embeddings()
+    embeddings.embed_query("warm-up")
+    service = EmbeddingService(embeddings, args.socket, config.EMBEDDING_MODEL, max_batch=args.max_batch)
+    try:
+        asyncio.run(service.serve())
+    except KeyboardInterrupt:
+        logger.info("Embedding service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Union
+
+from . import config
+from .logger import get_logger
+
+if TYPE_CHECKING:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    from .embedding_service import RemoteEmbeddings
+
+logger = get_logger(__name__)
+
+# Serializes the first load between a warm-up thread and the first request
+_load_lock = threading.Lock()
+
+
+def get_embeddings() -> Union["HuggingFaceEmbeddings", "RemoteEmbeddings"]:
+    """
+    Return the process-wide embedding model.
+
+    Every embedding-based feature (RAG retrieval, few-shot example lookup)
+    shares this instance so the sentence-transformer is loaded only once.
+    `langchain_huggingface` (and with it torch) is imported on the first
+    call, so processes that never embed do not pay for it.
+    Ingestion passes whole batches of `RAG_EMBED_BATCH_SIZE` chunks, which
+    the model encodes in one forward pass instead of its default 32.
+
+    With EMBEDDING_SERVICE_SOCKET set, this is a client of the shared
+    embedding service instead, which loads the model only if the service
+    is unavailable (see `embedding_service`).
+    """
+    if config.EMBEDDING_SERVICE_SOCKET:
+        return _remote_embeddings()
+    return get_local_embeddings()
+
+
+def get_local_embeddings() -> "HuggingFaceEmbeddings":
+    """The embedding model loaded in this process."""
+    with _load_lock:
+        return _load_embeddings()
+
+
+def embeddings_loaded() -> bool:
+    return _load_embeddings.cache_info().currsize > 0
+
+
+@lru_cache(maxsize=1)
+def _remote_embeddings() -> "RemoteEmbeddings":
+    from .embedding_service import RemoteEmbeddings
+
+    logger.info(f"Embedding through the service at {config.EMBEDDING_SERVICE_SOCKET}")
+    return RemoteEmbeddings(
+        config.EMBEDDING_SERVICE_SOCKET,
+        config.EMBEDDING_MODEL,
+        timeout_s=config.EMBEDDING_SERVICE_TIMEOUT_S,
+        fallback=get_local_embeddings,
+        retry_after_s=config.EMBEDDING_SERVICE_RETRY_S,
+    )
+
+
+@lru_cache(maxsize=1)
+def _load_embeddings() -> "HuggingFaceEmbeddings":
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    logger.info(f"Loading embedding model '{config.EMBEDDING_MODEL}'")
+    return HuggingFaceEmbeddings(
+        model_name=config.EMBEDDING_MODEL,
+        encode_kwargs={"batch_size": config.RAG_EMBED_BATCH_SIZE},
+    )
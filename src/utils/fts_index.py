@@ -0,0 +1,324 @@
+"""
+FTS5 full-text indexes for free-text columns.
+
+`LIKE '%term%'` cannot use a B-tree index, so every name or feedback search
+scans the whole table. This module maintains external-content FTS5 tables
+with the trigram tokenizer (substring matching, case-insensitive like
+LIKE) next to the configured columns, kept in sync by triggers, and can
+rewrite leading-wildcard LIKE predicates into equivalent MATCH lookups.
+
+Build or refresh the indexes (needs write access to the database):
+    python -m src.utils.fts_index --db src/db/showroom_management.db
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Free-text columns searched with LIKE by the agent
+FTS_INDEXES: Dict[str, List[str]] = {
+    "customers": ["first_name", "last_name"],
+    "employees": ["first_name", "last_name"],
+    "test_drives": ["feedback"],
+    "service_records": ["description"],
+}
+
+FTS_SUFFIX = "_fts"
+_SHADOW_SUFFIXES = ("_data", "_idx", "_content", "_docsize", "_config")
+# The trigram tokenizer only matches terms of at least three characters
+MIN_TERM_LENGTH = 3
+
+# Tables named in FROM / JOIN clauses (FROM may list several, separated by commas), with their alias
+_TABLE_LIST = re.compile(r"\b(?:FROM|JOIN)\s+", re.IGNORECASE)
+_TABLE_REFERENCE = re.compile(r'"?([A-Za-z_]\w*)"?(?:\s+(?:AS\s+)?"?([A-Za-z_]\w*)"?)?', re.IGNORECASE)
+_TABLE_SEPARATOR = re.compile(r"\s*,\s*")
+_CLAUSE_KEYWORDS = {
+    "where", "join", "on", "using", "left", "right", "inner", "outer", "cross", "full", "natural",
+    "group", "order", "limit", "having", "union", "except", "intersect", "window", "as",
+}
+
+
+@dataclass(frozen=True)
+class FTSIndex:
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+
+
+def fts_table_name(table: str) -> str:
+    return f"{table}{FTS_SUFFIX}"
+
+
+def trigram_supported() -> bool:
+    """The trigram tokenizer needs SQLite 3.34+ compiled with FTS5."""
+    if sqlite3.sqlite_version_info < (3, 34, 0):
+        return False
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(a, tokenize='trigram')")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def create_fts_indexes(
+    database_path: Union[str, Path],
+    indexes: Optional[Dict[str, List[str]]] = None,
+    rebuild: bool = False,
+) -> List[str]:
+    """
+    Create (or rebuild) the FTS5 indexes and their sync triggers.
+
+    Args:
+        database_path: SQLite database file (opened read-write)
+        indexes: Table -> columns to index (defaults to FTS_INDEXES)
+        rebuild: Drop and recreate indexes that already exist
+
+    Returns:
+        Names of the FTS tables created or rebuilt.
+    """
+    if not trigram_supported():
+        raise RuntimeError(f"SQLite {sqlite3.sqlite_version} lacks FTS5 with the trigram tokenizer (3.34+ needed)")
+
+    indexes = indexes or FTS_INDEXES
+    conn = sqlite3.connect(str(database_path))
+    built = []
+    try:
+        existing_tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, columns in indexes.items():
+            if table not in existing_tables:
+                logger.warning(f"Skipping FTS index for missing table '{table}'")
+                continue
+            fts = fts_table_name(table)
+            if fts in existing_tables and not rebuild:
+                continue
+
+            started = time.perf_counter()
+            column_list = ", ".join(columns)
+            new_values = ", ".join(f"new.{c}" for c in columns)
+            old_values = ", ".join(f"old.{c}" for c in columns)
+            conn.executescript(
+                f"""
+                BEGIN;
+                DROP TABLE IF EXISTS {fts};
+                CREATE VIRTUAL TABLE {fts} USING fts5(
+                    {column_list}, content='{table}', content_rowid='rowid', tokenize='trigram'
+                );
+                DROP TRIGGER IF EXISTS {fts}_ai;
+                DROP TRIGGER IF EXISTS {fts}_ad;
+                DROP TRIGGER IF EXISTS {fts}_au;
+                CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+                END;
+                CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values});
+                END;
+                CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values});
+                    INSERT INTO {fts}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+                END;
+                INSERT INTO {fts}({fts}) VALUES ('rebuild');
+                COMMIT;
+                """
+            )
+            built.append(fts)
+            logger.info(f"Built {fts}({column_list}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+    finally:
+        conn.close()
+    return built
+
+
+def drop_fts_indexes(database_path: Union[str, Path], tables: Optional[Sequence[str]] = None) -> None:
+    """Drop the FTS tables and triggers of `tables` (all configured tables if None)."""
+    conn = sqlite3.connect(str(database_path))
+    try:
+        for table in tables or FTS_INDEXES:
+            fts = fts_table_name(table)
+            conn.executescript(
+                f"""
+                DROP TRIGGER IF EXISTS {fts}_ai;
+                DROP TRIGGER IF EXISTS {fts}_ad;
+                DROP TRIGGER IF EXISTS {fts}_au;
+                DROP TABLE IF EXISTS {fts};
+                """
+            )
+    finally:
+        conn.close()
+
+
+def discover_fts_indexes(conn: sqlite3.Connection) -> Dict[str, FTSIndex]:
+    """
+    Find the external-content trigram FTS5 tables of a database.
+
+    Returns:
+        Base table name -> FTSIndex.
+    """
+    found = {}
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%fts5%'"
+    ).fetchall()
+    for name, sql in rows:
+        body = re.search(r"fts5\s*\((.*)\)", sql, re.IGNORECASE | re.DOTALL)
+        content = re.search(r"content\s*=\s*'([^']+)'", sql, re.IGNORECASE)
+        if not body or not content or "trigram" not in sql.lower():
+            continue
+        columns = tuple(
+            part.strip()
+            for part in body.group(1).split(",")
+            if part.strip() and "=" not in part
+        )
+        found[content.group(1)] = FTSIndex(name=name, table=content.group(1), columns=columns)
+    return found
+
+
+def internal_tables(conn: sqlite3.Connection) -> Set[str]:
+    """FTS virtual tables and their shadow tables, which the agent should not see."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    names = set()
+    for index in discover_fts_indexes(conn).values():
+        names.add(index.name)
+        names.update(f"{index.name}{suffix}" for suffix in _SHADOW_SUFFIXES)
+    return names & existing
+
+
+def describe_fts_indexes(indexes: Dict[str, FTSIndex], tables: Optional[Sequence[str]] = None) -> str:
+    """Prompt text advertising the full-text indexes of `tables` (all if None)."""
+    wanted = {t.strip().lower() for t in tables} if tables is not None else None
+    selected = [
+        index for table, index in sorted(indexes.items()) if wanted is None or table.lower() in wanted
+    ]
+    if not selected:
+        return ""
+    lines = [f"- {index.name} indexes {index.table}({', '.join(index.columns)})" for index in selected]
+    example = selected[0]
+    return (
+        "Full-text indexes (substring search, case-insensitive, terms of 3+ characters):\n"
+        + "\n".join(lines)
+        + "\nFor text search prefer "
+        + f"`{example.table}.rowid IN (SELECT rowid FROM {example.name} WHERE {example.columns[0]} MATCH '\"term\"')` "
+        + f"over `{example.columns[0]} LIKE '%term%'`."
+    )
+
+
+def table_aliases(query: str) -> Dict[str, str]:
+    """Map of lower-cased alias (and table name) -> table for the FROM/JOIN clauses of a query."""
+    aliases = {}
+    for start in _TABLE_LIST.finditer(query):
+        position = start.end()
+        while True:
+            reference = _TABLE_REFERENCE.match(query, position)
+            if not reference:
+                break
+            table, alias = reference.groups()
+            aliases[table.lower()] = table
+            if alias and alias.lower() in _CLAUSE_KEYWORDS:
+                break
+            if alias:
+                aliases[alias.lower()] = table
+            separator = _TABLE_SEPARATOR.match(query, reference.end())
+            if not separator:
+                break
+            position = separator.end()
+    return aliases
+
+
+def table_columns(conn: sqlite3.Connection) -> Dict[str, Set[str]]:
+    """Lower-cased table name -> lower-cased column names, for every table of a database."""
+    columns = {}
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')").fetchall():
+        columns[table.lower()] = {row[1].lower() for row in conn.execute(f'PRAGMA table_info("{table}")')}
+    return columns
+
+
+def rewrite_like_predicates(
+    query: str,
+    indexes: Dict[str, FTSIndex],
+    columns: Optional[Dict[str, Set[str]]] = None,
+) -> Tuple[str, List[str]]:
+    """
+    Rewrite `column LIKE '%term%'` on indexed columns into an FTS lookup.
+
+    Only two-sided wildcards with a plain term of at least three characters
+    are rewritten, which keeps the result identical to the LIKE. The column
+    must be qualified, or the query must read a single table, or exactly one
+    of its tables must have the column (which needs `columns`, from
+    `table_columns`). Otherwise SQLite would reject the column as ambiguous,
+    and the rewrite must not pick a table for it.
+
+    Returns:
+        The rewritten query and a note per rewrite.
+    """
+    if not indexes:
+        return query, []
+    by_table = {table.lower(): index for table, index in indexes.items()}
+    aliases = table_aliases(query)
+    notes: List[str] = []
+
+    def rewrite(m: re.Match) -> str:
+        qualifier, column, term = m.group(1), m.group(2), m.group(3)
+        if len(term) < MIN_TERM_LENGTH or re.search(r"[%_]", term):
+            return m.group(0)
+        if qualifier:
+            table = aliases.get(qualifier.lower())
+            candidates = [table] if table else []
+        else:
+            tables = {table.lower(): table for table in aliases.values()}
+            if len(tables) > 1 and (columns is None or any(t not in columns for t in tables)):
+                return m.group(0)
+            candidates = [
+                table for key, table in tables.items() if len(tables) == 1 or column.lower() in columns[key]
+            ]
+        if len(candidates) != 1 or candidates[0].lower() not in by_table:
+            return m.group(0)
+        index = by_table[candidates[0].lower()]
+        if column.lower() not in map(str.lower, index.columns):
+            return m.group(0)
+
+        if qualifier:
+            target = f"{qualifier}.rowid"
+        else:
+            # Refer to the table by its alias if the query gives it one
+            alias = next((a for a, t in aliases.items() if t == candidates[0] and a != t.lower()), candidates[0])
+            target = f"{alias}.rowid"
+        match_term = '"' + term.replace("''", "'").replace('"', '""') + '"'
+        match_term = match_term.replace("'", "''")
+        notes.append(f"{column} LIKE '%{term}%' -> {index.name} MATCH")
+        return f"{target} IN (SELECT rowid FROM {index.name} WHERE {column} MATCH '{match_term}')"
+
+    query = re.sub(
+        r"(?<![\w.])(?:([A-Za-z_]\w*)\.)?\"?([A-Za-z_]\w*)\"?\s+LIKE\s+'%((?:[^'%]|'')*)%'(?!\s*ESCAPE)",
+        rewrite,
+        query,
+        flags=re.IGNORECASE,
+    )
+    # NOT LIKE keeps its full-scan semantics (NULL handling differs from NOT IN)
+    return query, notes
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build FTS5 trigram indexes for free-text columns.")
+    parser.add_argument("--db", required=True, help="SQLite database to index")
+    parser.add_argument("--rebuild", action="store_true", help="Recreate indexes that already exist")
+    parser.add_argument("--drop", action="store_true", help="Drop the indexes and their triggers instead")
+    args = parser.parse_args(argv)
+
+    if args.drop:
+        drop_fts_indexes(args.db)
+        print(f"Dropped FTS indexes from {args.db}")
+        return
+    built = create_fts_indexes(args.db, rebuild=args.rebuild)
+    print(f"Built {len(built)} FTS index(es) in {args.db}: {', '.join(built) or 'already up to date'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _series_key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    """Build a hashable key for a metric name plus its labels."""
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry.
+
+    Counters accumulate totals, observations keep count/sum/min/max so that
+    averages (e.g. iterations per answer) can be compared across label sets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._observations: Dict[Tuple, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increase a counter by `value`."""
+        key = _series_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a single observation (latency, iteration count, tokens, ...)."""
+        key = _series_key(name, labels)
+        with self._lock:
+            series = self._observations.get(key)
+            if series is None:
+                self._observations[key] = {
+                    "count": 1,
+                    "sum": value,
+                    "min": value,
+                    "max": value,
+                }
+                return
+            series["count"] += 1
+            series["sum"] += value
+            series["min"] = min(series["min"], value)
+            series["max"] = max(series["max"], value)
+
+    def get_counter(self, name: str, **labels: Any) -> float:
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(_series_key(name, labels), 0)
+
+    def get_observation(self, name: str, **labels: Any) -> Optional[Dict[str, float]]:
+        """Return count/sum/min/max/mean for an observed series, if any."""
+        with self._lock:
+            series = self._observations.get(_series_key(name, labels))
+            if series is None:
+                return None
+            return {**series, "mean": series["sum"] / series["count"]}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a plain-dict copy of every series, suitable for logging or JSON."""
+
+        def fmt(key: Tuple) -> str:
+            name, labels = key
+            if not labels:
+                return name
+            return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+        with self._lock:
+            return {
+                "counters": {fmt(k): v for k, v in self._counters.items()},
+                "observations": {
+                    fmt(k): {**v, "mean": v["sum"] / v["count"]}
+                    for k, v in self._observations.items()
+                },
+            }
+
+    def reset(self) -> None:
+        """Drop every recorded series."""
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+    def log_snapshot(self) -> None:
+        """Write the current snapshot to the metrics log."""
+        logger.info(f"Metrics snapshot: {self.snapshot()}")
+
+
+# Process-wide registry shared by all agents
+metrics = MetricsRegistry()
@@ -0,0 +1,281 @@
+"""
+Sandboxed SQL execution in a pool of worker processes.
+
+Each worker is started ahead of time, holds its own read-only SQLite
+connection and runs under resource limits (address space and CPU time,
+POSIX only). A query that runs past the wall-clock timeout gets its worker
+killed and replaced, so a pathological statement can neither exhaust the
+memory of the calling process nor stall it. Queries from different
+threads run in different processes, in parallel across cores.
+
+Results cross the process boundary as marshal-encoded tuples, which is
+compact and fast for the plain values SQLite returns.
+"""
+
+import atexit
+import dataclasses
+import marshal
+import multiprocessing
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .logger import get_logger
+from .sqlite_profiles import SQLiteProfile, get_profile
+
+logger = get_logger(__name__)
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, timeouts still apply
+    resource = None
+
+
+class SQLSandboxError(RuntimeError):
+    """A query failed inside a sandbox worker."""
+
+
+class SQLSandboxTimeout(SQLSandboxError):
+    """A query exceeded the wall-clock timeout and its worker was killed."""
+
+
+def _set_limits(memory_limit_bytes: Optional[int]) -> None:
+    if resource is None or not memory_limit_bytes:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        memory_limit_bytes = min(memory_limit_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, hard))
+
+
+def _set_cpu_budget(cpu_limit_s: Optional[int]) -> None:
+    """Allow `cpu_limit_s` more seconds of CPU; exceeding it raises SIGXCPU, ending the worker."""
+    if resource is None or not cpu_limit_s:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_limit_s
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(
+    conn,
+    database_uri: str,
+    pragmas: List[str],
+    memory_limit_bytes: Optional[int],
+    cpu_limit_s: Optional[int],
+    statement_cache_size: int,
+) -> None:
+    """Worker loop: receive (query, params, max_rows), reply with a marshal-encoded (ok, payload)."""
+    import sqlite3
+
+    _set_limits(memory_limit_bytes)
+    db = sqlite3.connect(database_uri, uri=True, cached_statements=statement_cache_size)
+    for statement in pragmas:
+        try:
+            db.execute(statement)
+        except sqlite3.Error:
+            pass
+    conn.send_bytes(marshal.dumps((True, "ready")))
+
+    while True:
+        try:
+            query, params, max_rows = conn.recv()
+        except (EOFError, OSError):
+            break
+        if query is None:
+            break
+
+        _set_cpu_budget(cpu_limit_s)
+        try:
+            cursor = db.execute(query, params)
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            rows = cursor.fetchmany(max_rows + 1) if columns else []
+            cursor.close()
+            payload = (True, (columns, rows[:max_rows], len(rows) > max_rows))
+        except MemoryError:
+            # The interpreter may be in a bad state; report and let the pool respawn us
+            conn.send_bytes(marshal.dumps((False, "Query exceeded the worker memory limit")))
+            break
+        except Exception as e:
+            payload = (False, f"({type(e).__module__}.{type(e).__name__}) {e}")
+
+        try:
+            data = marshal.dumps(payload)
+        except ValueError as e:
+            data = marshal.dumps((False, f"Unsupported value in result: {e}"))
+        conn.send_bytes(data)
+
+    db.close()
+
+
+class _Worker:
+    def __init__(self, ctx, database_uri: str, pragmas: List[str], memory_limit_bytes, cpu_limit_s, statement_cache_size):
+        self.conn, child_conn = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, database_uri, pragmas, memory_limit_bytes, cpu_limit_s, statement_cache_size),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self, timeout: float) -> None:
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise SQLSandboxError("SQL sandbox worker did not start in time")
+        marshal.loads(self.conn.recv_bytes())
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send((None, (), 0))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=2)
+        self.kill()
+
+
+class SQLSandboxPool:
+    """Pool of pre-started SQLite worker processes with resource limits."""
+
+    def __init__(
+        self,
+        database_path: Union[str, Path],
+        workers: int = 2,
+        timeout_s: float = 30.0,
+        memory_limit_mb: Optional[int] = 1024,
+        cpu_limit_s: Optional[int] = 30,
+        profile: Union[str, SQLiteProfile, None] = None,
+        statement_cache_size: int = 128,
+    ):
+        """
+        Args:
+            database_path: SQLite database file (opened read-only by the workers)
+            workers: Number of worker processes
+            timeout_s: Wall-clock limit per query; the worker is killed when exceeded
+            memory_limit_mb: Address-space limit per worker (POSIX only, None to disable)
+            cpu_limit_s: CPU-time limit per query (POSIX only, None to disable)
+            profile: SQLite profile whose read PRAGMAs the workers apply
+            statement_cache_size: Prepared statements cached per worker connection
+        """
+        self.database_uri = Path(database_path).resolve().as_uri() + "?mode=ro"
+        self.timeout_s = timeout_s
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.cpu_limit_s = cpu_limit_s
+        self.statement_cache_size = statement_cache_size
+        # Workers only read: drop journal_mode (needs write access) and force query_only
+        read_profile = dataclasses.replace(get_profile(profile), journal_mode=None, query_only=True)
+        self.pragmas = read_profile.pragmas()
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        started = time.perf_counter()
+        new_workers = [self._spawn() for _ in range(max(1, workers))]
+        for worker in new_workers:
+            worker.wait_ready(timeout=60)
+            self._idle.put(worker)
+        logger.info(
+            f"SQL sandbox started {len(new_workers)} worker(s) in {(time.perf_counter() - started) * 1000:.0f} ms "
+            f"(timeout {timeout_s}s, memory {memory_limit_mb} MB, cpu {cpu_limit_s}s)"
+        )
+        atexit.register(self.close)
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(
+            self._ctx, self.database_uri, self.pragmas, self.memory_limit_bytes, self.cpu_limit_s, self.statement_cache_size
+        )
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a broken worker and put a fresh one in the pool."""
+        worker.kill()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+        if self._closed:
+            return
+        replacement = self._spawn()
+        try:
+            replacement.wait_ready(timeout=60)
+        except SQLSandboxError as e:
+            logger.error(f"Could not respawn SQL sandbox worker: {e}")
+            return
+        self._idle.put(replacement)
+
+    def execute(self, query: str, max_rows: int = 200, params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """
+        Run a query in a worker process.
+
+        Args:
+            query: SQL query, optionally with `?` placeholders
+            max_rows: Maximum rows to return
+            params: Values bound to the placeholders
+
+        Returns:
+            Dict with columns, rows (list of tuples), truncated flag and elapsed_ms,
+            the same shape as SQLTools.execute.
+
+        Raises:
+            SQLSandboxTimeout: The query ran longer than the timeout.
+            SQLSandboxError: The query failed or its worker died.
+        """
+        if self._closed:
+            raise SQLSandboxError("SQL sandbox is closed")
+
+        try:
+            worker = self._idle.get(timeout=self.timeout_s)
+        except queue.Empty:
+            raise SQLSandboxError("No SQL sandbox worker became available in time")
+        started = time.perf_counter()
+        try:
+            worker.conn.send((query, tuple(params), max_rows))
+            if not worker.conn.poll(self.timeout_s):
+                logger.warning(f"SQL sandbox query exceeded {self.timeout_s}s, killing worker: {query[:200]}")
+                self._replace(worker)
+                raise SQLSandboxTimeout(f"Query exceeded the {self.timeout_s:g}s time limit and was cancelled")
+            ok, payload = marshal.loads(worker.conn.recv_bytes())
+        except (EOFError, OSError) as e:
+            logger.warning(f"SQL sandbox worker died ({e!r}), respawning")
+            self._replace(worker)
+            raise SQLSandboxError("Query exceeded the worker's resource limits and was terminated") from e
+
+        if not worker.process.is_alive() or (not ok and "memory limit" in str(payload)):
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+
+        if not ok:
+            raise SQLSandboxError(payload)
+        columns, rows, truncated = payload
+        return {
+            "columns": list(columns),
+            "rows": [tuple(row) for row in rows],
+            "truncated": truncated,
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    def close(self) -> None:
+        """Stop all workers."""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            workers, self._all = list(self._all), []
+        for worker in workers:
+            worker.stop()
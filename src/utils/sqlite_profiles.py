@@ -0,0 +1,169 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """
+    Named set of PRAGMAs applied to every pooled SQLite connection.
+
+    Fields left as None keep SQLite's defaults (or the file's persisted
+    setting, for journal_mode). journal_mode is persisted in the database
+    file, so read-only profiles never set it; convert a database once with
+    `set_journal_mode` instead.
+    """
+
+    name: str
+    description: str = ""
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = None
+    cache_size: Optional[int] = None  # negative values are KiB, positive are pages
+    mmap_size: Optional[int] = None  # bytes, 0 disables memory-mapped I/O
+    temp_store: Optional[str] = None  # DEFAULT | FILE | MEMORY
+    query_only: bool = False
+    busy_timeout_ms: Optional[int] = 5000
+
+    def pragmas(self) -> List[str]:
+        """PRAGMA statements in the order they must be applied."""
+        statements = []
+        # journal_mode first: it needs write access, which query_only would block.
+        # It is skipped for read-only profiles, which must not rewrite the file.
+        if self.journal_mode and not self.query_only:
+            statements.append(f"PRAGMA journal_mode = {self.journal_mode}")
+        if self.synchronous:
+            statements.append(f"PRAGMA synchronous = {self.synchronous}")
+        if self.cache_size is not None:
+            statements.append(f"PRAGMA cache_size = {self.cache_size}")
+        if self.mmap_size is not None:
+            statements.append(f"PRAGMA mmap_size = {self.mmap_size}")
+        if self.temp_store:
+            statements.append(f"PRAGMA temp_store = {self.temp_store}")
+        if self.busy_timeout_ms is not None:
+            statements.append(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        if self.query_only:
+            statements.append("PRAGMA query_only = ON")
+        return statements
+
+
+PROFILES: Dict[str, SQLiteProfile] = {
+    "default": SQLiteProfile(
+        name="default",
+        description="SQLite defaults, no tuning (previous behaviour)",
+        busy_timeout_ms=None,
+    ),
+    "read_heavy": SQLiteProfile(
+        name="read_heavy",
+        description="Analytics: 1 GB mmap, read-only",
+        # cache_size and temp_store stay at SQLite's defaults on purpose: the
+        # sorter sizes its in-memory runs from cache_size, and on the showroom
+        # workload a larger cache or temp_store=MEMORY made GROUP BY sorts slower.
+        mmap_size=1 << 30,
+        query_only=True,
+    ),
+    "low_memory": SQLiteProfile(
+        name="low_memory",
+        description="Small workers: 2 MB page cache, no mmap, temp tables on disk, read-only",
+        cache_size=-2048,
+        mmap_size=0,
+        temp_store="FILE",
+        query_only=True,
+    ),
+    "read_write": SQLiteProfile(
+        name="read_write",
+        description="Mixed workloads that write: WAL, 8 MB page cache, 256 MB mmap",
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size=-8192,
+        mmap_size=256 << 20,
+    ),
+}
+
+
+def get_profile(profile: Union[str, SQLiteProfile, None]) -> SQLiteProfile:
+    """
+    Resolve a profile name (or pass through a profile instance).
+
+    Raises:
+        ValueError: If the name is not a known profile.
+    """
+    if isinstance(profile, SQLiteProfile):
+        return profile
+    name = (profile or "default").strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{profile}'. Available: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def apply_profile(connection: sqlite3.Connection, profile: SQLiteProfile) -> None:
+    """Apply a profile's PRAGMAs to a raw DB-API connection."""
+    cursor = connection.cursor()
+    try:
+        for statement in profile.pragmas():
+            try:
+                cursor.execute(statement)
+            except sqlite3.OperationalError as e:
+                # e.g. journal_mode=WAL on a read-only file system; keep the connection usable
+                logger.warning(f"Could not apply '{statement}' (profile {profile.name}): {e}")
+    finally:
+        cursor.close()
+
+
+def set_journal_mode(database_path: Union[str, Path], mode: str = "WAL") -> str:
+    """
+    Persistently change a database file's journal mode, as an explicit setup step.
+
+    WAL lets readers run while a writer commits; it also leaves `-wal` and
+    `-shm` files next to the database while it is open.
+
+    Returns:
+        The journal mode now in effect.
+    """
+    connection = sqlite3.connect(str(database_path))
+    try:
+        return connection.execute(f"PRAGMA journal_mode = {mode}").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def create_sqlite_engine(
+    database_path: Union[str, Path], profile: Union[str, SQLiteProfile, None] = None, **kwargs
+) -> Engine:
+    """
+    Create a SQLAlchemy engine whose pooled connections all use `profile`.
+
+    Args:
+        database_path: Path to the SQLite database file
+        profile: Profile name or instance (default: no tuning)
+        **kwargs: Extra arguments for `sqlalchemy.create_engine`
+
+    Returns:
+        Configured SQLAlchemy engine.
+    """
+    profile = get_profile(profile)
+    engine = create_engine(f"sqlite:///{database_path}", **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_profile(dbapi_connection, profile)
+
+    logger.info(f"SQLite engine for {database_path} using profile '{profile.name}'")
+    return engine
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Set the persistent journal mode of a SQLite database.")
+    parser.add_argument("database", help="Database file")
+    parser.add_argument("--journal-mode", default="WAL", help="WAL, DELETE, TRUNCATE, ... (default: WAL)")
+    args = parser.parse_args()
+    print(f"{args.database}: journal_mode={set_journal_mode(args.database, args.journal_mode)}")
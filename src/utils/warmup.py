@@ -0,0 +1,105 @@
+"""
+Background warm-up of lazily loaded components.
+
+The embedding model, vector store and few-shot example store are loaded on
+first use, so a process that only answers SQL never imports torch or
+chromadb. Interactive deployments can instead load them in a daemon thread
+right after startup (`WARMUP_COMPONENTS`), overlapping the load with the
+time until the first question instead of delaying startup. The SQL column
+profiles are built the same way, since their first build scans every table.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from . import config
+from .logger import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+
+def _warm_embeddings() -> None:
+    from .embeddings import get_embeddings
+
+    # The first forward pass initializes the model's kernels as well
+    get_embeddings().embed_query("warm-up")
+
+
+def _warm_vector_store() -> None:
+    from src.agents.rag.vector_store import get_vector_store_manager
+
+    get_vector_store_manager().get_vectorstore()
+
+
+def _warm_few_shot() -> None:
+    from src.agents.text_to_sql.text_to_sql_workflow import get_example_store
+
+    get_example_store()
+
+
+def _warm_column_profiles() -> None:
+    from src.agents.text_to_sql.text_to_sql_tools import refresh_column_profiles
+
+    refresh_column_profiles()
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "embeddings": _warm_embeddings,
+    "vector_store": _warm_vector_store,
+    "few_shot": _warm_few_shot,
+    "column_profiles": _warm_column_profiles,
+}
+
+_started: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+
+
+def warm_up(components: Iterable[str]) -> Dict[str, float]:
+    """
+    Load the given components now; failures are logged, not raised.
+
+    Args:
+        components: Names from WARMUP_STEPS, in load order
+
+    Returns:
+        Seconds spent per component that loaded.
+    """
+    timings = {}
+    for name in components:
+        step = WARMUP_STEPS.get(name)
+        if step is None:
+            logger.warning(f"Unknown warm-up component '{name}', expected one of {sorted(WARMUP_STEPS)}")
+            continue
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e}")
+            continue
+        timings[name] = time.perf_counter() - started
+        metrics.observe("warmup.seconds", timings[name], component=name)
+    if timings:
+        logger.info("Warm-up done: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items()))
+    return timings
+
+
+def start_background_warmup(components: Optional[Iterable[str]] = None) -> Optional[threading.Thread]:
+    """
+    Warm up in a daemon thread, once per process.
+
+    Args:
+        components: Defaults to WARMUP_COMPONENTS
+
+    Returns:
+        The warm-up thread (the existing one on later calls), or None if there is nothing to load.
+    """
+    global _started
+    components = list(config.WARMUP_COMPONENTS if components is None else components)
+    with _start_lock:
+        if _started is not None or not components:
+            return _started
+        _started = threading.Thread(target=warm_up, args=(components,), name="warmup", daemon=True)
+        _started.start()
+        return _started